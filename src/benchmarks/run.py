@@ -0,0 +1,262 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import config
+from src.instrumentation import PeakRSS
+from src.benchmarks.synthetic import SCALES, generate_dataset
+from src.datasets.depmap import load_cell_info
+from src.datasets.mutations import load_mut
+from src.datasets.pathway import load_kegg_from_files
+from src.datasets.ppi import load_pi, load_ppi, load_string_data
+from src.datasets.sl import load_non_sl_data, load_sl_data, load_sl_table
+from src.feature_extraction.cell_line_features import compute_codependency_features_batch
+from src.feature_extraction.combined_features import PairFeatureExtractor
+from src.feature_extraction.mutation_features import (
+    compute_mutation_context_features_batch, process_detailed_mutations
+)
+from src.feature_extraction.pathway_features import compute_kegg_features
+from src.feature_extraction.ppi_features import compute_string_features
+from src.training.dataset import create_training_dataset
+
+BENCHMARK_DIR = config.RESULTS_DIR / 'benchmarks'
+
+
+def measure(fn, repeat=3):
+    """
+    Time `fn` and profile its memory.
+
+    Timing uses the best of `repeat` plain runs; memory is measured in one
+    extra run under tracemalloc (peak traced allocations, which includes
+    numpy buffers) while a thread samples peak RSS above the starting RSS.
+    Stray prints are swallowed.
+
+    Returns:
+    --------
+    result : object
+        Return value of the last run
+    stats : dict
+        seconds, peak_alloc_mb, peak_rss_delta_mb
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        with PeakRSS() as rss:
+            result = fn()
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return result, {
+        'seconds': min(times),
+        'peak_alloc_mb': peak_alloc / 2 ** 20,
+        'peak_rss_delta_mb': (rss.peak - rss.start) / 2 ** 20,
+    }
+
+
+def run_benchmarks(files, repeat=3, n_pairs=20000, groups=None, seed=config.SEED):
+    """
+    Benchmark every loader, every feature group and `create_training_dataset`.
+
+    Parameters:
+    -----------
+    files : dict
+        Logical name -> path, as returned by `generate_dataset`
+    repeat : int
+        Timed runs per benchmark
+    n_pairs : int
+        Pairs scored by the feature-group benchmarks
+    groups : list of str, optional
+        Subset of {'loaders', 'features', 'dataset'}; loaders always run
+        (untimed if excluded) because the other groups need their output
+
+    Returns:
+    --------
+    results : DataFrame
+        One row per benchmark: group, name, seconds, peak_alloc_mb,
+        peak_rss_delta_mb, items, items_per_second
+    """
+    groups = set(groups or ['loaders', 'features', 'dataset'])
+    records = []
+
+    def bench(group, name, fn, items=None):
+        if group not in groups:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return fn()
+        result, stats = measure(fn, repeat)
+        n_items = items(result) if callable(items) else items
+        records.append({
+            'group': group, 'name': name, **stats, 'items': n_items,
+            'items_per_second': n_items / stats['seconds'] if n_items and stats['seconds'] > 0 else np.nan,
+        })
+        print(f"  {group:>8} | {name:<32} {stats['seconds']:8.3f}s  "
+              f"alloc {stats['peak_alloc_mb']:8.1f} MB  rss +{stats['peak_rss_delta_mb']:7.1f} MB")
+        return result
+
+    # Loaders (absolute paths pass through the DATA_DIR join unchanged)
+    genesdf = bench('loaders', 'load_cell_info', lambda: load_cell_info(files['gene_effect']), len)
+    bench('loaders', 'load_mut', lambda: load_mut(files['mutations']), len)
+    mutations_df = pd.read_csv(files['mutations'])
+    cell_line_mutations = bench('loaders', 'process_detailed_mutations',
+                                lambda: process_detailed_mutations(mutations_df), lambda m: m.size)
+    string_df = bench('loaders', 'load_ppi', lambda: load_ppi(files['string_links']), len)
+    _, protein_info = bench('loaders', 'load_pi', lambda: load_pi(files['string_info']), lambda r: len(r[0]))
+
+    # The feature code looks STRING pairs up by gene symbol
+    named_string_df = string_df.assign(
+        protein1=string_df['protein1'].map(protein_info), protein2=string_df['protein2'].map(protein_info)
+    )
+    string_data = bench('loaders', 'load_string_data', lambda: load_string_data(named_string_df, 400), len)
+    kegg_pathways, _, _ = bench('loaders', 'load_kegg_from_files',
+                                lambda: load_kegg_from_files(files['kegg_genes'], files['kegg_pathways']),
+                                lambda r: len(r[0]))
+    sl_real, _ = bench('loaders', 'load_sl_data', lambda: load_sl_data(files['sl']), lambda r: len(r[0]))
+    non_sl = bench('loaders', 'load_non_sl_data', lambda: load_non_sl_data(files['non_sl']), len)
+    bench('loaders', 'load_sl_table', lambda: load_sl_table(files['sl']), len)
+
+    # Feature groups on a fixed, seeded pair sample
+    extractor = bench('features', 'PairFeatureExtractor.__init__', lambda: PairFeatureExtractor(
+        genesdf, cell_line_mutations, string_data, kegg_pathways
+    ))
+    rng = np.random.default_rng(seed)
+    gene_a = extractor.genes.values[rng.integers(0, len(extractor.genes), n_pairs)].astype(object)
+    gene_b = extractor.genes.values[rng.integers(0, len(extractor.genes), n_pairs)].astype(object)
+    idx_a, idx_b = extractor.gene_ids(gene_a), extractor.gene_ids(gene_b)
+    mut_idx_a = extractor._lookup(extractor._mutation_lookup, gene_a)
+    mut_idx_b = extractor._lookup(extractor._mutation_lookup, gene_b)
+
+    bench('features', 'codependency_batch',
+          lambda: compute_codependency_features_batch(idx_a, idx_b, extractor.effects), n_pairs)
+    bench('features', 'mutation_context_batch', lambda: compute_mutation_context_features_batch(
+        idx_a, idx_b, extractor.effects, mut_idx_a, mut_idx_b, extractor.mutated
+    ), n_pairs)
+    bench('features', 'string_features',
+          lambda: [compute_string_features(string_data, a, b) for a, b in zip(gene_a, gene_b)], n_pairs)
+    bench('features', 'kegg_features',
+          lambda: [compute_kegg_features(a, b, kegg_pathways) for a, b in zip(gene_a, gene_b)], n_pairs)
+    bench('features', 'combined_transform', lambda: extractor.transform(gene_a, gene_b), n_pairs)
+
+    # End-to-end training table
+    def pairs(df):
+        df = df[df['x_name'].notna().values & df['y_name'].notna().values]
+        return list(zip(df['x_name'], df['y_name']))
+
+    sl_pairs, non_sl_pairs = pairs(sl_real), pairs(non_sl)
+    bench('dataset', 'create_training_dataset',
+          lambda: create_training_dataset(sl_pairs, extractor, non_sl_pairs), lambda r: len(r[0]))
+
+    return pd.DataFrame(records)
+
+
+def baseline_path(scale, baseline_dir=BENCHMARK_DIR):
+    return Path(baseline_dir) / f"baseline_{scale}.json"
+
+
+def save_baseline(results, path, meta=None):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'meta': meta or {}, 'results': results.to_dict('records')}, f, indent=2, default=float)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return pd.DataFrame(json.load(f)['results'])
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25, min_seconds=0.01, min_mb=1.0):
+    """
+    Flag benchmarks that got slower or hungrier than the baseline.
+
+    A benchmark regresses when its time exceeds the baseline by more than
+    `tolerance` (relative) and `min_seconds` (absolute), or its peak
+    allocation by more than `tolerance` and `min_mb`. The absolute floors
+    keep timer noise on millisecond benchmarks from failing the run.
+
+    Returns:
+    --------
+    comparison : DataFrame
+        Per benchmark: seconds / baseline_seconds, time_ratio, memory_ratio, status
+    """
+    merged = results.merge(baseline, on=['group', 'name'], how='left', suffixes=('', '_baseline'))
+    merged['time_ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['memory_ratio'] = merged['peak_alloc_mb'] / merged['peak_alloc_mb_baseline']
+
+    slower = ((merged['seconds'] > merged['seconds_baseline'] * (1 + tolerance))
+              & (merged['seconds'] - merged['seconds_baseline'] > min_seconds))
+    hungrier = ((merged['peak_alloc_mb'] > merged['peak_alloc_mb_baseline'] * (1 + tolerance))
+                & (merged['peak_alloc_mb'] - merged['peak_alloc_mb_baseline'] > min_mb))
+    faster = merged['seconds'] < merged['seconds_baseline'] * (1 - tolerance)
+
+    merged['status'] = 'ok'
+    merged.loc[faster, 'status'] = 'faster'
+    merged.loc[hungrier, 'status'] = 'memory regression'
+    merged.loc[slower, 'status'] = 'regression'
+    merged.loc[merged['seconds_baseline'].isna(), 'status'] = 'new'
+
+    return merged[['group', 'name', 'seconds', 'seconds_baseline', 'time_ratio',
+                   'peak_alloc_mb', 'peak_alloc_mb_baseline', 'memory_ratio', 'status']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loaders, feature groups and dataset creation "
+                                                 "on seeded synthetic data")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=config.SEED)
+    parser.add_argument('--data-dir', help="Where to write the synthetic dataset "
+                                           "(default: results/benchmarks/data/<scale>_<seed>)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--n-pairs', type=int, default=20000)
+    parser.add_argument('--groups', nargs='+', choices=['loaders', 'features', 'dataset'])
+    parser.add_argument('--baseline', help="Baseline JSON (default: results/benchmarks/baseline_<scale>.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--output', help="Write this run's results to JSON")
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir) if args.data_dir else BENCHMARK_DIR / 'data' / f"{args.scale}_{args.seed}"
+    print(f"Generating '{args.scale}' synthetic dataset in {data_dir}...")
+    files = generate_dataset(data_dir, args.scale, seed=args.seed)
+
+    print("Running benchmarks...")
+    results = run_benchmarks(files, repeat=args.repeat, n_pairs=args.n_pairs, groups=args.groups, seed=args.seed)
+    meta = {'scale': args.scale, 'seed': args.seed, 'n_pairs': args.n_pairs, 'repeat': args.repeat,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    if args.output:
+        save_baseline(results, args.output, meta)
+
+    path = Path(args.baseline) if args.baseline else baseline_path(args.scale)
+    if args.save_baseline:
+        save_baseline(results, path, meta)
+        print(f"Baseline saved to {path}")
+        return 0
+
+    if not path.exists():
+        print(f"No baseline at {path}; rerun with --save-baseline to create one")
+        return 0
+
+    comparison = compare_to_baseline(results, load_baseline(path), tolerance=args.tolerance)
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print(comparison.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    regressions = comparison['status'].isin(['regression', 'memory regression'])
+    if regressions.any():
+        print(f"{int(regressions.sum())} benchmark(s) regressed beyond {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import config
+
+FILES = {
+    'gene_effect': 'CRISPRGeneEffect.csv',
+    'mutations': 'OmicsSomaticMutations.csv',
+    'string_links': '9606.protein.links.detailed.v12.0.txt',
+    'string_info': '9606.protein.info.v12.0.txt',
+    'kegg_genes': 'hsa_gene.list',
+    'kegg_pathways': 'hsa_gene_pathway.list',
+    'sl': 'gene_sl_gene.tsv',
+    'non_sl': 'gene_nonsl_gene.tsv',
+}
+
+# Roughly DepMap 24Q / STRING v12 / SynLethDB 2.0 proportions at 'full'
+SCALES = {
+    'tiny': dict(n_genes=400, n_cell_lines=60, n_sl_pairs=800, n_non_sl_pairs=300,
+                 mutations_per_line=40, n_ppi=4000, n_pathways=40),
+    'small': dict(n_genes=2000, n_cell_lines=200, n_sl_pairs=5000, n_non_sl_pairs=2000,
+                  mutations_per_line=150, n_ppi=40000, n_pathways=120),
+    'medium': dict(n_genes=8000, n_cell_lines=600, n_sl_pairs=20000, n_non_sl_pairs=8000,
+                   mutations_per_line=400, n_ppi=300000, n_pathways=250),
+    'full': dict(n_genes=18000, n_cell_lines=1100, n_sl_pairs=50000, n_non_sl_pairs=20000,
+                 mutations_per_line=800, n_ppi=2000000, n_pathways=350),
+}
+
+SL_SOURCES = ['Text Mining', 'CRISPR/CRISPRi', 'High Throughput', 'RNAi Screen', 'Low Throughput',
+              'Computational Prediction']
+SL_SOURCE_WEIGHTS = [0.25, 0.2, 0.15, 0.1, 0.05, 0.25]
+VARIANT_TYPES = ['SNV', 'DEL', 'INS', 'DNP']
+STRING_CHANNELS = ['neighborhood', 'fusion', 'cooccurence', 'coexpression', 'experimental', 'database',
+                   'textmining']
+
+
+def gene_symbols(n_genes):
+    return np.array([f"GENE{i + 1}" for i in range(n_genes)], dtype=object)
+
+
+def model_ids(n_cell_lines):
+    return np.array([f"ACH-{i + 1:06d}" for i in range(n_cell_lines)], dtype=object)
+
+
+def _popularity(rng, n, exponent=1.2):
+    """Heavy-tailed selection weights, so a few hub genes dominate like in real SL/PPI data."""
+    weights = rng.pareto(exponent, n) + 1.0
+    return weights / weights.sum()
+
+
+def _random_pairs(rng, n_pairs, n_genes, weights):
+    """Distinct unordered pairs (i < j) drawn with `weights`, without self-pairs."""
+    n_drawable = int(np.count_nonzero(weights))
+    max_pairs = n_drawable * (n_drawable - 1) // 2
+    if n_pairs > max_pairs:
+        raise ValueError(f"Cannot draw {n_pairs} distinct pairs from {n_drawable} genes (at most {max_pairs})")
+    pairs = np.empty((0, 2), dtype=np.int64)
+    while len(pairs) < n_pairs:
+        size = int((n_pairs - len(pairs)) * 1.3) + 16
+        a = rng.choice(n_genes, size, p=weights)
+        b = rng.choice(n_genes, size, p=weights)
+        new = np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1)[a != b]
+        pairs = np.unique(np.concatenate([pairs, new]), axis=0)
+    return pairs[rng.permutation(len(pairs))[:n_pairs]]
+
+
+def write_gene_effect(path, rng, genes, cell_lines, n_factors=10, nan_fraction=0.005):
+    """CRISPRGeneEffect.csv: cell lines x 'SYMBOL (entrez)' columns, unnamed ModelID index."""
+    loadings = rng.normal(size=(n_factors, len(genes))).astype(np.float32)
+    factors = rng.normal(size=(len(cell_lines), n_factors)).astype(np.float32)
+    effects = 0.12 * factors @ loadings + 0.2 * rng.standard_normal((len(cell_lines), len(genes)), dtype=np.float32)
+    essential = rng.random(len(genes)) < 0.08
+    effects[:, essential] -= 1.0
+    effects[rng.random(effects.shape) < nan_fraction] = np.nan
+
+    columns = [f"{gene} ({i + 1})" for i, gene in enumerate(genes)]
+    df = pd.DataFrame(effects, index=pd.Index(cell_lines, name=None), columns=columns)
+    df.to_csv(path, float_format='%.6f')
+
+
+def write_mutations(path, rng, genes, cell_lines, mutations_per_line):
+    """
+    OmicsSomaticMutations.csv with one row per mutation.
+
+    `load_mut` reads the older Hugo_Symbol / Entrez_Gene_Id / Variant_Type
+    names and `process_detailed_mutations` the current ModelID / HugoSymbol /
+    VariantInfo ones, so both sets of columns are written.
+    """
+    mutated_lines = cell_lines[rng.random(len(cell_lines)) < 0.9]
+    counts = rng.poisson(mutations_per_line, len(mutated_lines))
+    gene_idx = rng.choice(len(genes), counts.sum(), p=_popularity(rng, len(genes), exponent=2.0))
+    variant = rng.choice(VARIANT_TYPES, counts.sum(), p=[0.85, 0.08, 0.05, 0.02])
+
+    df = pd.DataFrame({
+        'ModelID': np.repeat(mutated_lines, counts),
+        'HugoSymbol': genes[gene_idx],
+        'EntrezGeneID': gene_idx + 1,
+        'VariantType': variant,
+        'VariantInfo': rng.choice(['MISSENSE', 'NONSENSE', 'FRAME_SHIFT_DEL', 'SPLICE_SITE', 'SILENT'], counts.sum()),
+        'isDeleterious': rng.random(counts.sum()) < 0.35,
+    })
+    df['Hugo_Symbol'] = df['HugoSymbol']
+    df['Entrez_Gene_Id'] = df['EntrezGeneID']
+    df['Variant_Type'] = df['VariantType']
+    df.to_csv(path, index=False)
+
+
+def write_string(links_path, info_path, rng, genes, n_ppi):
+    """STRING detailed links (space separated, both directions) and protein info."""
+    proteins = np.array([f"9606.ENSP{i + 1:011d}" for i in range(len(genes))], dtype=object)
+    pairs = _random_pairs(rng, n_ppi, len(genes), _popularity(rng, len(genes)))
+
+    channels = {
+        name: np.where(rng.random(len(pairs)) < share, rng.integers(40, 1000, len(pairs)), 0)
+        for name, share in zip(STRING_CHANNELS, [0.1, 0.02, 0.1, 0.5, 0.4, 0.2, 0.7])
+    }
+    evidence = np.stack(list(channels.values()), axis=1) / 1000.0
+    combined = 1.0 - np.prod(1.0 - evidence, axis=1)
+    channels['combined_score'] = np.clip(np.round(combined * 1000), 150, 999).astype(np.int64)
+
+    forward = pd.DataFrame({'protein1': proteins[pairs[:, 0]], 'protein2': proteins[pairs[:, 1]], **channels})
+    backward = forward.rename(columns={'protein1': 'protein2', 'protein2': 'protein1'})
+    links = pd.concat([forward, backward[forward.columns]], ignore_index=True).sort_values(['protein1', 'protein2'])
+    links.to_csv(links_path, sep=' ', index=False)
+
+    info = pd.DataFrame({
+        '#string_protein_id': proteins,
+        'preferred_name': genes,
+        'protein_size': rng.integers(80, 3000, len(genes)),
+    })
+    info.to_csv(info_path, sep=' ', index=False)
+
+
+def write_kegg(genes_path, pathways_path, rng, genes, n_pathways, annotated_fraction=0.4):
+    """KEGG hsa gene list and gene -> pathway link list (tab separated, no header)."""
+    entrez = np.arange(1, len(genes) + 1)
+    starts = rng.integers(1_000_000, 200_000_000, len(genes))
+    chromosomes = rng.integers(1, 23, len(genes))
+    with open(genes_path, 'w') as f:
+        for gene_id, symbol, chrom, start in zip(entrez, genes, chromosomes, starts):
+            f.write(f"hsa:{gene_id}\tCDS {chrom}:{start}..{start + 20000} {symbol}, {symbol}L; synthetic gene {gene_id}\n")
+
+    annotated = np.flatnonzero(rng.random(len(genes)) < annotated_fraction)
+    n_memberships = rng.integers(1, 7, len(annotated))
+    member = np.repeat(annotated, n_memberships)
+    pathway = rng.choice(n_pathways, len(member), p=_popularity(rng, n_pathways, exponent=1.5))
+    links = pd.DataFrame({'gene': member, 'pathway': pathway}).drop_duplicates()
+    with open(pathways_path, 'w') as f:
+        f.writelines(f"hsa:{gene + 1}\tpath:hsa{pathway:05d}\n" for gene, pathway in zip(links['gene'], links['pathway']))
+
+
+def write_sl_table(path, rng, genes, n_pairs, sources, weights, missing_fraction=0.001):
+    """SynLethDB-style gene pair TSV (x_id, x_name, y_id, y_name, rel_source, score)."""
+    pairs = _random_pairs(rng, n_pairs, len(genes), _popularity(rng, len(genes)))
+    x_name = genes[pairs[:, 0]].copy()
+    x_name[rng.random(len(pairs)) < missing_fraction] = np.nan
+    df = pd.DataFrame({
+        'x_id': pairs[:, 0] + 1,
+        'x_name': x_name,
+        'y_id': pairs[:, 1] + 1,
+        'y_name': genes[pairs[:, 1]],
+        'rel_source': rng.choice(sources, len(pairs), p=weights),
+        'r.statistic_score': np.round(rng.random(len(pairs)), 3),
+    })
+    df.to_csv(path, sep='\t', index=False)
+
+
+def generate_dataset(out_dir, scale='small', seed=config.SEED, overwrite=False, **overrides):
+    """
+    Write a seeded synthetic DepMap / STRING / KEGG / SynLethDB dataset.
+
+    Files use the names and formats the loaders in `src.datasets` expect
+    (see `FILES`). Generation is skipped when `out_dir` already holds a
+    dataset with the same parameters.
+
+    Parameters:
+    -----------
+    out_dir : str or Path
+    scale : str
+        Preset in `SCALES`
+    seed : int
+    **overrides
+        Individual size parameters, e.g. n_genes=5000
+
+    Returns:
+    --------
+    files : dict
+        Logical name -> absolute Path
+    """
+    params = {**SCALES[scale], **overrides}
+    out_dir = Path(out_dir)
+    files = {name: out_dir / file_name for name, file_name in FILES.items()}
+    manifest_file = out_dir / 'synthetic.json'
+    manifest = {'scale': scale, 'seed': seed, 'params': params}
+
+    if not overwrite and manifest_file.exists() and all(path.exists() for path in files.values()):
+        with open(manifest_file) as f:
+            if json.load(f) == manifest:
+                return files
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    genes = gene_symbols(params['n_genes'])
+    cell_lines = model_ids(params['n_cell_lines'])
+
+    write_gene_effect(files['gene_effect'], rng, genes, cell_lines)
+    write_mutations(files['mutations'], rng, genes, cell_lines, params['mutations_per_line'])
+    write_string(files['string_links'], files['string_info'], rng, genes, params['n_ppi'])
+    write_kegg(files['kegg_genes'], files['kegg_pathways'], rng, genes, params['n_pathways'])
+    write_sl_table(files['sl'], rng, genes, params['n_sl_pairs'], SL_SOURCES, SL_SOURCE_WEIGHTS)
+    write_sl_table(files['non_sl'], rng, genes, params['n_non_sl_pairs'], ['Non-SL'], [1.0])
+
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return files
@@ -1,6 +1,7 @@
-import genex
-import go
-import ppi
-import mutations
-import gtex
-import pathway
+from . import depmap
+from . import ppi
+from . import mutations
+from . import gtex
+from . import pathway
+from . import sl
+from . import omics
@@ -1,10 +1,15 @@
+import logging
+import re
+
 import pandas as pd
 import numpy as np
-import re
 
-from src import config
+from src import config, instrumentation
 
+logger = logging.getLogger(__name__)
 
+
+@instrumentation.timed('load_cell_info')
 def load_cell_info(file_path):
     file_path = config.DATA_DIR / file_path
     df = pd.read_csv(file_path)
@@ -19,7 +24,8 @@ def load_cell_info(file_path):
     for col in df.columns:
         df[col] = pd.to_numeric(df[col], errors='coerce')
    
-    print("Processed cell line data from depmap......100% complete")
+    instrumentation.count('rows', len(df))
+    logger.info("Processed cell line data from depmap: %d cell lines x %d genes", *df.shape)
     return df
 
 
@@ -42,3 +48,22 @@ def rename_unnamed(df):
 
     return df
 
+
+
+@instrumentation.timed('load_model_lineages')
+def load_model_lineages(file_path='Model.csv', lineage_column='OncotreeLineage'):
+    """
+    Lineage of every cell line from the DepMap model table.
+
+    Returns:
+    --------
+    lineages : Series
+        ModelID -> lineage (e.g. 'Breast', 'Lung'); models without one are dropped
+    """
+    file_path = config.DATA_DIR / file_path
+    df = pd.read_csv(file_path, usecols=['ModelID', lineage_column])
+    instrumentation.count('rows', len(df))
+
+    lineages = df.dropna().drop_duplicates('ModelID').set_index('ModelID')[lineage_column]
+    logger.info("Loaded lineages of %d cell lines (%d lineages)", len(lineages), lineages.nunique())
+    return lineages
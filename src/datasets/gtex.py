@@ -1,2 +1,198 @@
+import json
+import logging
+import tempfile
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
+
+from src import config, instrumentation
+from src.fingerprint import fingerprint_file, fingerprint_parts
+
+logger = logging.getLogger(__name__)
+
+GTEX_CACHE_DIR = config.RESULTS_DIR / 'gtex'
+
+GCT_ID_COLUMNS = ['Name', 'Description']
+
+
+class GTExExpression:
+    """
+    log2(TPM + 1) expression, genes x samples, with samples grouped by tissue.
+
+    Samples of tissue t are the contiguous columns offsets[t]:offsets[t+1],
+    so per-tissue statistics are segment reductions (`np.add.reduceat`)
+    over rows. `values` is a read-only float32 memmap: pair batches only
+    read the rows of the genes they touch.
+
+    Parameters:
+    -----------
+    values : ndarray (genes x samples, float32)
+    genes : list of str
+        Gene symbols (GCT Description column)
+    samples : list of str
+    tissues : list of str
+    offsets : array-like of int
+        Segment boundaries, length len(tissues) + 1
+    """
+
+    def __init__(self, values, genes, samples, tissues, offsets):
+        self.values = values
+        self.genes = pd.Index(genes)
+        self.samples = pd.Index(samples)
+        self.tissues = list(tissues)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._gene_lookup = {gene: i for i, gene in enumerate(self.genes)}
+        self._tissue_means = None
+
+    def __len__(self):
+        return len(self.genes)
+
+    @property
+    def n_samples(self):
+        """Samples per tissue."""
+        return np.diff(self.offsets)
+
+    def gene_ids(self, genes):
+        """Row ids for `genes` (-1 for genes not in the expression data)."""
+        return np.fromiter((self._gene_lookup.get(gene, -1) for gene in genes), dtype=np.int64, count=len(genes))
+
+    def segment_sum(self, x):
+        """Sum of each row of `x` (n x samples) within every tissue: n x tissues."""
+        return np.add.reduceat(x, self.offsets[:-1], axis=1)
+
+    def tissue_means(self, chunk_size=4096):
+        """Mean log-TPM of every gene in every tissue (genes x tissues), computed on first use."""
+        if self._tissue_means is None:
+            means = np.empty((len(self.genes), len(self.tissues)), dtype=np.float32)
+            for start in range(0, len(self.genes), chunk_size):
+                block = np.asarray(self.values[start:start + chunk_size], dtype=np.float64)
+                means[start:start + chunk_size] = self.segment_sum(block) / self.n_samples
+            self._tissue_means = means
+        return self._tissue_means
+
+
+def read_gct_columns(file_path):
+    """Column names of a GCT file (after the '#1.2' and dimension lines)."""
+    return pd.read_csv(file_path, sep='\t', skiprows=2, nrows=0).columns
+
+
+def sample_tissues(sample_attributes, samples, tissue_column='SMTSD', sample_column='SAMPID'):
+    """Tissue of each sample from the GTEx sample attributes table (NaN if unknown)."""
+    attributes = pd.read_csv(sample_attributes, sep='\t', usecols=[sample_column, tissue_column])
+    return pd.Series(samples, index=samples).map(attributes.set_index(sample_column)[tissue_column])
+
+
+@instrumentation.timed('load_gtex_expression')
+def load_gtex_expression(file_path, sample_attributes=None, tissues=None, genes=None, chunk_size=2000,
+                         tissue_column='SMTSD', cache_dir=GTEX_CACHE_DIR):
+    """
+    Stream a GTEx GCT matrix into a float32 log-TPM memmap.
+
+    The GCT file is read `chunk_size` genes at a time and only the columns
+    of the selected tissues are parsed, so peak memory is one chunk, not
+    the whole matrix. Kept rows are appended to a raw float32 file that is
+    then memory-mapped; the result is cached under a key made of the file
+    fingerprints and the selection.
+
+    Parameters:
+    -----------
+    file_path : str
+        GCT(.gz) file in DATA_DIR: either sample-level TPM (columns are
+        sample ids, needs `sample_attributes`) or tissue-level median TPM
+        (columns are tissues)
+    sample_attributes : str, optional
+        GTEx sample attributes table in DATA_DIR (SAMPID -> tissue)
+    tissues : list of str, optional
+        Tissues to keep (default: all)
+    genes : iterable of str, optional
+        Gene symbols to keep (default: all); duplicated symbols keep their
+        first row
+    tissue_column : str
+        Tissue column of the sample attributes (SMTSD: detailed tissue)
+    cache_dir : path or None
+        None disables caching: the memmap is written to a temporary
+        directory that is removed once the matrix is mapped
+
+    Returns:
+    --------
+    expression : GTExExpression
+    """
+    file_path = config.DATA_DIR / file_path
+    columns = read_gct_columns(file_path)
+    samples = pd.Index(columns.difference(GCT_ID_COLUMNS, sort=False))
+
+    if sample_attributes is not None:
+        sample_attributes = config.DATA_DIR / sample_attributes
+        tissue_of = sample_tissues(sample_attributes, samples, tissue_column)
+    else:
+        tissue_of = pd.Series(samples, index=samples)
+    tissue_of = tissue_of.dropna()
+    if tissues is not None:
+        tissue_of = tissue_of[tissue_of.isin(tissues)]
+    if tissue_of.empty:
+        raise ValueError(f"No samples of the selected tissues in {file_path}")
+
+    # Group samples by tissue (stable, so samples keep their file order)
+    tissue_of = tissue_of.sort_values(kind='stable')
+    samples = list(tissue_of.index)
+    tissue_names, starts = np.unique(tissue_of.to_numpy(), return_index=True)
+    offsets = np.append(starts, len(samples))
+
+    gene_filter = None if genes is None else set(genes)
+    key = fingerprint_parts(
+        fingerprint_file(file_path),
+        fingerprint_file(sample_attributes) if sample_attributes is not None else None,
+        tissue_column, sorted(tissue_names), None if gene_filter is None else sorted(gene_filter),
+    )
+    temp_dir = None
+    if cache_dir is None:
+        # Removed once the matrix is mapped (or when dropped on error)
+        temp_dir = tempfile.TemporaryDirectory(prefix='moslgnn_gtex_', ignore_cleanup_errors=True)
+        cache_dir = temp_dir.name
+    stem = Path(cache_dir) / f"gtex_{key}"
+    values_file, meta_file = stem.with_suffix('.f32'), stem.with_suffix('.json')
+
+    if not (values_file.exists() and meta_file.exists()):
+        values_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = values_file.with_suffix('.tmp')
+        kept_genes, seen = [], set()
+        reader = pd.read_csv(file_path, sep='\t', skiprows=2, chunksize=chunk_size,
+                             usecols=['Description', *samples])
+        with open(tmp_file, 'wb') as out:
+            for chunk in reader:
+                symbols = chunk['Description'].to_numpy()
+                keep = np.fromiter(
+                    (s not in seen and (gene_filter is None or s in gene_filter) for s in symbols),
+                    dtype=bool, count=len(symbols),
+                )
+                # First occurrence within the chunk as well
+                keep &= ~pd.Index(symbols).duplicated()
+                if not keep.any():
+                    continue
+                tpm = chunk.loc[keep, samples].to_numpy(dtype=np.float32)
+                np.log2(tpm + 1, out=tpm)
+                out.write(np.ascontiguousarray(tpm).tobytes())
+                kept_genes.extend(symbols[keep])
+                seen.update(symbols[keep])
+                instrumentation.count('rows', len(chunk))
+        tmp_file.replace(values_file)
+        with open(meta_file, 'w') as f:
+            json.dump({
+                'source': str(file_path),
+                'genes': [str(g) for g in kept_genes],
+                'samples': samples,
+                'tissues': [str(t) for t in tissue_names],
+                'offsets': offsets.tolist(),
+            }, f)
+
+    with open(meta_file) as f:
+        meta = json.load(f)
+    shape = (len(meta['genes']), len(meta['samples']))
+    values = np.memmap(values_file, dtype=np.float32, mode='r', shape=shape) if shape[0] else \
+        np.empty(shape, dtype=np.float32)
+    if temp_dir is not None:
+        # The mapping stays valid after its file is unlinked
+        temp_dir.cleanup()
+    logger.info("GTEx expression: %d genes x %d samples in %d tissues", *shape, len(meta['tissues']))
+    return GTExExpression(values, meta['genes'], meta['samples'], meta['tissues'], meta['offsets'])
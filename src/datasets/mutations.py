@@ -1,13 +1,15 @@
 import pandas as pd
 import numpy as np
-from src import config
+from src import config, instrumentation
 
 
+@instrumentation.timed('load_mut')
 def load_mut(file_path):
     file_path = config.DATA_DIR / file_path
     df = pd.read_csv(file_path)
 
     # select relevant columns
     df = df[['Hugo_Symbol', 'Entrez_Gene_Id', 'Variant_Type']]
+    instrumentation.count('rows', len(df))
 
     return df
@@ -0,0 +1,163 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class _Layer:
+    def __init__(self, values, model_ids, genes):
+        self.values = values
+        self.model_ids = model_ids
+        self.genes = genes
+        # Shared gene id -> column of this layer (-1 if absent), grown as genes are added
+        self.columns = np.empty(0, dtype=np.int64)
+        # Rows of `values` holding the shared ModelIDs, in shared order
+        self.rows = np.arange(len(model_ids))
+
+
+class MultiOmicsCube:
+    """
+    Omics layers (cell lines x genes) registered against one shared
+    ModelID index and one shared gene index.
+
+    Each layer is held as a single array of its own: the cube never keeps
+    two copies of a layer, and adding a layer costs that layer's memory.
+    A new layer is reordered at registration (one
+    copy of that layer only, skipped if already aligned) so the shared cell
+    lines come first, in shared order; `view` is then a zero-copy slice.
+    Genes are not copied at all but remapped through integer ids.
+
+    A layer that shrinks the shared ModelID set changes which rows of the
+    earlier layers are shared: only their row-index arrays are updated at
+    registration. On the next `view`, such a layer is compacted to its
+    shared rows (logged), and the compacted array replaces its buffer, so
+    the old one can be freed rather than both being held.
+
+    Example:
+    --------
+    cube = MultiOmicsCube()
+    cube.add_layer('gene_effect', genesdf)
+    cube.add_layer('mutations', cell_line_mutations, dtype=bool)
+    effects, mutated = cube.view('gene_effect'), cube.view('mutations')
+    cols = cube.columns('mutations', cube.gene_ids(['TP53', 'KRAS']))
+    """
+
+    def __init__(self):
+        self.layers = {}
+        self.model_ids = None
+        self.genes = pd.Index([])
+        self._gene_lookup = {}
+
+    @classmethod
+    def from_frames(cls, dtypes=None, **frames):
+        """Build a cube from DataFrames given as name=frame (`dtypes`: name -> dtype)."""
+        cube = cls()
+        for name, frame in frames.items():
+            cube.add_layer(name, frame, dtype=(dtypes or {}).get(name))
+        return cube
+
+    def __contains__(self, name):
+        return name in self.layers
+
+    def __len__(self):
+        return len(self.model_ids) if self.model_ids is not None else 0
+
+    def add_layer(self, name, data, dtype=None):
+        """
+        Register a layer.
+
+        Parameters:
+        -----------
+        name : str
+        data : DataFrame
+            Cell lines (ModelID index) x genes; duplicated gene columns keep
+            their first occurrence
+        dtype : numpy dtype, optional
+            E.g. bool for a mutation count matrix; defaults to the frame's
+
+        Returns:
+        --------
+        self
+        """
+        if name in self.layers:
+            raise ValueError(f"Layer '{name}' is already registered")
+        if data.columns.duplicated().any():
+            data = data.loc[:, ~data.columns.duplicated()]
+        if data.index.duplicated().any():
+            raise ValueError(f"Layer '{name}' has duplicated ModelIDs")
+
+        values = np.ascontiguousarray(data.to_numpy(dtype=dtype))
+        layer = _Layer(values, pd.Index(data.index), pd.Index(data.columns))
+        self.layers[name] = layer
+
+        new_genes = layer.genes[~layer.genes.isin(self.genes)]
+        if len(new_genes):
+            self._gene_lookup.update({gene: len(self.genes) + i for i, gene in enumerate(new_genes)})
+            self.genes = self.genes.append(new_genes)
+        for other in self.layers.values():
+            columns = np.full(len(self.genes), -1, dtype=np.int64)
+            columns[self.gene_ids(other.genes)] = np.arange(len(other.genes))
+            other.columns = columns
+
+        model_ids = layer.model_ids if self.model_ids is None else \
+            self.model_ids.intersection(layer.model_ids, sort=False)
+        if self.model_ids is not None and len(model_ids) != len(self.model_ids):
+            for other in self.layers.values():
+                if other is not layer:
+                    other.rows = other.model_ids.get_indexer(model_ids)
+        self.model_ids = model_ids
+        self._align_new_layer(layer)
+
+        logger.info("Registered layer %s: %d cell lines x %d genes (%d shared cell lines)",
+                    name, *values.shape, len(self.model_ids))
+        return self
+
+    def _align_new_layer(self, layer):
+        shared = layer.model_ids.get_indexer(self.model_ids)
+        if not np.array_equal(shared, np.arange(len(shared))):
+            rest = np.setdiff1d(np.arange(len(layer.model_ids)), shared, assume_unique=True)
+            order = np.concatenate([shared, rest])
+            layer.values = layer.values[order]
+            layer.model_ids = layer.model_ids[order]
+        layer.rows = np.arange(len(shared))
+
+    def view(self, name):
+        """
+        Layer values over the shared cell lines, in `model_ids` order.
+
+        A zero-copy slice while the layer's shared rows are a contiguous
+        run of its buffer; otherwise the layer is first compacted to its
+        shared rows, which become its new buffer.
+        """
+        layer = self.layers[name]
+        start = layer.rows[0] if len(layer.rows) else 0
+        if not np.array_equal(layer.rows, np.arange(start, start + len(layer.rows))):
+            logger.info("Compacting layer %s to its %d shared cell lines", name, len(layer.rows))
+            layer.values = layer.values[layer.rows]
+            layer.model_ids = layer.model_ids[layer.rows]
+            layer.rows = np.arange(len(layer.rows))
+            start = 0
+        return layer.values[start:start + len(layer.rows)]
+
+    def frame(self, name):
+        """`view` wrapped as a DataFrame indexed by ModelID, with the layer's genes."""
+        return pd.DataFrame(self.view(name), index=self.model_ids, columns=self.layers[name].genes, copy=False)
+
+    def layer_genes(self, name):
+        return self.layers[name].genes
+
+    def gene_ids(self, genes):
+        """Shared gene ids for `genes` (-1 for genes in no layer)."""
+        return np.fromiter((self._gene_lookup.get(gene, -1) for gene in genes), dtype=np.int64, count=len(genes))
+
+    def columns(self, name, gene_ids):
+        """Columns of layer `name` for shared gene ids (-1 where the layer lacks the gene)."""
+        gene_ids = np.asarray(gene_ids, dtype=np.int64)
+        columns = self.layers[name].columns[np.where(gene_ids >= 0, gene_ids, 0)]
+        return np.where(gene_ids >= 0, columns, -1)
+
+    def nbytes(self):
+        """Memory held by each layer."""
+        return {name: layer.values.nbytes for name, layer in self.layers.items()}
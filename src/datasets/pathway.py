@@ -1,9 +1,14 @@
+import logging
+
 import pandas as pd
 import numpy as np
-from src import config
+from src import config, instrumentation
 import re
 
+logger = logging.getLogger(__name__)
+
 
+@instrumentation.timed('load_kegg_from_files')
 def load_kegg_from_files(gene_list_file, gene_pathway_link_file):
     """
     Load KEGG pathway data from downloaded KEGG files.
@@ -21,10 +26,10 @@ def load_kegg_from_files(gene_list_file, gene_pathway_link_file):
     gene_pathway_link_file : str
         name of file
     """
-    print("Loading KEGG data from files...")
+    logger.info("Loading KEGG data from files...")
 
     # Step 1: Load gene ID to gene symbol mapping
-    print("  1. Loading gene list and extracting gene symbols...")
+    logger.debug("1. Loading gene list and extracting gene symbols...")
     gene_list_file = config.DATA_DIR / gene_list_file
     gene_pathway_link_file = config.DATA_DIR / gene_pathway_link_file
 
@@ -35,7 +40,11 @@ def load_kegg_from_files(gene_list_file, gene_pathway_link_file):
             parts = line.strip().split('\t')
             if len(parts) >= 2:
                 gene_id = parts[0]  # e.g., "hsa:38"
-                description = parts[1]  # e.g., "CDS 11:... ACAT1, ACAT, MAT; description"
+                # "CDS 11:... ACAT1, ACAT, MAT; description", or the same split over tabs
+                description = parts[-1] if len(parts) > 2 else parts[1]
+
+                # Drop the leading feature type and location, otherwise "CDS" matches as the symbol
+                description = re.sub(r'^[A-Za-z_]+\s+\S*:\S+\s+', '', description)
 
                 # Extract gene symbol (first name before semicolon or comma)
                 # Format examples:
@@ -59,10 +68,10 @@ def load_kegg_from_files(gene_list_file, gene_pathway_link_file):
                     gene_symbol = symbols[0].strip()
                     gene_id_to_symbol[gene_id] = gene_symbol
 
-    print(f"Found {len(gene_id_to_symbol)} genes with symbols")
+    logger.info("Found %d genes with symbols", len(gene_id_to_symbol))
 
     # Step 2: Load gene-pathway links
-    print("2. Loading gene-pathway links...")
+    logger.debug("2. Loading gene-pathway links...")
     gene_to_pathways = {}
 
     with open(gene_pathway_link_file, 'r') as f:
@@ -76,10 +85,10 @@ def load_kegg_from_files(gene_list_file, gene_pathway_link_file):
                     gene_to_pathways[gene_id] = []
                 gene_to_pathways[gene_id].append(pathway_id)
 
-    print(f"Found {len(gene_to_pathways)} genes with pathway annotations")
+    logger.info("Found %d genes with pathway annotations", len(gene_to_pathways))
 
     # Step 3: Create final mapping: gene_symbol -> pathways
-    print("3. Creating gene symbol to pathway mapping...")
+    logger.debug("3. Creating gene symbol to pathway mapping...")
     kegg_pathways = {}
 
     for gene_id, pathway_list in gene_to_pathways.items():
@@ -87,8 +96,10 @@ def load_kegg_from_files(gene_list_file, gene_pathway_link_file):
         if gene_symbol:
             kegg_pathways[gene_symbol] = pathway_list
 
-    print(f"✓ KEGG data loaded: {len(kegg_pathways)} genes with pathway annotations")
-    print(f"Example: {list(kegg_pathways.items())[:3]}")
+    logger.info("KEGG data loaded: %d genes with pathway annotations", len(kegg_pathways))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Example: %s", list(kegg_pathways.items())[:3])
+    instrumentation.count('genes', len(kegg_pathways))
     return kegg_pathways, gene_to_pathways, gene_id_to_symbol
 
 
@@ -102,6 +113,6 @@ def load_mapping(file_path):
     for _, row in df.iterrows():
         gene_id_to_gene[row['gene_id']] = row['preferred_name']
 
-    print(f"Loaded {len(gene_id_to_gene)} gene mappings")
+    logger.info("Loaded %d gene mappings", len(gene_id_to_gene))
 
     return gene_id_to_gene
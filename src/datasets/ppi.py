@@ -1,20 +1,28 @@
+import logging
+
 import pandas as pd
 import numpy as np
-from src import config
+from src import config, instrumentation
+
+logger = logging.getLogger(__name__)
 
 
+@instrumentation.timed('load_ppi')
 def load_ppi(file_path):
     file_path = config.DATA_DIR / file_path
     # add separation for txt file
     df = pd.read_csv(file_path, sep=' ')
-    
+    instrumentation.count('rows', len(df))
+
     return df
 
 
+@instrumentation.timed('load_pi')
 def load_pi(file_path):
     file_path = config.DATA_DIR / file_path
     # add separation for txt file
     df = pd.read_csv(file_path, sep=' ')
+    instrumentation.count('rows', len(df))
 
     protein_info = {}
 
@@ -24,6 +32,7 @@ def load_pi(file_path):
     return df, protein_info
 
 
+@instrumentation.timed('load_string_data')
 def load_string_data(string_df, score_threshold=550):
     """
     Load STRING protein-protein interaction data.
@@ -47,9 +56,10 @@ def load_string_data(string_df, score_threshold=550):
     # Filter by score threshold
     if score_threshold > 0:
         string_df = string_df[string_df['combined_score'] >= score_threshold]
-        print(f"Filtered to {len(string_df)} interactions with score >= {score_threshold}")
+        logger.info("Filtered to %d interactions with score >= %d", len(string_df), score_threshold)
 
-    print(f"Loaded {len(string_df)} protein interactions")
+    logger.info("Loaded %d protein interactions", len(string_df))
+    instrumentation.count('rows', len(string_df))
 
     # Store as dictionary for fast lookup
     # Key: (gene_a, gene_b), Value: interaction scores
@@ -76,5 +86,5 @@ def load_string_data(string_df, score_threshold=550):
             'textmining': row.get('textmining', 0),
         }
 
-    print(f"STRING data indexed: {len(string_data)} unique protein pairs")
+    logger.info("STRING data indexed: %d unique protein pairs", len(string_data))
     return string_data
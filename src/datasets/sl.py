@@ -1,10 +1,15 @@
 import pandas as pd
 import numpy as np
-from src import config
+from src import config, instrumentation
 
-def load_sl_data(file_path):
+COMPUTATIONAL_SOURCE = "Computational Prediction"
+
+
+@instrumentation.timed('load_sl_data')
+def load_sl_data(file_path, sep='\t'):
     file_path = config.DATA_DIR / file_path
-    df = pd.read_csv(file_path)
+    df = pd.read_csv(file_path, sep=sep)
+    instrumentation.count('rows', len(df))
 
     # separate computated sl pairs from others
     real, comp = separate_sl_pairs(df)
@@ -12,21 +17,214 @@ def load_sl_data(file_path):
     return real, comp
 
 
-def load_non_sl_data(file_path):
+@instrumentation.timed('load_non_sl_data')
+def load_non_sl_data(file_path, sep='\t'):
     file_path = config.DATA_DIR / file_path
-    df = pd.read_csv(file_path)
+    df = pd.read_csv(file_path, sep=sep)
+    instrumentation.count('rows', len(df))
 
     return df
 
 
 def separate_sl_pairs(df):
-    comp_sl = pd.DataFrame(
-        df[df['rel_source'] == "Computational Prediction"]
-    )
+    is_comp = (df['rel_source'] == COMPUTATIONAL_SOURCE).values
+
+    return df[~is_comp], df[is_comp]
+
+
+@instrumentation.timed('load_sl_table')
+def load_sl_table(file_path, sep='\t', genes=None):
+    """Load an SL/non-SL TSV straight into an indexed SLEdgeTable."""
+    file_path = config.DATA_DIR / file_path
+    df = pd.read_csv(file_path, sep=sep)
+    instrumentation.count('rows', len(df))
+
+    return SLEdgeTable.from_dataframe(df, genes=genes)
+
+
+class SLEdgeTable:
+    """
+    Indexed, deduplicated table of (unordered) gene-gene SL edges.
+
+    Endpoints are integer-encoded against a gene vocabulary and stored in
+    canonical order (gene_a < gene_b), sources are categorical codes, and
+    two CSR indexes are precomputed once:
+
+    - per gene: all incident edges, so partner lookups cost O(degree)
+    - per source: all edges with that provenance, so source filters cost
+      O(number of matching edges) instead of a DataFrame scan
+
+    Parameters:
+    -----------
+    gene_a, gene_b : array-like of int
+        Endpoint ids into `genes`
+    source_codes : array-like of int
+        Source ids into `sources`
+    genes : list of str
+        Gene vocabulary
+    sources : list of str
+        Source (provenance) vocabulary
+    """
+
+    def __init__(self, gene_a, gene_b, source_codes, genes, sources):
+        self.genes = pd.Index(genes)
+        self.sources = pd.Index(sources)
+
+        gene_a = np.asarray(gene_a, dtype=np.int64)
+        gene_b = np.asarray(gene_b, dtype=np.int64)
+        source_codes = np.asarray(source_codes, dtype=np.int64)
+
+        # Canonical orientation, then drop self-loops and duplicate (edge, source) rows
+        lo, hi = np.minimum(gene_a, gene_b), np.maximum(gene_a, gene_b)
+        rows = np.stack([lo, hi, source_codes], axis=1)[lo != hi]
+        rows = np.unique(rows, axis=0) if len(rows) else rows.reshape(0, 3)
+
+        self.gene_a = rows[:, 0]
+        self.gene_b = rows[:, 1]
+        self.source_codes = rows[:, 2]
+
+        self._build_gene_index()
+        self._build_source_index()
+
+    @classmethod
+    def from_dataframe(cls, df, x_col='x_name', y_col='y_name', source_col='rel_source', genes=None):
+        """
+        Build a table from a SynLethDB-style DataFrame.
+
+        Rows with a missing gene symbol are dropped; rows whose genes are not
+        in a given `genes` vocabulary are dropped as well.
+        """
+        df = df[df[x_col].notna().values & df[y_col].notna().values]
+
+        if genes is None:
+            genes = np.unique(np.concatenate([df[x_col].values, df[y_col].values]).astype(str))
+        genes = pd.Index(genes)
+
+        gene_a = genes.get_indexer(df[x_col].values.astype(str))
+        gene_b = genes.get_indexer(df[y_col].values.astype(str))
+        known = (gene_a >= 0) & (gene_b >= 0)
+
+        if source_col in df.columns:
+            sources = pd.Categorical(df[source_col].fillna('Unknown').astype(str))
+        else:
+            sources = pd.Categorical(np.full(len(df), 'Unknown'))
+
+        return cls(gene_a[known], gene_b[known], sources.codes[known], genes, sources.categories)
+
+    def _build_gene_index(self):
+        n_genes = len(self.genes)
+        n_edges = len(self.gene_a)
+
+        # Each edge appears in the adjacency of both endpoints
+        owner = np.concatenate([self.gene_a, self.gene_b])
+        neighbor = np.concatenate([self.gene_b, self.gene_a])
+        edge_ids = np.tile(np.arange(n_edges, dtype=np.int64), 2)
+
+        order = np.argsort(owner, kind='stable')
+        self.adj_indptr = np.concatenate([[0], np.cumsum(np.bincount(owner, minlength=n_genes))])
+        self.adj_indices = neighbor[order]
+        self.adj_edge_ids = edge_ids[order]
+
+    def _build_source_index(self):
+        order = np.argsort(self.source_codes, kind='stable')
+        counts = np.bincount(self.source_codes, minlength=len(self.sources))
+        self.source_indptr = np.concatenate([[0], np.cumsum(counts)])
+        self.source_edge_ids = order.astype(np.int64)
+
+    def __len__(self):
+        return len(self.gene_a)
+
+    def _source_ids(self, sources):
+        if isinstance(sources, str):
+            sources = [sources]
+        ids = self.sources.get_indexer(list(sources))
+        return ids[ids >= 0]
+
+    def edges_from_sources(self, sources):
+        """Edge row ids whose provenance is any of `sources`."""
+        ids = self._source_ids(sources)
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([
+            self.source_edge_ids[self.source_indptr[i]:self.source_indptr[i + 1]] for i in ids
+        ])
+
+    def edges_excluding_sources(self, sources):
+        """Edge row ids whose provenance is none of `sources`."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[self.edges_from_sources(sources)] = False
+        return np.flatnonzero(keep)
+
+    def incident_edges(self, gene):
+        """Edge row ids touching `gene` (empty for unknown genes)."""
+        g = self.genes.get_indexer([gene])[0]
+        if g < 0:
+            return np.empty(0, dtype=np.int64)
+        return self.adj_edge_ids[self.adj_indptr[g]:self.adj_indptr[g + 1]]
+
+    def partners(self, gene, sources=None):
+        """
+        All SL partners of `gene`, optionally restricted to some sources.
+
+        Returns:
+        --------
+        partners : list of str
+        """
+        g = self.genes.get_indexer([gene])[0]
+        if g < 0:
+            return []
+
+        start, stop = self.adj_indptr[g], self.adj_indptr[g + 1]
+        neighbors = self.adj_indices[start:stop]
+        if sources is not None:
+            edge_ids = self.adj_edge_ids[start:stop]
+            neighbors = neighbors[np.isin(self.source_codes[edge_ids], self._source_ids(sources))]
+
+        return list(self.genes[np.unique(neighbors)])
+
+    def degree(self):
+        """Number of distinct SL partners per gene, aligned with `genes`."""
+        keys = self.edge_keys()
+        unique_a = keys // len(self.genes)
+        unique_b = keys % len(self.genes)
+        return np.bincount(np.concatenate([unique_a, unique_b]), minlength=len(self.genes))
+
+    def edge_keys(self, edge_ids=None):
+        """Unique canonical int64 pair keys (gene_a * n_genes + gene_b)."""
+        a, b = self.gene_a, self.gene_b
+        if edge_ids is not None:
+            a, b = a[edge_ids], b[edge_ids]
+        return np.unique(a * len(self.genes) + b)
+
+    def subset(self, edge_ids):
+        """New table holding only `edge_ids`, sharing the gene and source vocabularies."""
+        return SLEdgeTable(
+            self.gene_a[edge_ids], self.gene_b[edge_ids], self.source_codes[edge_ids],
+            self.genes, self.sources
+        )
+
+    def pair_array(self, edge_ids=None, unique=True):
+        """
+        Gene symbol pairs as an (N, 2) object array.
 
+        With `unique=True` edges reported by several sources appear once.
+        """
+        if unique:
+            keys = self.edge_keys(edge_ids)
+            a, b = np.divmod(keys, len(self.genes))
+        else:
+            a, b = self.gene_a, self.gene_b
+            if edge_ids is not None:
+                a, b = a[edge_ids], b[edge_ids]
+        return np.stack([self.genes.values[a], self.genes.values[b]], axis=1).astype(object)
 
-    rows_drop = df[df['rel_surce'] == "Computational Prediction"].index
+    def to_pairs(self, edge_ids=None, unique=True):
+        """Gene symbol pairs as a list of tuples (the `known_sl_pairs` format)."""
+        return [tuple(pair) for pair in self.pair_array(edge_ids, unique=unique)]
 
-    df.drop(rows_drop, inplace=True)
-    
-    return df, comp_sl
+    def to_dataframe(self):
+        return pd.DataFrame({
+            'x_name': self.genes.values[self.gene_a],
+            'y_name': self.genes.values[self.gene_b],
+            'rel_source': self.sources.values[self.source_codes],
+        })
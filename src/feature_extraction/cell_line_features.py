@@ -1,7 +1,13 @@
+import logging
+
 import pandas as pd
 import numpy as np
 from scipy.stats import pearsonr, spearmanr
 
+from src import instrumentation
+
+logger = logging.getLogger(__name__)
+
 
 def compute_codependency_features(gene_a, gene_b, genesdf):
     """
@@ -25,7 +31,7 @@ def compute_codependency_features(gene_a, gene_b, genesdf):
 
     # Check if genes exist in data
     if gene_a not in genesdf.columns or gene_b not in genesdf.columns:
-        return empty_features()
+        return empty_depmap_features()
 
     effects_a = genesdf[gene_a].values
     effects_b = genesdf[gene_b].values
@@ -36,8 +42,8 @@ def compute_codependency_features(gene_a, gene_b, genesdf):
     effects_b = effects_b[mask]
 
     if len(effects_a) < 10:  # Not enough data after removing NaNs
-        print("Not enough data after removing NaNs")
-        return empty_features()
+        logger.debug("Not enough data after removing NaNs for %s/%s", gene_a, gene_b)
+        return empty_depmap_features()
 
     # 1. PEARSON CORRELATION (linear relationship)
     # Positive correlation = both essential/non-essential together
@@ -112,3 +118,242 @@ def empty_depmap_features():
         'depmap_is_essential_b': 0,
         'depmap_complementary': 0,
     }
+
+
+DEPMAP_FEATURES = list(empty_depmap_features().keys())
+
+
+def _masked_mean(values, mask, counts):
+    return np.where(mask, values, 0.0).sum(axis=1) / counts
+
+
+def _masked_pearson(x, y, mask, counts):
+    mean_x = _masked_mean(x, mask, counts)
+    mean_y = _masked_mean(y, mask, counts)
+    dx = np.where(mask, x - mean_x[:, None], 0.0)
+    dy = np.where(mask, y - mean_y[:, None], 0.0)
+    denom = np.sqrt((dx * dx).sum(axis=1) * (dy * dy).sum(axis=1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denom > 0, (dx * dy).sum(axis=1) / denom, np.nan)
+
+
+def _row_ranks(x, counts):
+    """
+    Average ranks per row (like scipy's rankdata), NaNs ranked last.
+
+    Rows without ties, the usual case for gene effects, are ranked from one
+    argsort; only rows with ties fall back to rankdata.
+    """
+    from scipy.stats import rankdata
+
+    order = np.argsort(x, axis=1)
+    sorted_x = np.take_along_axis(x, order, axis=1)
+    ranks = np.empty_like(x)
+    np.put_along_axis(ranks, order, np.arange(1, x.shape[1] + 1, dtype=np.float64)[None, :], axis=1)
+
+    positions = np.arange(x.shape[1] - 1)[None, :]
+    has_ties = ((sorted_x[:, 1:] == sorted_x[:, :-1]) & (positions + 1 < counts[:, None])).any(axis=1)
+    if has_ties.any():
+        ranks[has_ties] = rankdata(np.where(np.isnan(x[has_ties]), np.inf, x[has_ties]), axis=1)
+    return ranks, sorted_x
+
+
+def _row_percentile(sorted_x, counts, q):
+    """Linear-interpolated percentile per row of NaN-last sorted values (np.percentile semantics)."""
+    position = (counts - 1) * (q / 100.0)
+    lo = np.floor(position).astype(np.int64)
+    hi = np.minimum(lo + 1, counts - 1)
+    t = position - lo
+    below = np.take_along_axis(sorted_x, lo[:, None], axis=1)[:, 0]
+    above = np.take_along_axis(sorted_x, hi[:, None], axis=1)[:, 0]
+    diff = above - below
+    return np.where(t >= 0.5, above - diff * (1 - t), below + diff * t)
+
+
+@instrumentation.timed('codependency_batch')
+def compute_codependency_features_batch(idx_a, idx_b, effects, min_cell_lines=10):
+    """
+    Vectorized `compute_codependency_features` for a batch of gene pairs.
+
+    Every statistic is computed on the cell lines where both genes are
+    observed, exactly like the per-pair version, but for all pairs at once.
+
+    Parameters:
+    -----------
+    idx_a, idx_b : array-like of int
+        Column indices into `effects`; -1 marks a gene missing from DepMap
+    effects : ndarray
+        Gene effect matrix (cell lines x genes)
+    min_cell_lines : int
+        Pairs with fewer shared observations get zero-filled features
+
+    Returns:
+    --------
+    features : dict of ndarray
+        One array per feature name in DEPMAP_FEATURES
+    """
+    idx_a = np.asarray(idx_a, dtype=np.int64)
+    idx_b = np.asarray(idx_b, dtype=np.int64)
+    n_pairs = len(idx_a)
+    features = {name: np.zeros(n_pairs, dtype=np.float64) for name in DEPMAP_FEATURES}
+
+    known = (idx_a >= 0) & (idx_b >= 0)
+    rows = np.flatnonzero(known)
+    if len(rows) == 0:
+        return features
+
+    a = effects[:, idx_a[rows]].T.astype(np.float64)
+    b = effects[:, idx_b[rows]].T.astype(np.float64)
+    mask = ~(np.isnan(a) | np.isnan(b))
+    counts = mask.sum(axis=1)
+
+    enough = counts >= min_cell_lines
+    rows, a, b, mask, counts = rows[enough], a[enough], b[enough], mask[enough], counts[enough]
+    if len(rows) == 0:
+        return features
+
+    a_nan = np.where(mask, a, np.nan)
+    b_nan = np.where(mask, b, np.nan)
+
+    # 1-2. Pearson, and Spearman as Pearson on ranks within the shared mask
+    features['depmap_pearson_correlation'][rows] = _masked_pearson(a, b, mask, counts)
+    rank_a, sorted_a = _row_ranks(a_nan, counts)
+    rank_b, sorted_b = _row_ranks(b_nan, counts)
+    features['depmap_spearman_correlation'][rows] = _masked_pearson(rank_a, rank_b, mask, counts)
+
+    # 3. Conditional dependency (bottom 25% of gene A)
+    threshold_a = _row_percentile(sorted_a, counts, 25)
+    essential_a = mask & (a < threshold_a[:, None])
+    n_essential_a = essential_a.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        conditional = np.where(essential_a, b, 0.0).sum(axis=1) / n_essential_a
+    features['depmap_conditional_dependency'][rows] = np.where(n_essential_a > 0, conditional, 0)
+
+    # 4. Mutual essentiality
+    threshold_b = _row_percentile(sorted_b, counts, 25)
+    essential_b = mask & (b < threshold_b[:, None])
+    features['depmap_mutual_essentiality'][rows] = (essential_a & essential_b).sum(axis=1) / counts
+
+    # 5. Differential essentiality
+    diff = a_nan - b_nan
+    features['depmap_essentiality_diff_std'][rows] = np.nanstd(diff, axis=1)
+    features['depmap_essentiality_diff_mean'][rows] = np.nanmean(np.abs(diff), axis=1)
+
+    # 6-8. Individual gene statistics and essentiality flags
+    mean_a = np.nanmean(a_nan, axis=1)
+    mean_b = np.nanmean(b_nan, axis=1)
+    features['depmap_mean_effect_a'][rows] = mean_a
+    features['depmap_mean_effect_b'][rows] = mean_b
+    features['depmap_std_effect_a'][rows] = np.nanstd(a_nan, axis=1)
+    features['depmap_std_effect_b'][rows] = np.nanstd(b_nan, axis=1)
+
+    is_essential_a = (mean_a < -0.5).astype(np.float64)
+    is_essential_b = (mean_b < -0.5).astype(np.float64)
+    features['depmap_is_essential_a'][rows] = is_essential_a
+    features['depmap_is_essential_b'][rows] = is_essential_b
+    features['depmap_complementary'][rows] = np.abs(is_essential_a - is_essential_b)
+
+    return features
+
+
+def compute_gene_statistics(effects):
+    """
+    Precompute per-gene statistics shared by every one-vs-all query.
+
+    For genes observed in every cell line the shared mask of any pair is
+    the full set of cell lines, so correlations, conditional effects and
+    mutual essentiality reduce to matrix-vector products against these
+    standardized / ranked / thresholded matrices. Standardized matrices are
+    float32 to halve their footprint.
+
+    Parameters:
+    -----------
+    effects : ndarray
+        Gene effect matrix (cell lines x genes)
+
+    Returns:
+    --------
+    stats : dict of ndarray
+    """
+    n_cells, n_genes = effects.shape
+    complete = ~np.isnan(effects).any(axis=0)
+    values = np.where(np.isnan(effects), 0.0, effects)
+
+    mean = values.mean(axis=0)
+    std = values.std(axis=0)
+    safe_std = np.where(std > 0, std, 1.0)
+    standardized = ((values - mean) / safe_std).astype(np.float32)
+
+    counts = np.full(n_genes, n_cells)
+    ranks, sorted_values = _row_ranks(values.T, counts)
+    rank_std = ranks.std(axis=1)
+    rank_standardized = ((ranks.T - ranks.mean(axis=1)) / np.where(rank_std > 0, rank_std, 1.0)).astype(np.float32)
+
+    threshold = _row_percentile(sorted_values, counts, 25)
+    essential = (values < threshold).astype(np.float32)
+
+    return {
+        'complete': complete,
+        'values': values,
+        'mean': mean,
+        'std': std,
+        'standardized': standardized,
+        'rank_standardized': rank_standardized,
+        'rank_std': rank_std,
+        'essential': essential,
+        'n_essential': essential.sum(axis=0),
+    }
+
+
+def compute_codependency_features_one_vs_all(gene_idx, stats):
+    """
+    Co-dependency features of one gene (as gene_a) against every gene.
+
+    Exact for pairs where both genes are fully observed (`stats['complete']`);
+    callers recompute the remaining pairs with the batched function.
+
+    Returns:
+    --------
+    features : dict of ndarray
+        One value per gene (column of the effect matrix)
+    """
+    values = stats['values']
+    n_cells = values.shape[0]
+    a = values[:, gene_idx]
+    mean_a, std_a = stats['mean'][gene_idx], stats['std'][gene_idx]
+    mean_b, std_b = stats['mean'], stats['std']
+    features = {}
+
+    pearson = stats['standardized'][:, gene_idx] @ stats['standardized'] / n_cells
+    features['depmap_pearson_correlation'] = np.where((std_a > 0) & (std_b > 0), pearson, np.nan).astype(np.float64)
+    rank_std = stats['rank_std']
+    spearman = stats['rank_standardized'][:, gene_idx] @ stats['rank_standardized'] / n_cells
+    features['depmap_spearman_correlation'] = np.where(
+        (rank_std[gene_idx] > 0) & (rank_std > 0), spearman, np.nan
+    ).astype(np.float64)
+
+    essential_a = stats['essential'][:, gene_idx]
+    n_essential_a = stats['n_essential'][gene_idx]
+    if n_essential_a > 0:
+        features['depmap_conditional_dependency'] = essential_a.astype(np.float64) @ values / n_essential_a
+    else:
+        features['depmap_conditional_dependency'] = np.zeros(values.shape[1])
+    features['depmap_mutual_essentiality'] = (essential_a @ stats['essential']).astype(np.float64) / n_cells
+
+    # var(a - b) = var(a) + var(b) - 2 cov(a, b)
+    cov = (a - mean_a) @ values / n_cells
+    features['depmap_essentiality_diff_std'] = np.sqrt(np.maximum(std_a ** 2 + std_b ** 2 - 2 * cov, 0))
+    features['depmap_essentiality_diff_mean'] = np.abs(values - a[:, None]).mean(axis=0)
+
+    features['depmap_mean_effect_a'] = np.full(values.shape[1], mean_a)
+    features['depmap_mean_effect_b'] = mean_b.copy()
+    features['depmap_std_effect_a'] = np.full(values.shape[1], std_a)
+    features['depmap_std_effect_b'] = std_b.copy()
+
+    is_essential_a = float(mean_a < -0.5)
+    is_essential_b = (mean_b < -0.5).astype(np.float64)
+    features['depmap_is_essential_a'] = np.full(values.shape[1], is_essential_a)
+    features['depmap_is_essential_b'] = is_essential_b
+    features['depmap_complementary'] = np.abs(is_essential_a - is_essential_b)
+
+    return features
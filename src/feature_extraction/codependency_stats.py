@@ -0,0 +1,250 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Co-dependency features that are exact functions of the sufficient statistics
+INCREMENTAL_FEATURES = [
+    'depmap_pearson_correlation',
+    'depmap_essentiality_diff_std',
+    'depmap_mean_effect_a',
+    'depmap_mean_effect_b',
+    'depmap_std_effect_a',
+    'depmap_std_effect_b',
+    'depmap_is_essential_a',
+    'depmap_is_essential_b',
+    'depmap_complementary',
+]
+
+
+def _moments(n, sum_x, sum_xx):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sum_x / n
+        var = np.clip(sum_xx / n - mean * mean, 0, None)
+    return mean, var
+
+
+class CodependencyStatistics:
+    """
+    Mergeable sufficient statistics of a gene effect matrix.
+
+    Keeps counts, sums and sums of squares per gene, and for tracked pairs
+    and an optional gene block the same moments over the cell lines where
+    both genes are observed plus their cross-products. Adding cell lines
+    (a new DepMap release) costs time proportional to the new rows only, and
+    statistics computed on separate row sets merge by addition.
+
+    Pearson correlation, mean / std effects and the difference std of a
+    pair follow exactly from these moments, so they match
+    `compute_codependency_features_batch` without touching old rows; rank-
+    and percentile-based features are not decomposable and are not kept.
+    Moments are raw float64 sums, which is accurate for gene effect scores
+    (order 1) over any realistic number of cell lines.
+
+    Parameters:
+    -----------
+    genes : list of str
+        Gene columns of every update
+    pairs : list of (gene_a, gene_b), optional
+        Pairs whose masked moments are tracked
+    block_genes : list of str, optional
+        Genes whose all-vs-all statistics are tracked (a genome-wide
+        correlation matrix restricted to the block)
+    """
+
+    def __init__(self, genes, pairs=None, block_genes=None):
+        self.genes = pd.Index(genes)
+        n_genes = len(self.genes)
+        self.model_ids = []
+
+        self.gene_n = np.zeros(n_genes)
+        self.gene_sum = np.zeros(n_genes)
+        self.gene_sum_sq = np.zeros(n_genes)
+
+        pairs = np.asarray(list(pairs) if pairs is not None else [], dtype=object).reshape(-1, 2)
+        self.pairs = pairs
+        self.idx_a = self.genes.get_indexer(pairs[:, 0])
+        self.idx_b = self.genes.get_indexer(pairs[:, 1])
+        n_pairs = len(pairs)
+        # Masked moments of each pair: n, sum_a, sum_b, sum_aa, sum_bb, sum_ab
+        self.pair_moments = np.zeros((6, n_pairs))
+
+        self.block_genes = pd.Index(block_genes if block_genes is not None else [])
+        self.block_idx = self.genes.get_indexer(self.block_genes)
+        if (self.block_idx < 0).any():
+            raise KeyError(f"Block genes not in `genes`: {list(self.block_genes[self.block_idx < 0])}")
+        k = len(self.block_idx)
+        # n[i, j] = shared observations; sum[i, j] = sum of gene i where j is observed, etc.
+        self.block_n = np.zeros((k, k))
+        self.block_sum = np.zeros((k, k))
+        self.block_sum_sq = np.zeros((k, k))
+        self.block_cross = np.zeros((k, k))
+
+    @classmethod
+    def from_frame(cls, genesdf, pairs=None, block_genes=None):
+        """Statistics of a gene effect frame (cell lines x genes)."""
+        genesdf = genesdf.loc[:, ~genesdf.columns.duplicated()]
+        stats = cls(genesdf.columns, pairs, block_genes)
+        return stats.update(genesdf.to_numpy(dtype=np.float64), genesdf.index)
+
+    @property
+    def n_cell_lines(self):
+        return len(self.model_ids)
+
+    @instrumentation.timed('codependency_stats_update')
+    def update(self, effects, model_ids=None):
+        """
+        Fold new cell lines into the statistics.
+
+        Parameters:
+        -----------
+        effects : ndarray
+            New rows (cell lines x genes), columns in `genes` order
+        model_ids : list of str, optional
+            Ids of the new rows; rows already folded in raise ValueError
+
+        Returns:
+        --------
+        self
+        """
+        effects = np.asarray(effects, dtype=np.float64)
+        if effects.shape[1] != len(self.genes):
+            raise ValueError(f"Expected {len(self.genes)} gene columns, got {effects.shape[1]}")
+        if model_ids is None:
+            model_ids = [None] * len(effects)
+        model_ids = list(model_ids)
+        known = set(self.model_ids).intersection(m for m in model_ids if m is not None)
+        if known:
+            raise ValueError(f"{len(known)} cell lines are already included, e.g. {sorted(known)[:3]}")
+
+        observed = ~np.isnan(effects)
+        values = np.where(observed, effects, 0.0)
+        self.gene_n += observed.sum(axis=0)
+        self.gene_sum += values.sum(axis=0)
+        self.gene_sum_sq += np.square(values).sum(axis=0)
+
+        rows = np.flatnonzero((self.idx_a >= 0) & (self.idx_b >= 0))
+        if len(rows):
+            a, b = values[:, self.idx_a[rows]], values[:, self.idx_b[rows]]
+            mask = observed[:, self.idx_a[rows]] & observed[:, self.idx_b[rows]]
+            a, b = np.where(mask, a, 0.0), np.where(mask, b, 0.0)
+            self.pair_moments[:, rows] += np.stack([
+                mask.sum(axis=0), a.sum(axis=0), b.sum(axis=0),
+                (a * a).sum(axis=0), (b * b).sum(axis=0), (a * b).sum(axis=0),
+            ])
+
+        if len(self.block_idx):
+            x = values[:, self.block_idx]
+            m = observed[:, self.block_idx].astype(np.float64)
+            self.block_n += m.T @ m
+            self.block_sum += x.T @ m
+            self.block_sum_sq += np.square(x).T @ m
+            self.block_cross += x.T @ x
+
+        self.model_ids.extend(model_ids)
+        instrumentation.count('cell_lines', len(effects))
+        return self
+
+    def update_frame(self, genesdf):
+        """Fold in new cell lines given as a frame; genes are matched by name (absent genes count as missing)."""
+        genesdf = genesdf.loc[:, ~genesdf.columns.duplicated()]
+        extra = genesdf.columns.difference(self.genes)
+        if len(extra):
+            logger.warning("Ignoring %d genes not tracked by the statistics", len(extra))
+        return self.update(genesdf.reindex(columns=self.genes).to_numpy(dtype=np.float64), genesdf.index)
+
+    def merge(self, other):
+        """Add the statistics of a disjoint set of cell lines (same genes, pairs and block)."""
+        if not (self.genes.equals(other.genes) and np.array_equal(self.pairs, other.pairs)
+                and self.block_genes.equals(other.block_genes)):
+            raise ValueError("Statistics track different genes, pairs or block genes")
+        overlap = set(self.model_ids).intersection(other.model_ids) - {None}
+        if overlap:
+            raise ValueError(f"{len(overlap)} cell lines are in both statistics")
+
+        for name in ['gene_n', 'gene_sum', 'gene_sum_sq', 'pair_moments',
+                     'block_n', 'block_sum', 'block_sum_sq', 'block_cross']:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.model_ids = self.model_ids + other.model_ids
+        return self
+
+    def gene_mean(self):
+        return _moments(self.gene_n, self.gene_sum, self.gene_sum_sq)[0]
+
+    def gene_std(self):
+        return np.sqrt(_moments(self.gene_n, self.gene_sum, self.gene_sum_sq)[1])
+
+    def pair_features(self, min_cell_lines=10):
+        """
+        Decomposable co-dependency features of the tracked pairs.
+
+        Same definitions as `compute_codependency_features_batch` (moments
+        over the cell lines where both genes are observed); pairs with fewer
+        than `min_cell_lines` shared observations are zero-filled.
+
+        Returns:
+        --------
+        features : dict of ndarray
+            One array per name in INCREMENTAL_FEATURES
+        """
+        n, sum_a, sum_b, sum_aa, sum_bb, sum_ab = self.pair_moments
+        features = {name: np.zeros(len(n)) for name in INCREMENTAL_FEATURES}
+        rows = np.flatnonzero(n >= min_cell_lines)
+        if len(rows) == 0:
+            return features
+
+        n, sum_a, sum_b = n[rows], sum_a[rows], sum_b[rows]
+        mean_a, var_a = _moments(n, sum_a, sum_aa[rows])
+        mean_b, var_b = _moments(n, sum_b, sum_bb[rows])
+        cov = sum_ab[rows] / n - mean_a * mean_b
+        denom = np.sqrt(var_a * var_b)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            features['depmap_pearson_correlation'][rows] = np.where(denom > 0, cov / denom, np.nan)
+        features['depmap_essentiality_diff_std'][rows] = np.sqrt(np.clip(var_a + var_b - 2 * cov, 0, None))
+        features['depmap_mean_effect_a'][rows] = mean_a
+        features['depmap_mean_effect_b'][rows] = mean_b
+        features['depmap_std_effect_a'][rows] = np.sqrt(var_a)
+        features['depmap_std_effect_b'][rows] = np.sqrt(var_b)
+
+        is_essential_a = (mean_a < -0.5).astype(np.float64)
+        is_essential_b = (mean_b < -0.5).astype(np.float64)
+        features['depmap_is_essential_a'][rows] = is_essential_a
+        features['depmap_is_essential_b'][rows] = is_essential_b
+        features['depmap_complementary'][rows] = np.abs(is_essential_a - is_essential_b)
+        return features
+
+    def block_correlation(self, min_cell_lines=10):
+        """Pairwise Pearson correlation of the block genes over shared observations (NaN if too few)."""
+        n = self.block_n
+        mean_i, var_i = _moments(n, self.block_sum, self.block_sum_sq)
+        mean_j, var_j = mean_i.T, var_i.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = self.block_cross / n - mean_i * mean_j
+            corr = cov / np.sqrt(var_i * var_j)
+        return pd.DataFrame(np.where(n >= min_cell_lines, corr, np.nan),
+                            index=self.block_genes, columns=self.block_genes)
+
+    def save(self, path):
+        """Write the statistics to an .npz file."""
+        np.savez(
+            path, genes=np.asarray(self.genes, dtype=str), pairs=self.pairs.astype(str),
+            block_genes=np.asarray(self.block_genes, dtype=str),
+            model_ids=np.asarray(['' if m is None else str(m) for m in self.model_ids]),
+            gene_n=self.gene_n, gene_sum=self.gene_sum, gene_sum_sq=self.gene_sum_sq,
+            pair_moments=self.pair_moments, block_n=self.block_n, block_sum=self.block_sum,
+            block_sum_sq=self.block_sum_sq, block_cross=self.block_cross,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            stats = cls(f['genes'], f['pairs'].astype(object), f['block_genes'])
+            for name in ['gene_n', 'gene_sum', 'gene_sum_sq', 'pair_moments',
+                         'block_n', 'block_sum', 'block_sum_sq', 'block_cross']:
+                setattr(stats, name, f[name])
+            stats.model_ids = [str(m) or None for m in f['model_ids']]
+        return stats
@@ -1,10 +1,22 @@
 import pandas as pd
 import numpy as np
 
-from cell_line_features import compute_codependency_features
-from mutation_features import compute_mutation_context_features
-from ppi_features import compute_string_features 
-from pathway_features import compute_kegg_features
+from src import instrumentation
+from src.datasets.omics import MultiOmicsCube
+from src.feature_extraction.cell_line_features import (
+    DEPMAP_FEATURES, compute_codependency_features, compute_codependency_features_batch,
+    compute_codependency_features_one_vs_all, compute_gene_statistics
+)
+from src.feature_extraction.expression_features import GTEX_FEATURES, compute_coexpression_features_batch
+from src.feature_extraction.mutation_features import (
+    MUTATION_FEATURES, compute_mutation_context_features, compute_mutation_context_features_batch,
+    compute_mutation_context_features_one_vs_all
+)
+from src.feature_extraction.ppi_features import compute_string_features, empty_features as empty_string_features
+from src.feature_extraction.pathway_features import compute_kegg_features, empty_kegg_features
+
+EFFECT_LAYER = 'gene_effect'
+MUTATION_LAYER = 'mutations'
 
 
 def extract_features_for_pair(gene_a, gene_b, genesdf, cell_line_mutations, string_data, kegg_pathways):
@@ -38,3 +50,224 @@ def extract_features_for_pair(gene_a, gene_b, genesdf, cell_line_mutations, stri
                 features['depmap_complementary']
             )
     return features
+
+
+class PairFeatureExtractor:
+    """
+    Batched feature extraction for many gene pairs at once.
+
+    DepMap effects and the mutation matrix are held as row-aligned numpy
+    arrays, so the co-dependency and mutation-context groups are computed
+    for a whole batch with array operations instead of one dict per pair.
+    STRING and KEGG features are cheap dict lookups and stay per pair.
+
+    Like the experiment, gene effects and mutations are restricted to the
+    cell lines present in both; the arrays are zero-copy views of a
+    MultiOmicsCube, so passing a cube shared with other consumers avoids
+    re-aligning (and copying) the layers.
+
+    Parameters:
+    -----------
+    genesdf : dataframe or MultiOmicsCube
+        Gene effect data (cell lines x genes), or a cube with an
+        EFFECT_LAYER (float64) and optionally a MUTATION_LAYER (bool)
+    cell_line_mutations : dataframe, optional
+        Binary mutation matrix (cell lines x genes); ignored for a cube
+    string_data : dict, optional
+        Output of `ppi.load_string_data`
+    kegg_pathways : dict, optional
+        Gene symbol -> list of KEGG pathways
+    chunk_size : int
+        Pairs per vectorized chunk (bounds peak memory)
+    gtex_expression : GTExExpression, optional
+        Output of `gtex.load_gtex_expression`; adds the co-expression group
+    """
+
+    def __init__(self, genesdf, cell_line_mutations=None, string_data=None, kegg_pathways=None,
+                 chunk_size=2048, gtex_expression=None):
+        if isinstance(genesdf, MultiOmicsCube):
+            cube = genesdf
+        else:
+            cube = MultiOmicsCube()
+            cube.add_layer(EFFECT_LAYER, genesdf, dtype=np.float64)
+            if cell_line_mutations is not None:
+                cube.add_layer(MUTATION_LAYER, cell_line_mutations, dtype=bool)
+        self.cube = cube
+
+        self.mutated = None
+        self.mutation_genes = None
+        if MUTATION_LAYER in cube:
+            self.mutated = cube.view(MUTATION_LAYER)
+            self.mutation_genes = cube.layer_genes(MUTATION_LAYER)
+            self._mutation_lookup = {gene: i for i, gene in enumerate(self.mutation_genes)}
+
+        self.effects = cube.view(EFFECT_LAYER)
+        self.genes = cube.layer_genes(EFFECT_LAYER)
+        # Plain dicts beat Index.get_indexer for the small batches a server sees
+        self._gene_lookup = {gene: i for i, gene in enumerate(self.genes)}
+        self.string_data = string_data
+        self.kegg_pathways = kegg_pathways
+        self.gtex_expression = gtex_expression
+        self.chunk_size = chunk_size
+        self._gene_stats = None
+
+        self.feature_names = list(DEPMAP_FEATURES)
+        if self.mutated is not None:
+            self.feature_names += MUTATION_FEATURES
+        if string_data is not None:
+            self.feature_names += list(empty_string_features().keys())
+        if kegg_pathways is not None:
+            self.feature_names += list(empty_kegg_features().keys())
+        if string_data is not None:
+            self.feature_names += ['combined_string_depmap_interaction', 'combined_physical_complementary']
+        if gtex_expression is not None:
+            self.feature_names += GTEX_FEATURES
+
+    @staticmethod
+    def _lookup(lookup, genes):
+        return np.fromiter((lookup.get(gene, -1) for gene in genes), dtype=np.int64, count=len(genes))
+
+    def gene_ids(self, genes):
+        """DepMap column ids for `genes` (-1 for genes not in DepMap)."""
+        return self._lookup(self._gene_lookup, genes)
+
+    def _add_lookup_features(self, features, gene_a, gene_b):
+        lookups = []
+        if self.string_data is not None:
+            lookups.append(lambda x, y: compute_string_features(self.string_data, x, y))
+        if self.kegg_pathways is not None:
+            lookups.append(lambda x, y: compute_kegg_features(x, y, self.kegg_pathways))
+        if lookups:
+            rows = []
+            for x, y in zip(gene_a, gene_b):
+                row = {}
+                for lookup in lookups:
+                    row.update(lookup(x, y))
+                rows.append(row)
+            features.update(pd.DataFrame(rows, index=range(len(rows))).to_dict('series'))
+
+        if self.string_data is not None:
+            string_score = np.asarray(features['string_combined_score'], dtype=np.float64)
+            physical = np.asarray(features['string_physical_interaction'], dtype=np.float64)
+            features['combined_string_depmap_interaction'] = (
+                string_score * np.abs(features['depmap_pearson_correlation'])
+            )
+            features['combined_physical_complementary'] = physical * features['depmap_complementary']
+
+        return features
+
+    def _transform_chunk(self, gene_a, gene_b, idx_a, idx_b):
+        features = compute_codependency_features_batch(idx_a, idx_b, self.effects)
+
+        if self.mutated is not None:
+            features.update(compute_mutation_context_features_batch(
+                idx_a, idx_b, self.effects,
+                self._lookup(self._mutation_lookup, gene_a), self._lookup(self._mutation_lookup, gene_b),
+                self.mutated,
+            ))
+
+        if self.gtex_expression is not None:
+            features.update(compute_coexpression_features_batch(
+                self.gtex_expression.gene_ids(gene_a), self.gtex_expression.gene_ids(gene_b), self.gtex_expression
+            ))
+
+        return self._add_lookup_features(features, gene_a, gene_b)
+
+    def transform_array(self, gene_a, gene_b, feature_names=None):
+        """
+        Compute features for pairs (gene_a[i], gene_b[i]) as a float64 matrix.
+
+        Parameters:
+        -----------
+        gene_a, gene_b : array-like of str
+        feature_names : list of str, optional
+            Column order (defaults to `feature_names`)
+
+        Returns:
+        --------
+        X : ndarray of shape (n_pairs, n_features)
+        """
+        if feature_names is None:
+            feature_names = self.feature_names
+        gene_a = np.asarray(gene_a, dtype=object)
+        gene_b = np.asarray(gene_b, dtype=object)
+        idx_a, idx_b = self.gene_ids(gene_a), self.gene_ids(gene_b)
+
+        X = np.empty((len(gene_a), len(feature_names)), dtype=np.float64)
+        with instrumentation.stage('transform_pairs', pairs=len(gene_a)):
+            for start in range(0, len(gene_a), self.chunk_size):
+                stop = start + self.chunk_size
+                features = self._transform_chunk(gene_a[start:stop], gene_b[start:stop], idx_a[start:stop], idx_b[start:stop])
+                for j, name in enumerate(feature_names):
+                    X[start:stop, j] = features[name]
+        return X
+
+    def transform(self, gene_a, gene_b):
+        """
+        Compute the feature table for pairs (gene_a[i], gene_b[i]).
+
+        Returns:
+        --------
+        features : DataFrame
+            One row per pair, columns in `feature_names` order
+        """
+        return pd.DataFrame(self.transform_array(gene_a, gene_b), columns=self.feature_names)
+
+    def gene_statistics(self):
+        """Per-gene statistics for one-vs-all queries, computed on first use."""
+        if self._gene_stats is None:
+            self._gene_stats = compute_gene_statistics(self.effects)
+            if self.mutated is not None:
+                self._gene_stats['mutated_float'] = self.mutated.astype(np.float32)
+                self._gene_stats['mut_ids'] = self._lookup(self._mutation_lookup, self.genes)
+        return self._gene_stats
+
+    def transform_one_vs_all(self, gene, feature_names=None):
+        """
+        Features for `gene` (as gene_a) paired with every other DepMap gene.
+
+        Pairs of fully observed genes come from matrix-vector products over
+        `gene_statistics()`; pairs involving genes with missing effects are
+        recomputed exactly through the batched path.
+
+        Returns:
+        --------
+        partners : ndarray of str
+            Partner genes (every DepMap gene except `gene`)
+        X : ndarray of shape (n_partners, n_features)
+        """
+        if feature_names is None:
+            feature_names = self.feature_names
+        gene_idx = self._gene_lookup.get(gene, -1)
+        if gene_idx < 0:
+            raise KeyError(f"{gene} is not in the gene effect data")
+
+        stats = self.gene_statistics()
+        partners_idx = np.delete(np.arange(len(self.genes)), gene_idx)
+        partners = self.genes.values[partners_idx].astype(object)
+
+        if not stats['complete'][gene_idx]:
+            return partners, self.transform_array(np.full(len(partners), gene, dtype=object), partners, feature_names)
+
+        features = compute_codependency_features_one_vs_all(gene_idx, stats)
+        if self.mutated is not None:
+            features.update(compute_mutation_context_features_one_vs_all(
+                gene_idx, self._mutation_lookup.get(gene, -1), stats['values'],
+                stats['mut_ids'], stats['mutated_float'],
+            ))
+        features = {name: np.asarray(values)[partners_idx] for name, values in features.items()}
+        features = self._add_lookup_features(features, np.full(len(partners), gene, dtype=object), partners)
+        if self.gtex_expression is not None:
+            features.update(compute_coexpression_features_batch(
+                np.full(len(partners), self.gtex_expression.gene_ids([gene])[0]),
+                self.gtex_expression.gene_ids(partners), self.gtex_expression,
+            ))
+
+        X = np.column_stack([np.asarray(features[name], dtype=np.float64) for name in feature_names])
+
+        incomplete = ~stats['complete'][partners_idx]
+        if incomplete.any():
+            X[incomplete] = self.transform_array(
+                np.full(incomplete.sum(), gene, dtype=object), partners[incomplete], feature_names
+            )
+        return partners, X
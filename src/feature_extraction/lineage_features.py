@@ -0,0 +1,148 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src import instrumentation
+
+logger = logging.getLogger(__name__)
+
+LINEAGE_FEATURES = [
+    'lineage_pearson_correlation',
+    'lineage_mean_effect_a',
+    'lineage_mean_effect_b',
+    'lineage_mutual_essentiality',
+    'lineage_n_cell_lines',
+]
+
+
+class LineageCodependency:
+    """
+    Co-dependency features per cancer lineage, for all lineages in one pass.
+
+    Cell lines are sorted by lineage once, so each lineage is a contiguous
+    block of rows and every statistic is a segment reduction
+    (`np.add.reduceat`) of the same gathered pair columns: a batch costs
+    about one global co-dependency pass instead of one pass per lineage.
+
+    Per lineage, over the cell lines where both genes are observed:
+    - lineage_pearson_correlation
+    - lineage_mean_effect_a / _b
+    - lineage_mutual_essentiality: fraction of cell lines where both genes
+      are below their genome-wide 25th percentile (the thresholds are
+      global, so the feature shows lineages where the pair is co-essential)
+    - lineage_n_cell_lines
+
+    Lineages with fewer than `min_cell_lines` shared observations get
+    zero-filled features, with the count telling them apart.
+
+    Parameters:
+    -----------
+    effects : ndarray
+        Gene effect matrix (cell lines x genes)
+    lineages : array-like
+        Lineage of each row of `effects` (NaN / None: excluded)
+    min_cell_lines : int
+    min_lineage_size : int
+        Lineages with fewer cell lines are dropped
+    """
+
+    def __init__(self, effects, lineages, min_cell_lines=5, min_lineage_size=5):
+        lineages = pd.Series(np.asarray(lineages, dtype=object))
+        sizes = lineages.value_counts()
+        lineages = lineages.where(lineages.isin(sizes.index[sizes >= min_lineage_size]))
+
+        keep = np.flatnonzero(lineages.notna().to_numpy())
+        order = keep[np.argsort(lineages.iloc[keep].to_numpy().astype(str), kind='stable')]
+        sorted_lineages = lineages.iloc[order].to_numpy().astype(str)
+
+        self.lineages, starts = np.unique(sorted_lineages, return_index=True)
+        self.offsets = np.append(starts, len(order))
+        self.order = order
+        # The one copy: rows grouped by lineage, gene-major for cheap column gathers
+        self.effects = np.ascontiguousarray(np.asarray(effects, dtype=np.float64)[order].T)
+        with np.errstate(all='ignore'):
+            self.thresholds = np.nanpercentile(self.effects, 25, axis=1)
+        self.min_cell_lines = min_cell_lines
+
+        logger.info("Lineage co-dependency: %d cell lines in %d lineages",
+                    len(order), len(self.lineages))
+
+    @classmethod
+    def from_frame(cls, genesdf, lineages, **kwargs):
+        """Align a ModelID -> lineage Series with the rows of `genesdf`."""
+        return cls(genesdf.to_numpy(dtype=np.float64), lineages.reindex(genesdf.index).to_numpy(), **kwargs)
+
+    @property
+    def feature_names(self):
+        """Flattened column names: '<feature>__<lineage>', feature-major."""
+        return [f"{name}__{lineage}" for name in LINEAGE_FEATURES for lineage in self.lineages]
+
+    def _segment_sum(self, x):
+        return np.add.reduceat(x, self.offsets[:-1], axis=1)
+
+    @instrumentation.timed('lineage_codependency_batch')
+    def transform(self, idx_a, idx_b):
+        """
+        Per-lineage features for pairs of gene columns.
+
+        Parameters:
+        -----------
+        idx_a, idx_b : array-like of int
+            Columns of the effect matrix; -1 marks a missing gene
+
+        Returns:
+        --------
+        features : dict of ndarray
+            Feature name -> (n_pairs x n_lineages) block
+        """
+        idx_a = np.asarray(idx_a, dtype=np.int64)
+        idx_b = np.asarray(idx_b, dtype=np.int64)
+        shape = (len(idx_a), len(self.lineages))
+        features = {name: np.zeros(shape, dtype=np.float64) for name in LINEAGE_FEATURES}
+
+        rows = np.flatnonzero((idx_a >= 0) & (idx_b >= 0))
+        if len(rows) == 0 or len(self.lineages) == 0:
+            return features
+
+        a = self.effects[idx_a[rows]]
+        b = self.effects[idx_b[rows]]
+        mask = ~(np.isnan(a) | np.isnan(b))
+        a = np.where(mask, a, 0.0)
+        b = np.where(mask, b, 0.0)
+
+        n = self._segment_sum(mask.astype(np.float64))
+        sum_a, sum_b = self._segment_sum(a), self._segment_sum(b)
+        essential = (a < self.thresholds[idx_a[rows], None]) & (b < self.thresholds[idx_b[rows], None]) & mask
+        n_essential = self._segment_sum(essential.astype(np.float64))
+
+        enough = n >= self.min_cell_lines
+        safe_n = np.where(enough, n, 1.0)
+        mean_a, mean_b = sum_a / safe_n, sum_b / safe_n
+        cov = self._segment_sum(a * b) - sum_a * mean_b
+        var_a = self._segment_sum(a * a) - sum_a * mean_a
+        var_b = self._segment_sum(b * b) - sum_b * mean_b
+        denom = np.sqrt(np.clip(var_a, 0, None) * np.clip(var_b, 0, None))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pearson = np.where(enough & (denom > 1e-12), cov / denom, 0.0)
+
+        features['lineage_pearson_correlation'][rows] = pearson
+        features['lineage_mean_effect_a'][rows] = np.where(enough, mean_a, 0.0)
+        features['lineage_mean_effect_b'][rows] = np.where(enough, mean_b, 0.0)
+        features['lineage_mutual_essentiality'][rows] = np.where(enough, n_essential / safe_n, 0.0)
+        features['lineage_n_cell_lines'][rows] = n
+        return features
+
+    def transform_array(self, idx_a, idx_b, chunk_size=2048):
+        """Pair x (feature, lineage) matrix in `feature_names` order."""
+        idx_a = np.asarray(idx_a, dtype=np.int64)
+        idx_b = np.asarray(idx_b, dtype=np.int64)
+        X = np.empty((len(idx_a), len(LINEAGE_FEATURES) * len(self.lineages)), dtype=np.float64)
+        for start in range(0, len(idx_a), chunk_size):
+            stop = start + chunk_size
+            features = self.transform(idx_a[start:stop], idx_b[start:stop])
+            X[start:stop] = np.concatenate([features[name] for name in LINEAGE_FEATURES], axis=1)
+        return X
+
+    def transform_frame(self, idx_a, idx_b, chunk_size=2048):
+        return pd.DataFrame(self.transform_array(idx_a, idx_b, chunk_size), columns=self.feature_names)
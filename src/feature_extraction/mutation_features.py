@@ -1,7 +1,14 @@
+import logging
+
 import pandas as pd
 import numpy as np
 
+from src import instrumentation
+
+logger = logging.getLogger(__name__)
+
 
+@instrumentation.timed('process_detailed_mutations')
 def process_detailed_mutations(mutations_df):
     """
     Process detailed mutation data into binary matrix.
@@ -16,13 +23,13 @@ def process_detailed_mutations(mutations_df):
     mutation_matrix : DataFrame
         Binary matrix (cell_lines x genes)
     """
-    print("  Processing detailed mutation data...")
+    logger.info("Processing detailed mutation data...")
 
     # Filter for damaging mutations (optional)
     # You can filter by: isCOSMIChotspot, isDeleterious, etc.
     if 'isDeleterious' in mutations_df.columns:
         mutations_df = mutations_df[mutations_df['isDeleterious'] == True]
-        print(f"  Filtered to {len(mutations_df)} damaging mutations")
+        logger.info("Filtered to %d damaging mutations", len(mutations_df))
 
     # Create binary matrix
     # Pivot: rows=ModelID (cell lines), columns=HugoSymbol (genes), values=1 (mutated)
@@ -49,10 +56,10 @@ def precompute_mutation_stats():
     Call this once after loading data, before extracting features for pairs.
     """
     if cell_line_mutations is None:
-        print("No mutation data loaded, skipping precomputation.")
+        logger.warning("No mutation data loaded, skipping precomputation.")
         return
 
-    print("Precomputing mutation statistics...")
+    logger.info("Precomputing mutation statistics...")
 
     # Store mutation frequencies for all genes
     mutation_freq_cache = {}
@@ -66,7 +73,7 @@ def precompute_mutation_stats():
     for gene in cell_line_mutations.columns:
         mutation_mask_cache[gene] = cell_line_mutations[gene].values > 0
 
-    print(f"Precomputed stats for {len(mutation_freq_cache)} genes")
+    logger.info("Precomputed stats for %d genes", len(mutation_freq_cache))
 
 
 def compute_mutation_context_features(gene_a, gene_b, cell_line_mutations):
@@ -166,3 +173,170 @@ def compute_mutation_context_features(gene_a, gene_b, cell_line_mutations):
             features['mutation_either_mutated_count'] = either_mutated
 
         return features
+
+
+MUTATION_FEATURES = [
+    'mutation_context_dependency_a_to_b',
+    'mutation_effect_b_in_mutant_a',
+    'mutation_context_dependency_b_to_a',
+    'mutation_effect_a_in_mutant_b',
+    'mutation_frequency_a',
+    'mutation_frequency_b',
+    'mutation_co_occurrence_ratio',
+    'mutation_both_mutated_count',
+    'mutation_either_mutated_count',
+]
+
+
+def _context_dependency(effects_other, valid, mut, min_mutated):
+    """Effect of the partner gene in mutant vs wild-type cell lines (batched)."""
+    n_valid = valid.sum(axis=1)
+    n_mut = mut.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        in_mutant = np.where(mut, effects_other, 0.0).sum(axis=1) / n_mut
+        wild_type = valid & ~mut
+        in_wt = np.where(wild_type, effects_other, 0.0).sum(axis=1) / (n_valid - n_mut)
+    in_wt = np.where(n_mut < n_valid, in_wt, 0)
+
+    enough = n_mut > min_mutated
+    return np.where(enough, in_wt - in_mutant, np.nan), np.where(enough, in_mutant, np.nan)
+
+
+@instrumentation.timed('mutation_context_batch')
+def compute_mutation_context_features_batch(idx_a, idx_b, effects, mut_idx_a, mut_idx_b, mutated,
+                                            min_mutated=5):
+    """
+    Vectorized `compute_mutation_context_features` for a batch of gene pairs.
+
+    Features that the per-pair version leaves out (gene not in the mutation
+    matrix, too few mutant lines) are NaN, matching the NaN columns the
+    per-pair dicts produce once stacked into a DataFrame.
+
+    Parameters:
+    -----------
+    idx_a, idx_b : array-like of int
+        Column indices into `effects` (-1 = gene not in DepMap)
+    effects : ndarray
+        Gene effect matrix (cell lines x genes)
+    mut_idx_a, mut_idx_b : array-like of int
+        Column indices into `mutated` (-1 = gene not in the mutation matrix)
+    mutated : ndarray of bool
+        Mutation matrix (cell lines x genes), rows aligned with `effects`
+
+    Returns:
+    --------
+    features : dict of ndarray
+    """
+    idx_a = np.asarray(idx_a, dtype=np.int64)
+    idx_b = np.asarray(idx_b, dtype=np.int64)
+    mut_idx_a = np.asarray(mut_idx_a, dtype=np.int64)
+    mut_idx_b = np.asarray(mut_idx_b, dtype=np.int64)
+    n_pairs = len(idx_a)
+    features = {name: np.full(n_pairs, np.nan) for name in MUTATION_FEATURES}
+
+    rows = np.flatnonzero((idx_a >= 0) & (idx_b >= 0))
+    if len(rows) == 0:
+        return features
+
+    a = effects[:, idx_a[rows]].T.astype(np.float64)
+    b = effects[:, idx_b[rows]].T.astype(np.float64)
+    valid = ~(np.isnan(a) | np.isnan(b))
+
+    has_a = mut_idx_a[rows] >= 0
+    has_b = mut_idx_b[rows] >= 0
+    mut_a = mutated[:, np.maximum(mut_idx_a[rows], 0)].T & valid & has_a[:, None]
+    mut_b = mutated[:, np.maximum(mut_idx_b[rows], 0)].T & valid & has_b[:, None]
+    n_valid = valid.sum(axis=1)
+
+    dep, in_mutant = _context_dependency(b, valid, mut_a, min_mutated)
+    features['mutation_context_dependency_a_to_b'][rows] = np.where(has_a, dep, np.nan)
+    features['mutation_effect_b_in_mutant_a'][rows] = np.where(has_a, in_mutant, np.nan)
+
+    dep, in_mutant = _context_dependency(a, valid, mut_b, min_mutated)
+    features['mutation_context_dependency_b_to_a'][rows] = np.where(has_b, dep, np.nan)
+    features['mutation_effect_a_in_mutant_b'][rows] = np.where(has_b, in_mutant, np.nan)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        features['mutation_frequency_a'][rows] = np.where(has_a, mut_a.sum(axis=1) / n_valid, np.nan)
+        features['mutation_frequency_b'][rows] = np.where(has_b, mut_b.sum(axis=1) / n_valid, np.nan)
+
+    both = (mut_a & mut_b).sum(axis=1)
+    either = (mut_a | mut_b).sum(axis=1)
+    has_both = has_a & has_b
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(either > 0, both / np.maximum(either, 1), 0)
+    features['mutation_co_occurrence_ratio'][rows] = np.where(has_both, ratio, np.nan)
+    features['mutation_both_mutated_count'][rows] = np.where(has_both, both, np.nan)
+    features['mutation_either_mutated_count'][rows] = np.where(has_both, either, np.nan)
+
+    return features
+
+
+def compute_mutation_context_features_one_vs_all(gene_idx, mut_idx, values, mut_ids, mutated_float,
+                                                 min_mutated=5):
+    """
+    Mutation-context features of one gene (as gene_a) against every gene.
+
+    Exact for pairs observed in every cell line; mutant/wild-type means
+    become matrix-vector products against the float mutation matrix.
+
+    Parameters:
+    -----------
+    gene_idx : int
+        Column of the query gene in `values`
+    mut_idx : int
+        Column of the query gene in `mutated_float` (-1 if not mutated anywhere)
+    values : ndarray
+        Gene effect matrix (cell lines x genes) without NaNs
+    mut_ids : ndarray of int
+        Mutation-matrix column per effect column (-1 = not in the matrix)
+    mutated_float : ndarray of float32
+        Mutation matrix (cell lines x mutation genes) as 0/1
+
+    Returns:
+    --------
+    features : dict of ndarray
+    """
+    n_cells, n_genes = values.shape
+    a = values[:, gene_idx]
+    has_b = mut_ids >= 0
+    safe_ids = np.maximum(mut_ids, 0)
+    features = {name: np.full(n_genes, np.nan) for name in MUTATION_FEATURES}
+
+    n_mut_b = mutated_float.sum(axis=0)[safe_ids]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # b -> a: effect of the query gene in lines where gene b is mutated
+        sum_in_mutant = (a @ mutated_float)[safe_ids]
+        in_mutant = sum_in_mutant / n_mut_b
+        in_wt = np.where(n_mut_b < n_cells, (a.sum() - sum_in_mutant) / (n_cells - n_mut_b), 0)
+        enough = has_b & (n_mut_b > min_mutated)
+        features['mutation_context_dependency_b_to_a'] = np.where(enough, in_wt - in_mutant, np.nan)
+        features['mutation_effect_a_in_mutant_b'] = np.where(enough, in_mutant, np.nan)
+        features['mutation_frequency_b'] = np.where(has_b, n_mut_b / n_cells, np.nan)
+
+    if mut_idx < 0:
+        return features
+
+    mut_a = mutated_float[:, mut_idx]
+    n_mut_a = mut_a.sum()
+    features['mutation_frequency_a'] = np.full(n_genes, n_mut_a / n_cells)
+
+    if n_mut_a > min_mutated:
+        # a -> b: effect of every gene b in lines where the query gene is mutated
+        sum_in_mutant = mut_a.astype(np.float64) @ values
+        in_mutant = sum_in_mutant / n_mut_a
+        if n_mut_a < n_cells:
+            in_wt = (values.sum(axis=0) - sum_in_mutant) / (n_cells - n_mut_a)
+        else:
+            in_wt = np.zeros(n_genes)
+        features['mutation_context_dependency_a_to_b'] = in_wt - in_mutant
+        features['mutation_effect_b_in_mutant_a'] = in_mutant
+
+    both = (mut_a @ mutated_float)[safe_ids].astype(np.float64)
+    either = n_mut_a + n_mut_b - both
+    ratio = np.where(either > 0, both / np.maximum(either, 1), 0)
+    features['mutation_co_occurrence_ratio'] = np.where(has_b, ratio, np.nan)
+    features['mutation_both_mutated_count'] = np.where(has_b, both, np.nan)
+    features['mutation_either_mutated_count'] = np.where(has_b, either, np.nan)
+
+    return features
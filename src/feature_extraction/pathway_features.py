@@ -25,7 +25,7 @@ def compute_kegg_features(gene_a, gene_b, kegg_pathways):
     pathways_b = set(kegg_pathways.get(gene_b, []))
 
     if len(pathways_a) == 0 and len(pathways_b) == 0:
-        return _empty_kegg_features()
+        return empty_kegg_features()
 
     # 1. SHARED PATHWAYS
     # SL genes often function in parallel pathways (e.g., DNA repair)
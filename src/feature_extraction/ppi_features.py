@@ -1,6 +1,10 @@
+import logging
+
 import pandas as pd
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 
 def compute_string_features(string_data, gene_a, gene_b):
     """
@@ -27,14 +31,14 @@ def compute_string_features(string_data, gene_a, gene_b):
     features = {}
 
     if string_data is None:
-        print("Warning: STRING data not loaded. Use load_string_data() first.")
-        return _empty_string_features()
+        logger.warning("STRING data not loaded. Use load_string_data() first.")
+        return empty_features()
 
     # Check both orderings since interactions are bidirectional
     pair = tuple(sorted([gene_a, gene_b]))
 
     if pair not in string_data:
-        return _empty_string_features()
+        return empty_features()
 
     interaction = string_data[pair]
 
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+
+from src import config, instrumentation
+from src.feature_extraction.cell_line_features import compute_codependency_features_batch
+
+
+def correlation_pvalues(r, n):
+    """
+    Two-sided p-values of correlation coefficients under the t distribution.
+
+    t = r * sqrt((n - 2) / (1 - r^2)) with n - 2 degrees of freedom, the
+    test `scipy.stats.pearsonr` (and `spearmanr`) report, evaluated for
+    any number of correlations at once.
+
+    Parameters:
+    -----------
+    r : array-like
+        Correlations
+    n : array-like or int
+        Observations behind each correlation
+
+    Returns:
+    --------
+    pvalues : ndarray
+        NaN where r is NaN or n < 3
+    """
+    r = np.asarray(r, dtype=np.float64)
+    df = np.asarray(n, dtype=np.float64) - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = np.clip(r, -1.0, 1.0)
+        t = np.abs(r) * np.sqrt(df / ((1.0 - r) * (1.0 + r)))
+        pvalues = 2 * stdtr(df, -t)
+    return np.where((df >= 1) & ~np.isnan(r), np.where(np.abs(r) == 1.0, 0.0, pvalues), np.nan)
+
+
+def benjamini_hochberg(pvalues):
+    """
+    Benjamini-Hochberg adjusted p-values (q-values), vectorized.
+
+    NaN p-values are kept as NaN and excluded from the number of tests.
+    """
+    pvalues = np.asarray(pvalues, dtype=np.float64)
+    qvalues = np.full(pvalues.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(pvalues))
+    m = len(valid)
+    if m == 0:
+        return qvalues
+
+    order = valid[np.argsort(pvalues[valid], kind='stable')]
+    scaled = pvalues[order] * m / np.arange(1, m + 1)
+    # Enforce monotonicity from the largest p-value down
+    qvalues[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+    return qvalues
+
+
+def _standardize_rows(x):
+    x = x - x.mean(axis=1, keepdims=True)
+    norm = np.sqrt((x * x).sum(axis=1, keepdims=True))
+    return np.divide(x, norm, out=np.zeros_like(x), where=norm > 0)
+
+
+def _masked_null(a, mask_a, b_perm, mask_b_perm):
+    """
+    Pearson correlation of each row of `a` with every permuted row of `b`
+    over the shared mask, from masked moments (pairs x rounds).
+
+    `a`, `b_perm` hold zeros where unobserved.
+    """
+    m_a = mask_a.astype(np.float64)
+    m_b = mask_b_perm.astype(np.float64)
+    n = np.einsum('pc,prc->pr', m_a, m_b)
+    sum_a = np.einsum('pc,prc->pr', a, m_b)
+    sum_b = np.einsum('pc,prc->pr', m_a, b_perm)
+    sum_aa = np.einsum('pc,prc->pr', a * a, m_b)
+    sum_bb = np.einsum('pc,prc->pr', m_a, b_perm * b_perm)
+    sum_ab = np.einsum('pc,prc->pr', a, b_perm)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_ab - sum_a * sum_b / n
+        var_a = sum_aa - sum_a * sum_a / n
+        var_b = sum_bb - sum_b * sum_b / n
+        return cov / np.sqrt(np.clip(var_a, 0, None) * np.clip(var_b, 0, None))
+
+
+@instrumentation.timed('permutation_pvalues')
+def permutation_pvalues(idx_a, idx_b, effects, observed=None, n_permutations=1000, seed=config.SEED,
+                        chunk_size=1024, round_block=32):
+    """
+    Two-sided permutation p-values of Pearson co-dependency.
+
+    Each round draws one permutation of the cell lines and applies it to
+    gene B of every pair, so all pairs share the same null draws and a
+    round is one vectorized pass. Pairs observed in every cell line use
+    pre-standardized profiles (a round is a row-wise dot product); pairs
+    with missing values recompute the masked correlation on the permuted
+    mask.
+
+    p = (1 + #{rounds with |r_perm| >= |r_obs|}) / (1 + n_permutations)
+
+    Parameters:
+    -----------
+    idx_a, idx_b : array-like of int
+        Columns of `effects`; -1 marks a missing gene (p-value NaN)
+    effects : ndarray
+        Gene effect matrix (cell lines x genes)
+    observed : array-like, optional
+        Observed correlations (computed if None)
+    chunk_size : int
+        Pairs per block
+    round_block : int
+        Permutation rounds evaluated together (memory: chunk_size x
+        round_block x cell lines)
+
+    Returns:
+    --------
+    pvalues : ndarray
+    """
+    idx_a = np.asarray(idx_a, dtype=np.int64)
+    idx_b = np.asarray(idx_b, dtype=np.int64)
+    n_cells = effects.shape[0]
+    rng = np.random.default_rng(seed)
+    permutations = np.stack([rng.permutation(n_cells) for _ in range(n_permutations)]) if n_permutations else \
+        np.empty((0, n_cells), dtype=np.int64)
+
+    if observed is None:
+        observed = compute_codependency_features_batch(idx_a, idx_b, effects)['depmap_pearson_correlation']
+    observed = np.abs(np.asarray(observed, dtype=np.float64))
+
+    pvalues = np.full(len(idx_a), np.nan)
+    rows = np.flatnonzero((idx_a >= 0) & (idx_b >= 0) & ~np.isnan(observed))
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        a = effects[:, idx_a[chunk]].T.astype(np.float64)
+        b = effects[:, idx_b[chunk]].T.astype(np.float64)
+        complete = ~(np.isnan(a).any(axis=1) | np.isnan(b).any(axis=1))
+        threshold = observed[chunk] - 1e-12
+        exceed = np.zeros(len(chunk), dtype=np.int64)
+
+        za, zb = _standardize_rows(a[complete]), _standardize_rows(b[complete])
+        mask_a, mask_b = ~np.isnan(a[~complete]), ~np.isnan(b[~complete])
+        a_missing, b_missing = np.where(mask_a, a[~complete], 0.0), np.where(mask_b, b[~complete], 0.0)
+
+        for r in range(0, n_permutations, round_block):
+            perms = permutations[r:r + round_block]
+            if complete.any():
+                null = np.einsum('pc,prc->pr', za, zb[:, perms])
+                exceed[complete] += (np.abs(null) >= threshold[complete, None]).sum(axis=1)
+            if (~complete).any():
+                null = _masked_null(a_missing, mask_a, b_missing[:, perms], mask_b[:, perms])
+                exceed[~complete] += (np.abs(null) >= threshold[~complete, None]).sum(axis=1)
+
+        pvalues[chunk] = (1 + exceed) / (1 + n_permutations)
+
+    instrumentation.count('pairs', len(rows))
+    return pvalues
+
+
+def codependency_significance(gene_a, gene_b, extractor, n_permutations=0, min_cell_lines=10,
+                              seed=config.SEED):
+    """
+    Co-dependency correlations of gene pairs with p-values and BH FDR.
+
+    Parameters:
+    -----------
+    gene_a, gene_b : array-like of str
+    extractor : PairFeatureExtractor
+        Provides the gene effect matrix and gene ids
+    n_permutations : int
+        Also compute permutation p-values (and their q-values) if > 0
+
+    Returns:
+    --------
+    table : DataFrame
+        gene_a, gene_b, n_cell_lines, pearson / spearman correlation and
+        their analytic p- and q-values (plus permutation columns)
+    """
+    gene_a = np.asarray(gene_a, dtype=object)
+    gene_b = np.asarray(gene_b, dtype=object)
+    idx_a, idx_b = extractor.gene_ids(gene_a), extractor.gene_ids(gene_b)
+    effects = extractor.effects
+
+    features = compute_codependency_features_batch(idx_a, idx_b, effects, min_cell_lines)
+    known = (idx_a >= 0) & (idx_b >= 0)
+    n = np.zeros(len(idx_a), dtype=np.int64)
+    observed = ~np.isnan(effects)
+    for start in range(0, len(idx_a), extractor.chunk_size):
+        stop = start + extractor.chunk_size
+        rows = np.flatnonzero(known[start:stop]) + start
+        n[rows] = (observed[:, idx_a[rows]] & observed[:, idx_b[rows]]).sum(axis=0)
+
+    # Pairs below min_cell_lines are zero-filled features, not tested
+    tested = known & (n >= min_cell_lines)
+    table = pd.DataFrame({'gene_a': gene_a, 'gene_b': gene_b, 'n_cell_lines': n})
+    for method in ['pearson', 'spearman']:
+        r = np.where(tested, features[f'depmap_{method}_correlation'], np.nan)
+        table[f'{method}_correlation'] = r
+        table[f'{method}_pvalue'] = correlation_pvalues(r, n)
+        table[f'{method}_qvalue'] = benjamini_hochberg(table[f'{method}_pvalue'].to_numpy())
+
+    if n_permutations > 0:
+        r = table['pearson_correlation'].to_numpy()
+        table['pearson_permutation_pvalue'] = permutation_pvalues(
+            np.where(tested, idx_a, -1), idx_b, effects, observed=r, n_permutations=n_permutations, seed=seed
+        )
+        table['pearson_permutation_qvalue'] = benjamini_hochberg(table['pearson_permutation_pvalue'].to_numpy())
+
+    return table
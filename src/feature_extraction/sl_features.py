@@ -1,37 +1,202 @@
+import logging
+
 import pandas as pd
 import numpy as np
+from src import config, instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class KnownPairFilter:
+    """
+    Reusable membership filter for known (unordered) gene pairs.
+
+    Genes are integer-encoded once and every pair is stored as a canonical
+    int64 key (min_id * n_genes + max_id) in a sorted array, so membership
+    for millions of candidates is one vectorized `searchsorted`. An optional
+    Bloom filter in front rejects most non-members before the exact check.
+
+    Parameters:
+    -----------
+    known_pairs : list of tuples or (N, 2) array
+        Known pairs (gene symbols)
+    genes : list of str, optional
+        Gene vocabulary; defaults to the genes seen in `known_pairs`.
+        Pairs with genes outside the vocabulary are ignored
+    bloom_bits_per_key : int, optional
+        Enable a Bloom filter front end with this many bits per key
+        (10 bits ~ 1% false positives before the exact check)
+    """
+
+    def __init__(self, known_pairs, genes=None, bloom_bits_per_key=None):
+        pairs = _as_pair_array(known_pairs)
+        pairs = pairs[pd.notna(pairs).all(axis=1)]
+
+        if genes is None:
+            genes = pd.unique(pairs.ravel())
+        self.genes = pd.Index(genes)
+        if not self.genes.is_unique:
+            raise ValueError("Gene vocabulary must not contain duplicates")
+        self.n_genes = len(self.genes)
+
+        idx = self.encode(pairs)
+        idx = idx[(idx >= 0).all(axis=1)]
+        self.keys = np.unique(self._keys(idx[:, 0], idx[:, 1]))
+
+        self.bloom = None
+        if bloom_bits_per_key:
+            self._build_bloom(bloom_bits_per_key)
+
+    @classmethod
+    def from_sl_tables(cls, *sl_tables, x_col='x_name', y_col='y_name', genes=None, bloom_bits_per_key=None):
+        """Build a filter from one or more SL/non-SL DataFrames (e.g. gene_sl_gene.tsv)."""
+        pairs = np.concatenate([df[[x_col, y_col]].to_numpy(dtype=object) for df in sl_tables])
+        return cls(pairs, genes=genes, bloom_bits_per_key=bloom_bits_per_key)
+
+    @classmethod
+    def coerce(cls, known_pairs, genes=None):
+        """Return `known_pairs` unchanged if it is already a filter, else build one."""
+        if isinstance(known_pairs, cls):
+            return known_pairs
+        return cls(known_pairs, genes=genes)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def encode(self, genes):
+        """Map gene symbols (any shape) to vocabulary ids; unknown genes map to -1."""
+        genes = np.asarray(genes, dtype=object)
+        return self.genes.get_indexer(genes.ravel()).reshape(genes.shape).astype(np.int64)
+
+    def _keys(self, idx_a, idx_b):
+        return np.minimum(idx_a, idx_b) * self.n_genes + np.maximum(idx_a, idx_b)
+
+    def _bloom_positions(self, keys):
+        # Double hashing (Kirsch-Mitzenmacher) over two splitmix64 mixes of the key
+        h1 = _splitmix64(keys.astype(np.uint64))
+        h2 = _splitmix64(h1) | np.uint64(1)
+        probes = np.arange(self.bloom_hashes, dtype=np.uint64)
+        return (h1[:, None] + probes[None, :] * h2[:, None]) % np.uint64(self.bloom_size)
+
+    def _build_bloom(self, bits_per_key):
+        self.bloom_size = max(64, int(bits_per_key * max(len(self.keys), 1)))
+        self.bloom_hashes = max(1, int(round(bits_per_key * np.log(2))))
+        bits = np.zeros(self.bloom_size, dtype=bool)
+        if len(self.keys):
+            bits[self._bloom_positions(self.keys).ravel()] = True
+        self.bloom = np.packbits(bits)
+
+    def _bloom_maybe(self, keys):
+        pos = self._bloom_positions(keys)
+        byte, bit = np.divmod(pos, np.uint64(8))
+        hits = (self.bloom[byte] >> (np.uint8(7) - bit.astype(np.uint8))) & np.uint8(1)
+        return hits.all(axis=1)
+
+    def contains_indices(self, idx_a, idx_b):
+        """Vectorized membership test for encoded pairs (ids of -1 never match)."""
+        idx_a = np.asarray(idx_a, dtype=np.int64)
+        idx_b = np.asarray(idx_b, dtype=np.int64)
+        result = np.zeros(len(idx_a), dtype=bool)
+        if len(self.keys) == 0:
+            return result
+
+        candidates = np.flatnonzero((idx_a >= 0) & (idx_b >= 0))
+        keys = self._keys(idx_a[candidates], idx_b[candidates])
+
+        if self.bloom is not None:
+            maybe = self._bloom_maybe(keys)
+            candidates, keys = candidates[maybe], keys[maybe]
+
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        result[candidates] = self.keys[pos] == keys
+        return result
+
+    def contains(self, pairs_array):
+        """
+        Vectorized membership test.
+
+        Parameters:
+        -----------
+        pairs_array : (N, 2) array or list of tuples
+            Gene symbol pairs, or integer ids already encoded with `encode`
+
+        Returns:
+        --------
+        mask : ndarray of bool
+            True where the pair (in either orientation) is known
+        """
+        pairs = _as_pair_array(pairs_array)
+        if not np.issubdtype(pairs.dtype, np.integer):
+            pairs = self.encode(pairs)
+        return self.contains_indices(pairs[:, 0], pairs[:, 1])
 
 
+def _as_pair_array(pairs):
+    """Coerce a list of pairs or an (N, 2) array into an (N, 2) ndarray."""
+    if isinstance(pairs, np.ndarray):
+        array = pairs
+    else:
+        pairs = list(pairs)
+        array = np.empty((len(pairs), 2), dtype=object)
+        if pairs:
+            array[:] = pairs
+    if array.ndim != 2 or array.shape[1] != 2:
+        raise ValueError("Pairs must have shape (N, 2)")
+    return array
+
+
+def _splitmix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+@instrumentation.timed('generate_negative_pairs')
 def generate_negative_pairs(n_pairs, known_sl_pairs, genesdf):
-    """Generate random gene pairs as negative examples."""
-    genes = list(genesdf.columns)
-    negative_pairs = []
+    """
+    Generate random gene pairs as negative examples.
 
-    # Normalize known SL pairs (handle both orderings)
-    known_sl_set = set()
-    for gene_a, gene_b in known_sl_pairs:
-        # Add both orderings since (A,B) == (B,A)
-        known_sl_set.add(tuple(sorted([gene_a, gene_b])))
+    `known_sl_pairs` may be a list of pairs or a prebuilt KnownPairFilter,
+    so repeated calls don't re-index the SL tables.
+    """
+    genes = np.asarray(list(genesdf.columns), dtype=object)
+    known_filter = KnownPairFilter.coerce(known_sl_pairs)
 
-    print(f"Excluding {len(known_sl_set)} known SL pairs from negatives...")
+    logger.info("Excluding %d known SL pairs from negatives...", len(known_filter))
 
+    # Translate column positions to filter ids once, then sample in batches
+    gene_ids = known_filter.encode(genes)
+    idx_a, idx_b = [], []
+    n_found = 0
     max_attempts = n_pairs * 10  # Prevent infinite loop
     attempts = 0
+    skipped = 0
 
-    while len(negative_pairs) < n_pairs and attempts < max_attempts:
-        gene_a, gene_b = np.random.choice(genes, size=2, replace=False)
-        candidate_pair = tuple(sorted([gene_a, gene_b]))
+    while n_found < n_pairs and attempts < max_attempts:
+        size = min(int((n_pairs - n_found) * 1.1) + 16, max_attempts - attempts)
+        cand_a = np.random.randint(0, len(genes), size=size)
+        cand_b = np.random.randint(0, len(genes) - 1, size=size)
+        cand_b += cand_b >= cand_a  # two distinct genes, like choice(replace=False)
 
-        # Check if this pair is in known SL pairs
-        if candidate_pair not in known_sl_set:
-            negative_pairs.append((gene_a, gene_b))
-        else:
-            print(f"  Skipped known SL pair: {candidate_pair}")
+        known = known_filter.contains_indices(gene_ids[cand_a], gene_ids[cand_b])
+        skipped += int(known.sum())
+        idx_a.append(cand_a[~known])
+        idx_b.append(cand_b[~known])
+        n_found += int((~known).sum())
+        attempts += size
+
+    if skipped > 0:
+        logger.info("Skipped %d known SL pairs", skipped)
+    instrumentation.count('collisions', skipped)
 
-        attempts += 1
+    idx_a = np.concatenate(idx_a)[:n_pairs] if idx_a else np.empty(0, dtype=np.int64)
+    idx_b = np.concatenate(idx_b)[:n_pairs] if idx_b else np.empty(0, dtype=np.int64)
+    negative_pairs = list(zip(genes[idx_a], genes[idx_b]))
+    instrumentation.count('pairs', len(negative_pairs))
 
     if len(negative_pairs) < n_pairs:
-        print(f"Warning: Could only generate {len(negative_pairs)} negative pairs")
+        logger.warning("Could only generate %d negative pairs", len(negative_pairs))
 
     return negative_pairs
 
@@ -40,11 +205,11 @@ def validate_negative_pairs(negative_pairs, known_sl_pairs):
     """
     Validate that negative pairs don't overlap with known SL pairs.
 
-    Parameters:AAAS
+    Parameters:
     -----------
-    negative_pairs : list of tuples
+    negative_pairs : list of tuples or (N, 2) array
         Candidate negative pairs
-    known_sl_pairs : list of tuples
+    known_sl_pairs : list of tuples or KnownPairFilter
         Known SL pairs to exclude
 
     Returns:
@@ -52,24 +217,285 @@ def validate_negative_pairs(negative_pairs, known_sl_pairs):
     validated_pairs : list of tuples
         Negative pairs with no overlap
     """
-    known_sl_set = set()
-    for gene_a, gene_b in known_sl_pairs:
-        known_sl_set.add(tuple(sorted([gene_a, gene_b])))
+    known_filter = KnownPairFilter.coerce(known_sl_pairs)
+    candidates = _as_pair_array(negative_pairs)
 
-    validated_pairs = []
-    removed_count = 0
-
-    for gene_a, gene_b in negative_pairs:
-        candidate_pair = tuple(sorted([gene_a, gene_b]))
-        if candidate_pair not in known_sl_set:
-            validated_pairs.append((gene_a, gene_b))
-        else:
-            removed_count += 1
-            print(f"  Removed known SL pair from negatives: {candidate_pair}")
+    known = known_filter.contains(candidates)
+    validated_pairs = [tuple(pair) for pair in candidates[~known]]
 
+    removed_count = int(known.sum())
     if removed_count > 0:
-        print(f"  Total removed: {removed_count} pairs")
+        logger.info("Total removed: %d pairs", removed_count)
 
     return validated_pairs
 
 
+def build_alias_table(weights):
+    """
+    Build a Walker/Vose alias table for O(1) sampling from a discrete distribution.
+
+    Parameters:
+    -----------
+    weights : array-like
+        Non-negative (unnormalized) weights, one per outcome
+
+    Returns:
+    --------
+    prob : ndarray of float64
+        Probability of keeping the drawn column
+    alias : ndarray of int64
+        Outcome used when the drawn column is rejected
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    n = len(weights)
+    total = weights.sum()
+    if n == 0 or total <= 0:
+        raise ValueError("Alias table needs at least one positive weight")
+
+    scaled = weights * n / total
+    prob = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.int64)
+
+    small = list(np.flatnonzero(scaled < 1.0))
+    large = list(np.flatnonzero(scaled >= 1.0))
+
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+
+    return prob, alias
+
+
+def sample_alias(prob, alias, size, rng):
+    """Draw `size` outcomes from an alias table in a single vectorized pass."""
+    column = rng.integers(0, len(prob), size=size)
+    keep = rng.random(size) < prob[column]
+    return np.where(keep, column, alias[column])
+
+
+def _quantile_bins(values, n_bins):
+    """Assign each value to one of (at most) `n_bins` quantile bins."""
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    return np.searchsorted(edges, values, side='right')
+
+
+def compute_gene_strata(genes, known_sl_pairs=None, genesdf=None, kegg_pathways=None,
+                        n_degree_bins=4, n_essentiality_bins=4, n_pathway_bins=3):
+    """
+    Assign every gene to a stratum built from per-gene properties.
+
+    Strata combine SL-degree bins, DepMap essentiality bins and KEGG
+    membership bins. Random negatives that ignore these properties are
+    trivially separable from positives, so negatives are matched on them.
+
+    Parameters:
+    -----------
+    genes : list of str
+        Gene universe to stratify
+    known_sl_pairs : list of tuples, optional
+        Known SL pairs, used for SL-degree bins
+    genesdf : dataframe, optional
+        Gene effect data, used for mean-essentiality bins
+    kegg_pathways : dict, optional
+        Gene symbol -> list of KEGG pathways, used for membership bins
+    n_degree_bins, n_essentiality_bins, n_pathway_bins : int
+        Number of quantile bins for each property
+
+    Returns:
+    --------
+    strata : ndarray of int64
+        Dense stratum id per gene (aligned with `genes`)
+    """
+    genes = list(genes)
+    gene_index = {gene: i for i, gene in enumerate(genes)}
+    codes = []
+
+    if known_sl_pairs is not None:
+        degree = np.zeros(len(genes), dtype=np.float64)
+        for gene_a, gene_b in known_sl_pairs:
+            if gene_a in gene_index:
+                degree[gene_index[gene_a]] += 1
+            if gene_b in gene_index:
+                degree[gene_index[gene_b]] += 1
+
+        # Genes without any known SL partner get their own bin
+        degree_bins = np.zeros(len(genes), dtype=np.int64)
+        has_degree = degree > 0
+        if has_degree.any():
+            degree_bins[has_degree] = 1 + _quantile_bins(np.log1p(degree[has_degree]), n_degree_bins)
+        codes.append(degree_bins)
+
+    if genesdf is not None:
+        mean_effect = genesdf.reindex(columns=genes).mean(axis=0).values
+        essentiality_bins = np.full(len(genes), n_essentiality_bins, dtype=np.int64)
+        has_effect = ~np.isnan(mean_effect)
+        if has_effect.any():
+            essentiality_bins[has_effect] = _quantile_bins(mean_effect[has_effect], n_essentiality_bins)
+        codes.append(essentiality_bins)
+
+    if kegg_pathways is not None:
+        n_pathways = np.array([len(kegg_pathways.get(gene, [])) for gene in genes], dtype=np.float64)
+        pathway_bins = np.zeros(len(genes), dtype=np.int64)
+        in_kegg = n_pathways > 0
+        if in_kegg.any():
+            pathway_bins[in_kegg] = 1 + _quantile_bins(n_pathways[in_kegg], n_pathway_bins)
+        codes.append(pathway_bins)
+
+    if not codes:
+        return np.zeros(len(genes), dtype=np.int64)
+
+    _, strata = np.unique(np.stack(codes, axis=1), axis=0, return_inverse=True)
+    return strata.reshape(-1).astype(np.int64)
+
+
+class DistributionMatchedSampler:
+    """
+    Draw negative gene pairs whose stratum-pair distribution matches the positives.
+
+    An alias table over (stratum_a, stratum_b) cells, weighted by how often
+    positive pairs fall in each cell, picks a cell in O(1). A gene is then
+    drawn uniformly from each stratum via a CSR member list, so every
+    sample costs O(1) regardless of the number of genes.
+
+    Parameters:
+    -----------
+    genes : list of str
+        Gene universe to sample from
+    strata : array-like of int
+        Stratum id per gene, e.g. from `compute_gene_strata`
+    positive_pairs : list of tuples
+        Pairs whose stratum distribution the negatives should match
+    exclude_pairs : list of tuples or KnownPairFilter, optional
+        Pairs that must never be returned (defaults to `positive_pairs`)
+    seed : int
+        Seed for the sampler's random generator
+    """
+
+    def __init__(self, genes, strata, positive_pairs, exclude_pairs=None, seed=config.SEED):
+        self.genes = np.asarray(list(genes), dtype=object)
+        self.gene_index = {gene: i for i, gene in enumerate(self.genes)}
+        self.strata = np.asarray(strata, dtype=np.int64)
+        self.n_strata = int(self.strata.max()) + 1 if len(self.strata) else 0
+        self.rng = np.random.default_rng(seed)
+
+        # CSR layout of stratum members: members[offsets[s]:offsets[s + 1]]
+        self.members = np.argsort(self.strata, kind='stable')
+        self.sizes = np.bincount(self.strata, minlength=self.n_strata)
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+
+        idx_a, idx_b = self._encode(positive_pairs)
+        if len(idx_a) == 0:
+            raise ValueError("None of the positive pairs map onto the gene universe")
+
+        # Unordered stratum-pair cells observed among positives
+        s_a, s_b = self.strata[idx_a], self.strata[idx_b]
+        cells = np.minimum(s_a, s_b) * self.n_strata + np.maximum(s_a, s_b)
+        self.cells, counts = np.unique(cells, return_counts=True)
+
+        # A cell holding a single gene on both sides can only yield self-pairs
+        lo, hi = np.divmod(self.cells, self.n_strata)
+        usable = (lo != hi) | (self.sizes[lo] > 1)
+        self.cells, counts = self.cells[usable], counts[usable]
+        self.prob, self.alias = build_alias_table(counts)
+
+        if exclude_pairs is None:
+            exclude_pairs = positive_pairs
+        # A prebuilt filter may use its own vocabulary, so map our ids onto it once
+        self.known_filter = KnownPairFilter.coerce(exclude_pairs, genes=self.genes)
+        self.filter_ids = self.known_filter.encode(self.genes)
+
+    def _encode(self, pairs):
+        idx_a, idx_b = [], []
+        for gene_a, gene_b in pairs:
+            if gene_a in self.gene_index and gene_b in self.gene_index:
+                idx_a.append(self.gene_index[gene_a])
+                idx_b.append(self.gene_index[gene_b])
+        return np.asarray(idx_a, dtype=np.int64), np.asarray(idx_b, dtype=np.int64)
+
+    def _draw(self, size):
+        cell = self.cells[sample_alias(self.prob, self.alias, size, self.rng)]
+        s_a, s_b = np.divmod(cell, self.n_strata)
+
+        # Random orientation so gene_a/gene_b carry no stratum ordering
+        flip = self.rng.random(size) < 0.5
+        s_a, s_b = np.where(flip, s_b, s_a), np.where(flip, s_a, s_b)
+
+        pick_a = self.offsets[s_a] + (self.rng.random(size) * self.sizes[s_a]).astype(np.int64)
+        pick_b = self.offsets[s_b] + (self.rng.random(size) * self.sizes[s_b]).astype(np.int64)
+        return self.members[pick_a], self.members[pick_b]
+
+    def _is_excluded(self, idx_a, idx_b):
+        return self.known_filter.contains_indices(self.filter_ids[idx_a], self.filter_ids[idx_b])
+
+    def sample_indices(self, n_pairs, max_rounds=20):
+        """
+        Sample negative pairs as integer gene indices.
+
+        Returns:
+        --------
+        idx_a, idx_b : ndarray of int64
+            Indices into `self.genes`
+        """
+        out_a, out_b = [], []
+        n_found = 0
+
+        for _ in range(max_rounds):
+            if n_found >= n_pairs:
+                break
+            # Oversample slightly so most requests finish in one round
+            size = int((n_pairs - n_found) * 1.1) + 16
+            idx_a, idx_b = self._draw(size)
+            valid = (idx_a != idx_b) & ~self._is_excluded(idx_a, idx_b)
+            out_a.append(idx_a[valid])
+            out_b.append(idx_b[valid])
+            n_found += int(valid.sum())
+
+        idx_a = np.concatenate(out_a)[:n_pairs] if out_a else np.empty(0, dtype=np.int64)
+        idx_b = np.concatenate(out_b)[:n_pairs] if out_b else np.empty(0, dtype=np.int64)
+
+        if len(idx_a) < n_pairs:
+            logger.warning("Could only generate %d negative pairs", len(idx_a))
+
+        return idx_a, idx_b
+
+    def sample(self, n_pairs, max_rounds=20):
+        """Sample negative pairs as a list of (gene_a, gene_b) tuples."""
+        idx_a, idx_b = self.sample_indices(n_pairs, max_rounds=max_rounds)
+        return list(zip(self.genes[idx_a], self.genes[idx_b]))
+
+
+def generate_matched_negative_pairs(n_pairs, known_sl_pairs, genesdf, kegg_pathways=None, seed=config.SEED):
+    """
+    Generate negative pairs matched to the known SL pairs on gene strata.
+
+    Drop-in alternative to `generate_negative_pairs` whose negatives share
+    the SL-degree, essentiality and KEGG-membership profile of the positives.
+
+    Parameters:
+    -----------
+    n_pairs : int
+        Number of negative pairs to generate
+    known_sl_pairs : list of tuples
+        Known SL pairs (matched against and excluded)
+    genesdf : dataframe
+        Gene effect data; its columns define the gene universe
+    kegg_pathways : dict, optional
+        Gene symbol -> list of KEGG pathways
+
+    Returns:
+    --------
+    negative_pairs : list of tuples
+    """
+    genes = list(genesdf.columns)
+    strata = compute_gene_strata(genes, known_sl_pairs, genesdf, kegg_pathways)
+    sampler = DistributionMatchedSampler(genes, strata, known_sl_pairs, seed=seed)
+
+    logger.info("Sampling %d negatives matched over %d stratum pairs...", n_pairs, len(sampler.cells))
+    return sampler.sample(n_pairs)
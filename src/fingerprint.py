@@ -0,0 +1,57 @@
+"""
+Content fingerprints for cache keys.
+
+Dataset files are fingerprinted cheaply with `fingerprint_file`, in-memory
+key parts (arrays, parameters) with `fingerprint_parts`. Shared by the
+dataset, graph, training, pipeline, serving and model registry caches.
+"""
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+
+def fingerprint_file(file_path, sample_bytes=1 << 20):
+    """
+    Cheap content fingerprint for (possibly multi-GB) dataset files.
+
+    Hashes the size plus the first and last `sample_bytes`; pass
+    `sample_bytes=None` to hash the whole file.
+    """
+    file_path = Path(file_path)
+    size = file_path.stat().st_size
+    digest = hashlib.sha1(str(size).encode())
+
+    with open(file_path, 'rb') as f:
+        if sample_bytes is None or size <= 2 * sample_bytes:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        else:
+            digest.update(f.read(sample_bytes))
+            f.seek(size - sample_bytes)
+            digest.update(f.read(sample_bytes))
+
+    return digest.hexdigest()
+
+
+def fingerprint_parts(*parts):
+    """
+    Short content hash of in-memory cache-key parts.
+
+    Arrays are hashed by dtype, shape and bytes (object arrays, e.g. gene
+    symbols, by their string values), None as a marker and anything else
+    by its repr.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if part is None:
+            digest.update(b'none')
+        elif isinstance(part, np.ndarray):
+            if part.dtype == object:
+                part = part.astype(str)
+            part = np.ascontiguousarray(part)
+            digest.update(str((part.dtype, part.shape)).encode())
+            digest.update(part.tobytes())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()[:16]
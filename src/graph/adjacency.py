@@ -0,0 +1,73 @@
+import numpy as np
+import torch
+from torch_geometric.nn.conv.gcn_conv import gcn_norm
+
+
+def normalized_adjacency(edge_index, num_nodes, edge_weight=None, add_self_loops=True):
+    """
+    Symmetrically normalized GCN adjacency D^-1/2 (A + I) D^-1/2 as a
+    transposed CSR tensor (`adj_t[target, source]`), the layout GCNConv
+    consumes directly.
+
+    The message-passing graph of a split does not change during training,
+    so this is built once per split instead of inside every conv layer
+    on every forward pass.
+    """
+    edge_index, edge_weight = gcn_norm(edge_index, edge_weight, num_nodes, add_self_loops=add_self_loops)
+    adj_t = torch.sparse_coo_tensor(edge_index.flip(0), edge_weight, (num_nodes, num_nodes), check_invariants=False)
+    return adj_t.coalesce().to_sparse_csr()
+
+
+def attach_normalized_adjacency(data, edge_weight=None):
+    """
+    Cache the normalized adjacency of `data` as `data.adj_t`.
+
+    `edge_weight` defaults to `data.edge_weight` when present (e.g. from
+    `string_edge_weight`). Returns `data` for chaining.
+    """
+    if edge_weight is None:
+        edge_weight = getattr(data, 'edge_weight', None)
+    data.adj_t = normalized_adjacency(data.edge_index, data.num_nodes, edge_weight)
+    return data
+
+
+def message_passing_inputs(data):
+    """
+    Positional graph arguments for `GCNLinkPredictor.forward`: the cached
+    `adj_t` if present, else `edge_index` and the optional `edge_weight`.
+    """
+    adj_t = getattr(data, 'adj_t', None)
+    if adj_t is not None:
+        return (adj_t,)
+    return data.edge_index, getattr(data, 'edge_weight', None)
+
+
+def string_edge_weight(edge_index, genes, string_data, min_weight=0.1):
+    """
+    Edge weights from STRING combined confidence (score / 1000).
+
+    Parameters:
+    -----------
+    edge_index : LongTensor (2, n_edges)
+    genes : sequence of str
+        Gene symbol per node id
+    string_data : dict
+        Output of `load_string_data`, keyed by sorted gene pairs
+    min_weight : float
+        Weight for edges without STRING support, so they still pass
+        (weaker) messages
+
+    Returns:
+    --------
+    edge_weight : FloatTensor (n_edges,)
+    """
+    genes = np.asarray(genes, dtype=object)
+    src, dst = edge_index.numpy()
+    weights = np.fromiter(
+        (
+            string_data[pair]['combined_score'] / 1000.0 if pair in string_data else min_weight
+            for pair in (tuple(sorted((a, b))) for a, b in zip(genes[src], genes[dst]))
+        ),
+        dtype=np.float32, count=len(src),
+    )
+    return torch.from_numpy(np.maximum(weights, min_weight))
@@ -0,0 +1,155 @@
+from pathlib import Path
+
+import pandas as pd
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+from src import config
+from src.fingerprint import fingerprint_file, fingerprint_parts
+
+GRAPH_CACHE_DIR = config.RESULTS_DIR / 'graph_cache'
+
+NON_FEATURE_COLUMNS = ('gene_a', 'gene_b', 'is_synthetic_lethal')
+
+
+def build_graph_from_arrays(idx_a, idx_b, num_nodes, edge_attr=None, labels=None, x=None, genes=None):
+    """
+    Build a `torch_geometric.data.Data` link graph from integer-encoded pairs.
+
+    Every tensor is created with a single `torch.from_numpy` on a contiguous
+    array, so there is no per-row Python work.
+
+    Parameters:
+    -----------
+    idx_a, idx_b : array-like of int
+        Source and target node ids
+    num_nodes : int
+        Number of nodes
+    edge_attr : ndarray, optional
+        Edge features (n_edges x n_features); NaNs are filled with 0
+    labels : array-like, optional
+        Edge labels (is_synthetic_lethal)
+    x : ndarray or tensor, optional
+        Node features (num_nodes x d); defaults to ones(num_nodes, 1)
+    genes : list of str, optional
+        Gene symbol per node id, kept as `data.gene_names`
+
+    Returns:
+    --------
+    data : Data
+    """
+    edge_index = torch.from_numpy(np.ascontiguousarray(np.stack([idx_a, idx_b]), dtype=np.int64))
+
+    if x is None:
+        x = torch.ones(num_nodes, 1, dtype=torch.float)
+    elif not torch.is_tensor(x):
+        x = torch.from_numpy(np.array(x, dtype=np.float32))
+
+    data = Data(x=x, edge_index=edge_index, num_nodes=num_nodes)
+
+    if edge_attr is not None:
+        edge_attr = np.nan_to_num(np.asarray(edge_attr, dtype=np.float32), nan=0.0)
+        data.edge_attr = torch.from_numpy(np.ascontiguousarray(edge_attr))
+    if labels is not None:
+        data.y = torch.from_numpy(np.array(labels, dtype=np.int64))
+    if genes is not None:
+        data.gene_names = list(genes)
+
+    return data
+
+
+def encode_pair_table(pairs_df, gene_a_col='gene_a', gene_b_col='gene_b'):
+    """
+    Integer-encode the gene columns of a pair table in first-appearance order.
+
+    Returns:
+    --------
+    idx_a, idx_b : ndarray of int64
+    genes : ndarray
+        Gene symbol per node id
+    """
+    n = len(pairs_df)
+    codes, genes = pd.factorize(np.concatenate([pairs_df[gene_a_col].values, pairs_df[gene_b_col].values]))
+    return codes[:n].astype(np.int64), codes[n:].astype(np.int64), np.asarray(genes)
+
+
+def build_pair_graph(pairs_df, feature_columns=None, label_col='is_synthetic_lethal', x=None, genes=None,
+                     cache_dir=GRAPH_CACHE_DIR):
+    """
+    Build (or load from cache) the link graph for a pair feature table.
+
+    Parameters:
+    -----------
+    pairs_df : DataFrame
+        Pair table with gene_a, gene_b, feature columns and labels
+        (e.g. the output of the training-set construction)
+    feature_columns : list of str, optional
+        Edge feature columns (defaults to every non-gene, non-label column)
+    label_col : str
+        Label column; ignored if absent
+    x : ndarray, optional
+        Node features aligned with `genes`
+    genes : list of str, optional
+        Node vocabulary; defaults to first-appearance order in the table
+    cache_dir : path or None
+        Directory of the `.pt` cache; None disables caching
+
+    Returns:
+    --------
+    data : Data
+    """
+    if feature_columns is None:
+        feature_columns = [col for col in pairs_df.columns if col not in NON_FEATURE_COLUMNS]
+
+    if genes is None:
+        idx_a, idx_b, genes = encode_pair_table(pairs_df)
+    else:
+        gene_index = pd.Index(genes)
+        idx_a = gene_index.get_indexer(pairs_df['gene_a'].values)
+        idx_b = gene_index.get_indexer(pairs_df['gene_b'].values)
+        if (idx_a < 0).any() or (idx_b < 0).any():
+            raise KeyError("Pair table contains genes missing from `genes`")
+
+    edge_attr = pairs_df[feature_columns].to_numpy(dtype=np.float32)
+    labels = pairs_df[label_col].to_numpy() if label_col in pairs_df.columns else None
+    x_array = x.numpy() if torch.is_tensor(x) else (None if x is None else np.asarray(x))
+
+    key = fingerprint_parts(idx_a, idx_b, edge_attr, labels, x_array, np.asarray(genes, dtype=str), feature_columns)
+    return cached_graph(cache_dir, key, lambda: build_graph_from_arrays(
+        idx_a, idx_b, len(genes), edge_attr=edge_attr, labels=labels, x=x_array, genes=genes
+    ))
+
+
+def load_pair_graph(file_path, feature_columns=None, label_col='is_synthetic_lethal', x=None,
+                    cache_dir=GRAPH_CACHE_DIR):
+    """
+    Load the link graph for a pair feature CSV in DATA_DIR (e.g. gene_almost.csv).
+
+    The cache key is the file's fingerprint, so a warm start reads only the
+    `.pt` file and never parses the CSV.
+    """
+    file_path = config.DATA_DIR / file_path
+    x_array = x.numpy() if torch.is_tensor(x) else (None if x is None else np.asarray(x))
+    key = fingerprint_parts(fingerprint_file(file_path), feature_columns, label_col, x_array)
+
+    def build():
+        pairs_df = pd.read_csv(file_path)
+        return build_pair_graph(pairs_df, feature_columns, label_col, x=x, cache_dir=None)
+
+    return cached_graph(cache_dir, key, build)
+
+
+def cached_graph(cache_dir, key, build):
+    """Load graph `key` from `cache_dir`, or build and save it (no caching if cache_dir is None)."""
+    if cache_dir is None:
+        return build()
+
+    cache_file = Path(cache_dir) / f"graph_{key}.pt"
+    if cache_file.exists():
+        return torch.load(cache_file, weights_only=False)
+
+    data = build()
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    torch.save(data, cache_file)
+    return data
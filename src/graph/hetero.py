@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+import torch
+from torch_geometric.data import HeteroData
+
+from src import config
+from src.datasets.pathway import load_kegg_from_files
+from src.datasets.ppi import load_pi, load_ppi
+from src.datasets.sl import SLEdgeTable, load_sl_table
+from src.fingerprint import fingerprint_file, fingerprint_parts
+from src.graph.builder import GRAPH_CACHE_DIR, cached_graph
+
+PPI = ('gene', 'interacts', 'gene')
+SYNTHETIC_LETHAL = ('gene', 'synthetic_lethal', 'gene')
+IN_PATHWAY = ('gene', 'in_pathway', 'pathway')
+HAS_MEMBER = ('pathway', 'has_member', 'gene')
+
+
+def sl_edges(sl_pairs):
+    """
+    Gene-name endpoint arrays of SL pairs from an SLEdgeTable or a
+    SynLethDB-style DataFrame (x_name / y_name).
+    """
+    if isinstance(sl_pairs, SLEdgeTable):
+        pairs = sl_pairs.pair_array()
+        return pairs[:, 0].astype(str), pairs[:, 1].astype(str)
+
+    df = sl_pairs[sl_pairs['x_name'].notna().values & sl_pairs['y_name'].notna().values]
+    return df['x_name'].values.astype(str), df['y_name'].values.astype(str)
+
+
+def ppi_edges(ppi, protein_to_gene=None, score_threshold=0):
+    """
+    Gene-name endpoint arrays and STRING confidence (0-1) of PPI edges.
+
+    Parameters:
+    -----------
+    ppi : DataFrame or dict
+        Raw STRING links (protein1, protein2, combined_score), or the
+        pair dict returned by `load_string_data`
+    protein_to_gene : dict, optional
+        STRING protein id -> gene symbol (e.g. from `load_pi`);
+        unmapped proteins are dropped
+    score_threshold : int
+        Minimum combined score (0-1000)
+    """
+    if isinstance(ppi, dict):
+        pairs = np.array(list(ppi.keys()), dtype=object).reshape(-1, 2)
+        scores = np.fromiter((value['combined_score'] for value in ppi.values()), dtype=np.float32, count=len(ppi))
+        names_a, names_b = pairs[:, 0], pairs[:, 1]
+    else:
+        names_a = ppi['protein1'].values
+        names_b = ppi['protein2'].values
+        scores = ppi['combined_score'].to_numpy(dtype=np.float32)
+
+    if protein_to_gene is not None:
+        names_a = pd.Series(names_a).map(protein_to_gene).values
+        names_b = pd.Series(names_b).map(protein_to_gene).values
+
+    keep = pd.notna(names_a) & pd.notna(names_b) & (scores >= score_threshold)
+    return names_a[keep].astype(str), names_b[keep].astype(str), scores[keep] / 1000.0
+
+
+def pathway_memberships(kegg_pathways):
+    """Flat (gene, pathway) arrays from a gene -> [pathway ids] dict."""
+    genes = list(kegg_pathways.keys())
+    counts = np.fromiter((len(kegg_pathways[gene]) for gene in genes), dtype=np.int64, count=len(genes))
+    member_genes = np.repeat(np.asarray(genes, dtype=str), counts)
+    pathways = np.concatenate([np.asarray(p, dtype=str) for p in kegg_pathways.values()]) if genes else np.empty(0, str)
+    return member_genes, pathways
+
+
+def _gene_edge_index(genes, names_a, names_b, undirected, weights=None):
+    """
+    Deduplicated gene-gene edge index (and per-edge weights).
+
+    Unknown genes and self-loops are dropped. With `undirected`, each pair
+    is put in (min, max) order before deduplication, so sources listing
+    both orientations (STRING links, symmetric SL tables) yield one edge per
+    direction; duplicated pairs keep their highest weight.
+    """
+    idx_a = genes.get_indexer(names_a)
+    idx_b = genes.get_indexer(names_b)
+    keep = (idx_a >= 0) & (idx_b >= 0) & (idx_a != idx_b)
+    idx_a, idx_b = idx_a[keep], idx_b[keep]
+    if undirected:
+        idx_a, idx_b = np.minimum(idx_a, idx_b), np.maximum(idx_a, idx_b)
+
+    n_genes = np.int64(len(genes))
+    pair_keys, inverse = np.unique(idx_a.astype(np.int64) * n_genes + idx_b, return_inverse=True)
+    idx_a, idx_b = pair_keys // n_genes, pair_keys % n_genes
+    if weights is not None:
+        pair_weights = np.zeros(len(pair_keys), dtype=np.float32)
+        np.maximum.at(pair_weights, inverse, weights[keep])
+        weights = pair_weights
+
+    if undirected:
+        idx_a, idx_b = np.concatenate([idx_a, idx_b]), np.concatenate([idx_b, idx_a])
+        if weights is not None:
+            weights = np.concatenate([weights, weights])
+    return torch.from_numpy(np.stack([idx_a, idx_b]).astype(np.int64)), weights
+
+
+def build_hetero_graph(sl_pairs, ppi=None, kegg_pathways=None, genes=None, x=None, protein_to_gene=None,
+                       ppi_threshold=0, undirected=True, cache_dir=GRAPH_CACHE_DIR):
+    """
+    Assemble a gene/pathway HeteroData graph from the SL, PPI and KEGG loaders.
+
+    Relations:
+    - ('gene', 'synthetic_lethal', 'gene')
+    - ('gene', 'interacts', 'gene') with `edge_weight` = STRING confidence
+    - ('gene', 'in_pathway', 'pathway') and its reverse
+      ('pathway', 'has_member', 'gene')
+
+    Gene-gene edges are deduplicated (as unordered pairs when `undirected`,
+    keeping the highest PPI confidence), then get both directions when
+    `undirected` is set.
+    All edges are encoded with vectorized index lookups, and the result is
+    cached under a fingerprint of the encoded edges.
+
+    Parameters:
+    -----------
+    sl_pairs : SLEdgeTable or DataFrame
+    ppi : DataFrame or dict, optional
+        See `ppi_edges`
+    kegg_pathways : dict, optional
+        Gene symbol -> list of pathway ids (from `load_kegg_from_files`)
+    genes : list of str, optional
+        Gene vocabulary; defaults to the sorted union of all sources
+    x : ndarray or tensor, optional
+        Gene node features aligned with `genes`
+    cache_dir : path or None
+        Directory of the `.pt` cache; None disables caching
+
+    Returns:
+    --------
+    data : HeteroData
+        With `data['gene'].names` and `data['pathway'].names`
+    """
+    sl_a, sl_b = sl_edges(sl_pairs)
+    ppi_a = ppi_b = np.empty(0, dtype=str)
+    ppi_scores = np.empty(0, dtype=np.float32)
+    if ppi is not None:
+        ppi_a, ppi_b, ppi_scores = ppi_edges(ppi, protein_to_gene, ppi_threshold)
+    member_genes, member_pathways = np.empty(0, dtype=str), np.empty(0, dtype=str)
+    if kegg_pathways is not None:
+        member_genes, member_pathways = pathway_memberships(kegg_pathways)
+
+    if genes is None:
+        genes = np.unique(np.concatenate([sl_a, sl_b, ppi_a, ppi_b, member_genes]))
+    genes = pd.Index(genes)
+    pathways = pd.Index(np.unique(member_pathways))
+    x_array = x.numpy() if torch.is_tensor(x) else (None if x is None else np.asarray(x))
+
+    def build():
+        data = HeteroData()
+        data['gene'].num_nodes = len(genes)
+        data['gene'].names = list(genes)
+        if x_array is not None:
+            data['gene'].x = torch.from_numpy(np.array(x_array, dtype=np.float32))
+
+        data[SYNTHETIC_LETHAL].edge_index, _ = _gene_edge_index(genes, sl_a, sl_b, undirected)
+
+        if ppi is not None:
+            edge_index, weights = _gene_edge_index(genes, ppi_a, ppi_b, undirected, ppi_scores)
+            data[PPI].edge_index = edge_index
+            data[PPI].edge_weight = torch.from_numpy(weights)
+
+        if kegg_pathways is not None:
+            data['pathway'].num_nodes = len(pathways)
+            data['pathway'].names = list(pathways)
+            gene_idx = genes.get_indexer(member_genes)
+            pathway_idx = pathways.get_indexer(member_pathways)
+            known = gene_idx >= 0
+            membership = np.stack([gene_idx[known], pathway_idx[known]]).astype(np.int64)
+            data[IN_PATHWAY].edge_index = torch.from_numpy(membership)
+            data[HAS_MEMBER].edge_index = torch.from_numpy(membership[::-1].copy())
+
+        return data
+
+    key = fingerprint_parts(
+        'hetero_dedup', np.asarray(genes, dtype=str), sl_a, sl_b, ppi_a, ppi_b, ppi_scores,
+        member_genes, member_pathways, x_array, undirected,
+    )
+    return cached_graph(cache_dir, key, build)
+
+
+def load_hetero_graph(sl_file, string_file=None, string_info_file=None, kegg_gene_list=None,
+                      kegg_gene_pathway=None, ppi_threshold=400, x=None, genes=None, undirected=True,
+                      cache_dir=GRAPH_CACHE_DIR):
+    """
+    Load the heterograph straight from the dataset files in DATA_DIR.
+
+    The cache key is built from the file fingerprints and parameters, so a
+    warm start reads only the `.pt` file and skips every loader.
+    """
+    files = [sl_file, string_file, string_info_file, kegg_gene_list, kegg_gene_pathway]
+    x_array = x.numpy() if torch.is_tensor(x) else (None if x is None else np.asarray(x))
+    key = fingerprint_parts(
+        'hetero_files_dedup', [None if f is None else fingerprint_file(config.DATA_DIR / f) for f in files],
+        ppi_threshold, undirected, x_array, None if genes is None else list(genes),
+    )
+
+    def build():
+        sl_table = load_sl_table(sl_file)
+        ppi, protein_to_gene = None, None
+        if string_file is not None:
+            ppi = load_ppi(string_file)
+            if string_info_file is not None:
+                _, protein_to_gene = load_pi(string_info_file)
+        kegg_pathways = None
+        if kegg_gene_list is not None and kegg_gene_pathway is not None:
+            kegg_pathways, _, _ = load_kegg_from_files(kegg_gene_list, kegg_gene_pathway)
+        return build_hetero_graph(
+            sl_table, ppi, kegg_pathways, genes=genes, x=x, protein_to_gene=protein_to_gene,
+            ppi_threshold=ppi_threshold, undirected=undirected, cache_dir=None,
+        )
+
+    return cached_graph(cache_dir, key, build)
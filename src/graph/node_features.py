@@ -0,0 +1,134 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+
+from src import config
+from src.datasets.depmap import load_cell_info
+from src.fingerprint import fingerprint_file
+
+NODE_FEATURE_CACHE_DIR = config.RESULTS_DIR / 'node_features'
+
+
+def compress_profiles(profiles, n_components=32, n_iter=4, seed=config.SEED):
+    """
+    Compress gene profiles (genes x cell lines) with randomized truncated SVD.
+
+    Missing values are filled with the cell line's mean over genes before
+    centering, so they contribute nothing to the principal directions.
+    Genes without any measurement get an all-zero embedding.
+
+    Parameters:
+    -----------
+    profiles : ndarray
+        Genes x cell lines, may contain NaN
+    n_components : int
+        Embedding dimension
+    n_iter : int
+        Power iterations of the randomized range finder
+
+    Returns:
+    --------
+    embeddings : ndarray of float32
+        Genes x n_components principal component scores (U * S)
+    explained_variance_ratio : ndarray
+    """
+    from sklearn.utils.extmath import randomized_svd
+
+    profiles = np.array(profiles, dtype=np.float32)
+    missing = np.isnan(profiles)
+    col_means = np.nanmean(np.where(missing.all(axis=0), 0.0, profiles), axis=0) if profiles.size else 0.0
+    profiles[missing] = np.broadcast_to(col_means, profiles.shape)[missing]
+    profiles -= profiles.mean(axis=0)
+
+    n_components = min(n_components, *profiles.shape)
+    u, s, _ = randomized_svd(profiles, n_components, n_iter=n_iter, random_state=seed)
+    embeddings = (u * s).astype(np.float32)
+    embeddings[missing.all(axis=1)] = 0.0
+
+    total_variance = np.square(profiles).sum()
+    explained = np.square(s) / total_variance if total_variance > 0 else np.zeros_like(s)
+    return embeddings, explained
+
+
+def depmap_embeddings(file_path='CRISPRGeneEffect.csv', n_components=32, n_iter=4, seed=config.SEED,
+                      cache_dir=NODE_FEATURE_CACHE_DIR):
+    """
+    Compressed DepMap gene-effect profiles, cached per release.
+
+    The cache key is the fingerprint of the gene-effect file plus the SVD
+    parameters, so a new DepMap release is recompressed automatically.
+    Cached embeddings are memory-mapped copy-on-write, which lets
+    `torch.from_numpy` wrap them without reading or copying the file.
+
+    Parameters:
+    -----------
+    file_path : str
+        Gene-effect CSV in DATA_DIR
+    n_components : int
+        Embedding dimension
+    cache_dir : path or None
+        Cache directory; None disables caching
+
+    Returns:
+    --------
+    embeddings : ndarray (genes x n_components, float32)
+    genes : list of str
+    """
+    def build():
+        effects = load_cell_info(file_path)
+        embeddings, explained = compress_profiles(effects.to_numpy(dtype=np.float32).T, n_components, n_iter, seed)
+        return embeddings, list(effects.columns.astype(str)), explained
+
+    if cache_dir is None:
+        embeddings, genes, _ = build()
+        return embeddings, genes
+
+    key = fingerprint_file(config.DATA_DIR / file_path)[:16]
+    stem = Path(cache_dir) / f"depmap_svd_{key}_{n_components}_{n_iter}_{seed}"
+    array_file, meta_file = stem.with_suffix('.npy'), stem.with_suffix('.json')
+
+    if not (array_file.exists() and meta_file.exists()):
+        embeddings, genes, explained = build()
+        array_file.parent.mkdir(parents=True, exist_ok=True)
+        np.save(array_file, embeddings)
+        with open(meta_file, 'w') as f:
+            json.dump({
+                'source': str(file_path),
+                'n_components': int(embeddings.shape[1]),
+                'explained_variance_ratio': explained.tolist(),
+                'genes': genes,
+            }, f)
+
+    with open(meta_file) as f:
+        genes = json.load(f)['genes']
+    return np.load(array_file, mmap_mode='c'), genes
+
+
+def align_node_features(embeddings, embedding_genes, genes):
+    """
+    Node feature tensor for a graph's gene vocabulary.
+
+    If the graph uses the embedding's own gene order the tensor shares
+    memory with `embeddings`; otherwise rows are gathered once and genes
+    without a profile get zeros.
+    """
+    if list(genes) == list(embedding_genes):
+        return torch.from_numpy(embeddings)
+
+    idx = pd.Index(embedding_genes).get_indexer(genes)
+    x = np.zeros((len(idx), embeddings.shape[1]), dtype=np.float32)
+    x[idx >= 0] = embeddings[idx[idx >= 0]]
+    return torch.from_numpy(x)
+
+
+def depmap_node_features(genes, file_path='CRISPRGeneEffect.csv', n_components=32, seed=config.SEED,
+                         cache_dir=NODE_FEATURE_CACHE_DIR):
+    """
+    DepMap SVD node features aligned with `genes`, ready to pass as `x`
+    to `build_pair_graph` / `build_graph_from_arrays`.
+    """
+    embeddings, embedding_genes = depmap_embeddings(file_path, n_components, seed=seed, cache_dir=cache_dir)
+    return align_node_features(embeddings, embedding_genes, genes)
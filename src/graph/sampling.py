@@ -0,0 +1,135 @@
+import torch
+from torch_geometric.data import Data
+
+
+class LinkNeighborSampler:
+    """
+    Link-level neighbor sampling over a message-passing graph.
+
+    Called with a batch of supervision-edge positions, it takes both
+    endpoints of those edges as seed nodes, samples up to `num_neighbors[k]`
+    incoming neighbors per node at hop k, and returns the induced
+    subgraph with local node ids. Peak memory per batch is bounded by
+    batch_size * prod(num_neighbors) regardless of the graph size.
+
+    Sampling is vectorized over a CSC index (edges grouped by target) and
+    needs neither pyg-lib nor torch-sparse. The sampler is picklable, so it
+    can be the `collate_fn` of a multi-worker DataLoader.
+
+    Parameters:
+    -----------
+    data : Data
+        Message-passing graph (x, edge_index, optional edge_weight)
+    num_neighbors : list of int
+        Fan-out per hop (-1 = all neighbors)
+    edge_label_index : LongTensor (2, n)
+        Supervision pairs
+    edge_label : Tensor, optional
+        Labels of the supervision pairs
+    edge_label_attr : Tensor, optional
+        Edge attributes of the supervision pairs
+    """
+
+    def __init__(self, data, num_neighbors, edge_label_index, edge_label=None, edge_label_attr=None):
+        self.num_nodes = data.num_nodes
+        self.num_neighbors = list(num_neighbors)
+        self.x = data.x
+        self.edge_weight = getattr(data, 'edge_weight', None)
+
+        src, dst = data.edge_index
+        order = torch.argsort(dst, stable=True)
+        self.col = src[order]
+        self.row = dst[order]
+        self.edge_ids = order
+        self.rowptr = torch.zeros(self.num_nodes + 1, dtype=torch.long)
+        self.rowptr[1:] = torch.cumsum(torch.bincount(dst, minlength=self.num_nodes), dim=0)
+
+        self.edge_label_index = edge_label_index
+        self.edge_label = edge_label
+        self.edge_label_attr = edge_label_attr
+
+    def __len__(self):
+        return self.edge_label_index.size(1)
+
+    def _sample_positions(self, frontier, fanout):
+        """CSC positions of the sampled incoming edges of `frontier`."""
+        start = self.rowptr[frontier]
+        deg = self.rowptr[frontier + 1] - start
+
+        take_all = deg <= fanout if fanout >= 0 else torch.ones_like(deg, dtype=torch.bool)
+
+        # Low-degree nodes keep every incoming edge
+        all_start, all_deg = start[take_all], deg[take_all]
+        owner = torch.repeat_interleave(torch.arange(len(all_start)), all_deg)
+        offsets = torch.arange(int(all_deg.sum())) - torch.repeat_interleave(torch.cumsum(all_deg, 0) - all_deg, all_deg)
+        positions = [all_start[owner] + offsets]
+
+        # High-degree nodes draw `fanout` edges; duplicates are dropped below
+        if fanout >= 0 and (~take_all).any():
+            big_start, big_deg = start[~take_all], deg[~take_all]
+            draws = (torch.rand(len(big_start), fanout) * big_deg[:, None]).long()
+            positions.append((big_start[:, None] + draws).flatten())
+
+        return torch.unique(torch.cat(positions))
+
+    def __call__(self, index):
+        index = torch.as_tensor(index, dtype=torch.long)
+        label_index = self.edge_label_index[:, index]
+
+        node_map = torch.full((self.num_nodes,), -1, dtype=torch.long)
+        seeds = torch.unique(label_index.flatten())
+        node_map[seeds] = torch.arange(len(seeds))
+        nodes, frontier, n_seen = [seeds], seeds, len(seeds)
+        sampled = []
+
+        for fanout in self.num_neighbors:
+            if len(frontier) == 0:
+                break
+            positions = self._sample_positions(frontier, fanout)
+            sampled.append(positions)
+
+            neighbors = self.col[positions]
+            new = torch.unique(neighbors[node_map[neighbors] < 0])
+            node_map[new] = torch.arange(n_seen, n_seen + len(new))
+            n_seen += len(new)
+            nodes.append(new)
+            frontier = new
+
+        nodes = torch.cat(nodes)
+        positions = torch.cat(sampled) if sampled else torch.empty(0, dtype=torch.long)
+        edge_index = torch.stack([node_map[self.col[positions]], node_map[self.row[positions]]])
+
+        batch = Data(
+            x=self.x[nodes],
+            edge_index=edge_index,
+            num_nodes=len(nodes),
+            n_id=nodes,
+            e_id=self.edge_ids[positions],
+            edge_label_index=node_map[label_index],
+            input_id=index,
+        )
+        if self.edge_weight is not None:
+            batch.edge_weight = self.edge_weight[batch.e_id]
+        if self.edge_label is not None:
+            batch.edge_label = self.edge_label[index]
+        if self.edge_label_attr is not None:
+            batch.edge_label_attr = self.edge_label_attr[index]
+        return batch
+
+
+def make_link_loader(data, num_neighbors=(10, 10), batch_size=1024, shuffle=True, num_workers=0):
+    """
+    DataLoader over the supervision edges of a split (edge_label_index etc.).
+
+    With `num_workers > 0` neighbor sampling runs in background processes
+    while the main process trains on the previous batch.
+    """
+    sampler = LinkNeighborSampler(
+        data, num_neighbors, data.edge_label_index,
+        edge_label=getattr(data, 'edge_label', None),
+        edge_label_attr=getattr(data, 'edge_label_attr', None),
+    )
+    return torch.utils.data.DataLoader(
+        range(len(sampler)), batch_size=batch_size, shuffle=shuffle, collate_fn=sampler,
+        num_workers=num_workers, persistent_workers=num_workers > 0,
+    )
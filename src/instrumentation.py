@@ -0,0 +1,321 @@
+"""
+Stage timing, memory and throughput instrumentation.
+
+Library code marks coarse stages with `stage(...)` / `@timed(...)` and
+reports progress through `logging` (loggers under `src.`). Both are off by
+default and cost a flag check when disabled:
+
+    from src import instrumentation
+
+    instrumentation.configure_logging('INFO')
+    profiler = instrumentation.enable('exp1', track_memory=True)
+    ...
+    profiler.dump()   # results/profiles/exp1_<timestamp>.json
+"""
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from src import config
+
+PROFILE_DIR = config.RESULTS_DIR / 'profiles'
+
+_LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+
+def configure_logging(level='INFO', fmt=_LOG_FORMAT):
+    """
+    Send the package's log records (loggers under `src`) to stderr at `level`.
+
+    Until this is called, progress messages below WARNING are dropped
+    without being formatted.
+    """
+    logger = logging.getLogger('src')
+    if not any(getattr(handler, '_src_handler', False) for handler in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(fmt))
+        handler._src_handler = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger
+
+
+class PeakRSS:
+    """Poll the process RSS in a background thread and keep the maximum since the last reset."""
+
+    def __init__(self, interval=0.005):
+        import psutil
+
+        self.interval = interval
+        self.process = psutil.Process()
+        self.start = self.peak = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _poll(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def current(self):
+        return self.process.memory_info().rss
+
+    def reset(self):
+        self.peak = self.current()
+
+    def start_sampling(self):
+        self.start = self.peak = self.current()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop_sampling(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+    def __enter__(self):
+        return self.start_sampling()
+
+    def __exit__(self, *exc):
+        self.stop_sampling()
+
+
+class _Frame:
+    __slots__ = ('path', 'start', 'counters', 'alloc_start', 'alloc_peak', 'rss_start', 'rss_peak')
+
+    def __init__(self, path):
+        self.path = path
+        self.counters = {}
+        self.alloc_peak = 0
+        self.rss_peak = 0
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+
+class _NullStage:
+    """Shared no-op stage returned while profiling is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, name, n=1):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """
+    Aggregates timings, counters and memory peaks per (nested) stage.
+
+    Stages nest per thread; a stage's path is its parents' names joined with
+    '/'. Repeated stages are aggregated (calls, total/min/max seconds,
+    summed counters, max memory peaks) and every counter gets a
+    `<name>_per_second` rate in the profile.
+
+    With `track_memory`, tracemalloc and an RSS sampling thread run for the
+    profiler's lifetime and each stage records its peak traced allocation and
+    peak RSS above its own starting point. tracemalloc slows allocation-heavy
+    code noticeably, so it is opt-in.
+    """
+
+    def __init__(self, run_name='run', enabled=True, track_memory=False, rss_interval=0.01):
+        self.run_name = run_name
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.created = time.time()
+        self.stages = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._rss = None
+        if enabled and track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._rss = PeakRSS(rss_interval).start_sampling()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _memory_checkpoint(self, frame):
+        """Fold the running peaks into `frame` and reset them for the next (child) stage."""
+        frame.alloc_peak = max(frame.alloc_peak, tracemalloc.get_traced_memory()[1])
+        frame.rss_peak = max(frame.rss_peak, self._rss.peak)
+        tracemalloc.reset_peak()
+        self._rss.reset()
+
+    @contextmanager
+    def _stage(self, name, counters):
+        stack = self._stack()
+        frame = _Frame(f"{stack[-1].path}/{name}" if stack else name)
+        frame.counters.update(counters)
+
+        if self.track_memory:
+            if stack:
+                self._memory_checkpoint(stack[-1])
+            else:
+                tracemalloc.reset_peak()
+                self._rss.reset()
+            frame.alloc_start = tracemalloc.get_traced_memory()[0]
+            frame.rss_start = self._rss.current()
+
+        stack.append(frame)
+        frame.start = time.perf_counter()
+        try:
+            yield frame
+        finally:
+            seconds = time.perf_counter() - frame.start
+            stack.pop()
+            memory = {}
+            if self.track_memory:
+                self._memory_checkpoint(frame)
+                memory = {
+                    'peak_alloc_mb': max(frame.alloc_peak - frame.alloc_start, 0) / 2 ** 20,
+                    'peak_rss_mb': max(frame.rss_peak - frame.rss_start, 0) / 2 ** 20,
+                }
+                if stack:
+                    stack[-1].alloc_peak = max(stack[-1].alloc_peak, frame.alloc_peak)
+                    stack[-1].rss_peak = max(stack[-1].rss_peak, frame.rss_peak)
+            self._record(frame.path, seconds, frame.counters, memory)
+
+    def _record(self, path, seconds, counters, memory):
+        with self._lock:
+            entry = self.stages.get(path)
+            if entry is None:
+                entry = self.stages[path] = {
+                    'calls': 0, 'seconds': 0.0, 'min_seconds': float('inf'), 'max_seconds': 0.0, 'counters': {},
+                }
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['min_seconds'] = min(entry['min_seconds'], seconds)
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            for name, n in counters.items():
+                entry['counters'][name] = entry['counters'].get(name, 0) + n
+            for name, value in memory.items():
+                entry[name] = max(entry.get(name, 0.0), value)
+
+    def stage(self, name, **counters):
+        """
+        Context manager timing a stage; the yielded object takes `count(name, n)`.
+
+            with profiler.stage('featurize', pairs=len(pairs)) as s:
+                ...
+                s.count('rows_dropped', n_dropped)
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name, counters)
+
+    def count(self, name, n=1):
+        """Add to a counter of the innermost active stage of this thread."""
+        if self.enabled:
+            stack = self._stack()
+            if stack:
+                stack[-1].count(name, n)
+
+    def to_dict(self):
+        with self._lock:
+            stages = {}
+            for path, entry in self.stages.items():
+                counters = dict(entry['counters'])
+                for name, n in entry['counters'].items():
+                    counters[f"{name}_per_second"] = n / entry['seconds'] if entry['seconds'] > 0 else None
+                stages[path] = dict(entry, counters=counters)
+
+        profile = {
+            'run_name': self.run_name,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.created)),
+            'wall_seconds': time.time() - self.created,
+            'stages': stages,
+        }
+        if self.track_memory:
+            profile['peak_alloc_mb'] = max((entry.get('peak_alloc_mb', 0.0) for entry in stages.values()), default=0.0)
+            profile['rss_mb'] = self._rss.current() / 2 ** 20 if self._rss is not None else None
+        return profile
+
+    def dump(self, path=None):
+        """Write the JSON profile (default: PROFILE_DIR/<run_name>_<timestamp>.json) and return its path."""
+        if path is None:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.created))
+            path = PROFILE_DIR / f"{self.run_name}_{stamp}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def close(self):
+        if self._rss is not None:
+            self._rss.stop_sampling()
+            self._rss = None
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.enabled = False
+
+
+_profiler = Profiler(enabled=False)
+
+
+def get_profiler():
+    return _profiler
+
+
+def enable(run_name='run', track_memory=False):
+    """Start a fresh active profiler and return it."""
+    global _profiler
+    _profiler.close()
+    _profiler = Profiler(run_name, enabled=True, track_memory=track_memory)
+    return _profiler
+
+
+def disable():
+    """Stop profiling; returns the profiler that was active (for dumping)."""
+    global _profiler
+    previous = _profiler
+    previous.close()
+    _profiler = Profiler(enabled=False)
+    return previous
+
+
+def stage(name, **counters):
+    """`Profiler.stage` on the active profiler (a shared no-op when disabled)."""
+    return _profiler.stage(name, **counters)
+
+
+def count(name, n=1):
+    _profiler.count(name, n)
+
+
+def timed(name=None):
+    """
+    Decorator recording every call of a function as a stage.
+
+    Meant for coarse functions (loaders, batch feature groups); when
+    profiling is disabled the wrapper only checks a flag.
+    """
+    def decorator(fn):
+        stage_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _profiler.enabled:
+                return fn(*args, **kwargs)
+            with _profiler.stage(stage_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
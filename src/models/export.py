@@ -0,0 +1,140 @@
+import copy
+import json
+from pathlib import Path
+
+import torch
+
+
+def quantize_decode_head(model):
+    """
+    Copy of `model` with the lin1/lin2 link head dynamically quantized to int8.
+
+    Weights are stored as int8 and activations are quantized on the fly,
+    so no calibration data is needed. The GCN encoder stays float32.
+    """
+    from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+    model = copy.deepcopy(model).eval()
+    qconfig = {'lin1': default_dynamic_qconfig, 'lin2': default_dynamic_qconfig}
+    return quantize_dynamic(model, qconfig, dtype=torch.qint8)
+
+
+def _example_inputs(model, data, n_pairs=4096, seed=0):
+    """Encoder inputs plus decode pairs/attributes for tracing and parity checks."""
+    if getattr(data, 'edge_label_index', None) is not None and getattr(data, 'edge_label_attr', None) is not None:
+        pairs = data.edge_label_index[:, :n_pairs]
+        attr = data.edge_label_attr[:n_pairs].float()
+    else:
+        generator = torch.Generator().manual_seed(seed)
+        pairs = torch.randint(0, data.num_nodes, (2, n_pairs), generator=generator)
+        num_edge_features = model.lin1.in_features - 2 * model.conv2.out_channels
+        attr = torch.zeros(n_pairs, num_edge_features)
+    return data.x, data.edge_index, pairs, attr
+
+
+def parity_check(reference, candidate, data, n_pairs=4096, seed=0):
+    """
+    Compare a candidate (quantized / traced) model against the float model.
+
+    Returns:
+    --------
+    dict
+        max_abs_logit_diff, max_abs_prob_diff and label_agreement (share of
+        pairs with the same prediction at 0.5)
+    """
+    x, edge_index, pairs, attr = _example_inputs(reference, data, n_pairs, seed)
+    was_training = reference.training
+    reference.eval()
+    candidate.eval()
+    try:
+        with torch.inference_mode():
+            expected = reference.decode(reference(x, edge_index), pairs, attr).view(-1)
+            actual = candidate.decode(candidate(x, edge_index), pairs, attr).view(-1)
+    finally:
+        reference.train(was_training)
+
+    expected_prob, actual_prob = torch.sigmoid(expected), torch.sigmoid(actual)
+    return {
+        'n_pairs': int(expected.numel()),
+        'max_abs_logit_diff': float((expected - actual).abs().max()),
+        'max_abs_prob_diff': float((expected_prob - actual_prob).abs().max()),
+        'label_agreement': float(((expected_prob > 0.5) == (actual_prob > 0.5)).float().mean()),
+    }
+
+
+def to_torchscript(model, data):
+    """
+    Trace `model` (forward and decode) into a TorchScript module.
+
+    Tracing rather than scripting: scripted PyG convolutions reference
+    torch_geometric's SparseTensor placeholder and cannot be reloaded
+    without it, while the trace records plain tensor ops only.
+    """
+    model.eval()
+    x, edge_index, pairs, attr = _example_inputs(model, data)
+    with torch.no_grad():
+        embeddings = model(x, edge_index)
+    return torch.jit.trace_module(model, {'forward': (x, edge_index), 'decode': (embeddings, pairs, attr)})
+
+
+def export_model(model, data, path, quantize=True, tolerance=0.02, n_pairs=4096):
+    """
+    Export a trained GCNLinkPredictor as a standalone TorchScript artifact.
+
+    The artifact is reloaded from disk and checked against the float model
+    on up to `n_pairs` supervision pairs of `data` (or random pairs). The
+    report is written next to it as `<path>.parity.json`.
+
+    Parameters:
+    -----------
+    model : GCNLinkPredictor
+        Trained float model (left unchanged)
+    data : Data
+        Graph used for tracing and the parity check
+    path : str or Path
+        Output `.pt` file, loadable with `load_exported` / `torch.jit.load`
+    quantize : bool
+        Dynamically quantize the lin1/lin2 head to int8
+    tolerance : float
+        Maximum allowed absolute probability difference
+
+    Returns:
+    --------
+    report : dict
+
+    Raises:
+    -------
+    ValueError
+        If the exported model deviates from the float model by more than
+        `tolerance`; nothing is left at `path` in that case
+    """
+    path = Path(path)
+    was_training = model.training
+    model.eval()
+    try:
+        exported = quantize_decode_head(model) if quantize else copy.deepcopy(model)
+        exported = to_torchscript(exported, data)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        torch.jit.save(exported, str(path))
+
+        report = parity_check(model, load_exported(path), data, n_pairs)
+    finally:
+        model.train(was_training)
+
+    report.update(quantized=quantize, tolerance=tolerance)
+    if report['max_abs_prob_diff'] > tolerance:
+        path.unlink()
+        raise ValueError(
+            f"Exported model deviates from the float model: max |dp| = {report['max_abs_prob_diff']:.4f} "
+            f"> {tolerance}"
+        )
+
+    with open(path.with_name(path.name + '.parity.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def load_exported(path):
+    """Load an exported model for CPU inference."""
+    return torch.jit.load(str(path), map_location='cpu')
@@ -0,0 +1,58 @@
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch_geometric.nn import GCNConv
+from torch_geometric.nn.conv.gcn_conv import gcn_norm
+from torch_geometric.utils import is_torch_sparse_tensor
+
+from src import config
+
+
+class GCNLinkPredictor(nn.Module):
+    """
+    Two-layer GCN encoder with an MLP link-prediction head.
+
+    `forward` computes node embeddings by message passing over `edge_index`
+    (optionally weighted) or over a precomputed normalized adjacency from
+    `src.graph.adjacency.normalized_adjacency`; `decode` scores the pairs in `edge_label_index` from the concatenated
+    embeddings of both endpoints and their edge attributes.
+    """
+
+    def __init__(self, num_node_features, num_edge_features, hidden_channels_gcn, out_channels_gcn,
+                 hidden_channels_pred, seed=config.SEED):
+        super(GCNLinkPredictor, self).__init__()
+        torch.manual_seed(seed)
+        # Normalization happens once per forward (or once per split), not per layer
+        self.conv1 = GCNConv(num_node_features, hidden_channels_gcn, normalize=False)
+        self.conv2 = GCNConv(hidden_channels_gcn, out_channels_gcn, normalize=False)
+
+        # Link prediction head takes concatenated embeddings of two nodes + edge features
+        # Input dimension: (out_channels_gcn * 2) + num_edge_features
+        self.lin1 = nn.Linear((out_channels_gcn * 2) + num_edge_features, hidden_channels_pred)
+        self.lin2 = nn.Linear(hidden_channels_pred, 1)
+
+    def forward(self, x, edge_index, edge_weight=None):
+        if not is_torch_sparse_tensor(edge_index):
+            edge_index, edge_weight = gcn_norm(edge_index, edge_weight, x.size(0), add_self_loops=True)
+        x = self.conv1(x, edge_index, edge_weight)
+        x = F.relu(x)
+        x = F.dropout(x, p=0.5, training=self.training)
+        x = self.conv2(x, edge_index, edge_weight)
+        x = F.relu(x)
+        x = F.dropout(x, p=0.5, training=self.training)
+        return x  # Return node embeddings
+
+    def decode(self, node_embeddings, edge_label_index, edge_label_attr):
+        # For each edge in edge_label_index, retrieve embeddings of its source and target nodes
+        source, target = edge_label_index[0], edge_label_index[1]
+        h_source = node_embeddings[source]
+        h_target = node_embeddings[target]
+
+        # Concatenate node embeddings and edge attributes for link prediction
+        edge_features = torch.cat([h_source, h_target, edge_label_attr], dim=1)
+
+        edge_features = self.lin1(edge_features)
+        edge_features = F.relu(edge_features)
+        edge_features = self.lin2(edge_features)
+
+        return edge_features  # Return raw logits, BCEWithLogitsLoss will handle sigmoid
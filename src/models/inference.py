@@ -0,0 +1,138 @@
+import numpy as np
+import torch
+
+from src.graph.adjacency import message_passing_inputs
+
+
+def triu_pairs(n, start, stop):
+    """
+    Pairs (i, j), i < j, at linear positions [start, stop) of the strict
+    upper triangle of an n x n matrix, in row-major order.
+    """
+    k = np.arange(start, stop, dtype=np.float64)
+    i = n - 2 - np.floor(np.sqrt(-8 * k + 4 * n * (n - 1) - 7) / 2 - 0.5)
+    j = k + i + 1 - n * (n - 1) / 2 + (n - i) * ((n - i) - 1) / 2
+    return i.astype(np.int64), j.astype(np.int64)
+
+
+class GCNPairScorer:
+    """
+    Screen candidate pairs with a trained GCNLinkPredictor.
+
+    Message passing runs once at construction. The first layer of the
+    link head is linear in the concatenation [h_a, h_b, attr], so it is
+    split into per-node projections computed once for every node;
+    scoring a pair is then a gather, an add and the small second layer.
+
+    Parameters:
+    -----------
+    model : GCNLinkPredictor
+    data : Data
+        Message-passing graph (x, edge_index or cached adj_t)
+    pair_attr_fn : callable, optional
+        (idx_a, idx_b) -> edge attributes (n x num_edge_features) for
+        candidate pairs; if None the attribute term is left out (all zeros)
+    chunk_size : int
+        Pairs decoded per step
+    """
+
+    def __init__(self, model, data, pair_attr_fn=None, chunk_size=1 << 18):
+        self.pair_attr_fn = pair_attr_fn
+        self.chunk_size = chunk_size
+        self.num_nodes = data.num_nodes
+        self.gene_names = getattr(data, 'gene_names', None)
+
+        model.eval()
+        with torch.inference_mode():
+            self.embeddings = model(data.x, *message_passing_inputs(data))
+            out_channels = self.embeddings.size(1)
+            weight = model.lin1.weight
+            self.proj_a = self.embeddings @ weight[:, :out_channels].T + model.lin1.bias
+            self.proj_b = self.embeddings @ weight[:, out_channels:2 * out_channels].T
+            self.attr_weight = weight[:, 2 * out_channels:]
+            self.out_weight = model.lin2.weight.view(-1)
+            self.out_bias = model.lin2.bias
+
+    def _decode(self, idx_a, idx_b):
+        hidden = self.proj_a[idx_a] + self.proj_b[idx_b]
+        if self.pair_attr_fn is not None and self.attr_weight.size(1) > 0:
+            attr = self.pair_attr_fn(idx_a.numpy(), idx_b.numpy())
+            attr = torch.as_tensor(np.nan_to_num(np.asarray(attr, dtype=np.float32), nan=0.0))
+            hidden += attr @ self.attr_weight.T
+        return torch.relu_(hidden) @ self.out_weight + self.out_bias
+
+    def iter_scores(self, idx_a, idx_b):
+        """Yield (start, logits) for consecutive chunks of the given pairs."""
+        idx_a = torch.as_tensor(np.asarray(idx_a, dtype=np.int64))
+        idx_b = torch.as_tensor(np.asarray(idx_b, dtype=np.int64))
+        with torch.inference_mode():
+            for start in range(0, len(idx_a), self.chunk_size):
+                stop = start + self.chunk_size
+                yield start, self._decode(idx_a[start:stop], idx_b[start:stop]).numpy()
+
+    def score_pairs(self, idx_a, idx_b, probabilities=True):
+        """Logits (or sigmoid probabilities) for every given pair."""
+        scores = np.empty(len(idx_a), dtype=np.float32)
+        for start, logits in self.iter_scores(idx_a, idx_b):
+            scores[start:start + len(logits)] = logits
+        return 1.0 / (1.0 + np.exp(-scores)) if probabilities else scores
+
+    def iter_all_pairs(self, nodes=None):
+        """Yield (idx_a, idx_b) chunks covering every unordered pair of `nodes`."""
+        nodes = np.arange(self.num_nodes) if nodes is None else np.asarray(nodes, dtype=np.int64)
+        n = len(nodes)
+        n_pairs = n * (n - 1) // 2
+        for start in range(0, n_pairs, self.chunk_size):
+            i, j = triu_pairs(n, start, min(start + self.chunk_size, n_pairs))
+            yield nodes[i], nodes[j]
+
+    def top_k(self, k=100, nodes=None, pairs=None):
+        """
+        Streaming top-k over all pairs of `nodes` (default: every node) or
+        over explicit candidate `pairs` (idx_a, idx_b).
+
+        Only k candidates are kept between chunks, so memory does not grow
+        with the number of pairs screened.
+
+        Returns:
+        --------
+        idx_a, idx_b : ndarray of int64
+        scores : ndarray of float32
+            Sigmoid probabilities, sorted descending
+        """
+        if pairs is not None:
+            idx_a, idx_b = (np.asarray(p, dtype=np.int64) for p in pairs)
+            chunks = ((idx_a[s:s + self.chunk_size], idx_b[s:s + self.chunk_size])
+                      for s in range(0, len(idx_a), self.chunk_size))
+        else:
+            chunks = self.iter_all_pairs(nodes)
+
+        best_a = np.empty(0, dtype=np.int64)
+        best_b = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        with torch.inference_mode():
+            for chunk_a, chunk_b in chunks:
+                logits = self._decode(torch.from_numpy(chunk_a), torch.from_numpy(chunk_b)).numpy()
+                if len(logits) > k:
+                    keep = np.argpartition(-logits, k - 1)[:k]
+                    chunk_a, chunk_b, logits = chunk_a[keep], chunk_b[keep], logits[keep]
+
+                best_a = np.concatenate([best_a, chunk_a])
+                best_b = np.concatenate([best_b, chunk_b])
+                best_scores = np.concatenate([best_scores, logits])
+                if len(best_scores) > k:
+                    keep = np.argpartition(-best_scores, k - 1)[:k]
+                    best_a, best_b, best_scores = best_a[keep], best_b[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind='stable')
+        return best_a[order], best_b[order], 1.0 / (1.0 + np.exp(-best_scores[order]))
+
+    def top_k_frame(self, k=100, nodes=None, pairs=None):
+        """`top_k` as a DataFrame with gene names when the graph has them."""
+        import pandas as pd
+
+        idx_a, idx_b, scores = self.top_k(k, nodes, pairs)
+        if self.gene_names is not None:
+            names = np.asarray(self.gene_names)
+            return pd.DataFrame({'gene_a': names[idx_a], 'gene_b': names[idx_b], 'score': scores})
+        return pd.DataFrame({'gene_a': idx_a, 'gene_b': idx_b, 'score': scores})
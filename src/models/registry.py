@@ -0,0 +1,226 @@
+import json
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from src import config
+from src.fingerprint import fingerprint_file
+
+REGISTRY_DIR = config.RESULTS_DIR / 'models'
+
+
+def dataset_fingerprints(files):
+    """
+    Fingerprint dataset files given relative to DATA_DIR.
+
+    Parameters:
+    -----------
+    files : dict
+        Logical name -> file name, e.g. {'gene_effect': 'CRISPRGeneEffect.csv'}
+
+    Returns:
+    --------
+    fingerprints : dict
+        Logical name -> {'file', 'fingerprint'}
+    """
+    return {
+        name: {'file': str(file_name), 'fingerprint': fingerprint_file(config.DATA_DIR / file_name)}
+        for name, file_name in files.items()
+    }
+
+
+class ModelArtifact:
+    """A loaded model together with everything needed to score with it."""
+
+    def __init__(self, model, scaler, manifest):
+        self.model = model
+        self.scaler = scaler
+        self.manifest = manifest
+
+    @property
+    def feature_names(self):
+        return self.manifest.get('feature_names')
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    def __repr__(self):
+        return f"ModelArtifact(name={self.manifest['name']!r}, version={self.version!r})"
+
+
+class ModelRegistry:
+    """
+    Versioned store of models under `config.RESULTS_DIR / 'models'`.
+
+    Each version directory holds the model, its fitted scaler and a
+    manifest.json with the feature schema, dataset fingerprints, metrics
+    and library versions. XGBoost models use the native binary format;
+    other models are dumped uncompressed so their numpy arrays can be
+    memory-mapped and shared between worker processes on load.
+
+    Layout:
+        models/<name>/<version>/{manifest.json, model.ubj|model.joblib, scaler.joblib}
+        models/<name>/LATEST
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root is not None else REGISTRY_DIR
+
+    def _model_dir(self, name):
+        return self.root / name
+
+    def save(self, name, model, scaler=None, feature_names=None, datasets=None, metrics=None, params=None):
+        """
+        Register a fitted model.
+
+        Parameters:
+        -----------
+        name : str
+            Model name, e.g. 'xgb_sl'
+        model : classifier
+            Fitted model
+        scaler : StandardScaler, optional
+            Scaler fitted on the training features
+        feature_names : list of str, optional
+            Feature order the model was trained on
+        datasets : dict, optional
+            Output of `dataset_fingerprints`
+        metrics, params : dict, optional
+            Evaluation results and hyperparameters to keep with the model
+
+        Returns:
+        --------
+        version : str
+        """
+        version = time.strftime('%Y%m%d-%H%M%S')
+        version_dir = self._model_dir(name) / version
+        suffix = 0
+        while version_dir.exists():
+            suffix += 1
+            version_dir = self._model_dir(name) / f"{version}-{suffix}"
+        version = version_dir.name
+        version_dir.mkdir(parents=True)
+
+        if hasattr(model, 'get_booster'):
+            model_format = 'xgboost'
+            model.save_model(version_dir / 'model.ubj')
+        else:
+            model_format = 'joblib'
+            # Uncompressed so large arrays can be memory-mapped on load
+            joblib.dump(model, version_dir / 'model.joblib')
+
+        if scaler is not None:
+            joblib.dump(scaler, version_dir / 'scaler.joblib')
+
+        if feature_names is None and getattr(model, 'feature_names_in_', None) is not None:
+            feature_names = list(model.feature_names_in_)
+
+        manifest = {
+            'name': name,
+            'version': version,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'model_format': model_format,
+            'model_class': f"{type(model).__module__}.{type(model).__name__}",
+            'has_scaler': scaler is not None,
+            'feature_names': list(feature_names) if feature_names is not None else None,
+            'datasets': datasets or {},
+            'metrics': metrics or {},
+            'params': params or {},
+            'libraries': _library_versions(),
+        }
+        with open(version_dir / 'manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2, default=_json_default)
+
+        (self._model_dir(name) / 'LATEST').write_text(version)
+        return version
+
+    def versions(self, name):
+        """All registered versions of `name`, oldest first."""
+        model_dir = self._model_dir(name)
+        if not model_dir.exists():
+            return []
+        return sorted(p.name for p in model_dir.iterdir() if (p / 'manifest.json').exists())
+
+    def resolve(self, name, version='latest'):
+        if version == 'latest':
+            latest = self._model_dir(name) / 'LATEST'
+            if not latest.exists():
+                raise FileNotFoundError(f"No registered versions of model {name!r} in {self.root}")
+            version = latest.read_text().strip()
+        version_dir = self._model_dir(name) / version
+        if not (version_dir / 'manifest.json').exists():
+            raise FileNotFoundError(f"Model {name!r} has no version {version!r}")
+        return version_dir
+
+    def manifest(self, name, version='latest'):
+        with open(self.resolve(name, version) / 'manifest.json') as f:
+            return json.load(f)
+
+    def load(self, name, version='latest', mmap_mode='r'):
+        """
+        Load a registered model, its scaler and manifest.
+
+        Parameters:
+        -----------
+        mmap_mode : str or None
+            Passed to joblib for non-XGBoost models; 'r' shares array pages
+            between processes loading the same version
+
+        Returns:
+        --------
+        artifact : ModelArtifact
+        """
+        version_dir = self.resolve(name, version)
+        with open(version_dir / 'manifest.json') as f:
+            manifest = json.load(f)
+
+        if manifest['model_format'] == 'xgboost':
+            import xgboost as xgb
+
+            model = xgb.XGBClassifier()
+            model.load_model(version_dir / 'model.ubj')
+        else:
+            model = joblib.load(version_dir / 'model.joblib', mmap_mode=mmap_mode)
+
+        scaler = None
+        if manifest.get('has_scaler'):
+            scaler = joblib.load(version_dir / 'scaler.joblib')
+
+        return ModelArtifact(model, scaler, manifest)
+
+    def check_datasets(self, name, files, version='latest'):
+        """
+        Compare the current dataset files with the fingerprints stored at training time.
+
+        Returns:
+        --------
+        mismatches : list of str
+            Logical dataset names whose fingerprint differs or was not recorded
+        """
+        recorded = self.manifest(name, version).get('datasets', {})
+        current = dataset_fingerprints(files)
+        return [
+            key for key, value in current.items()
+            if recorded.get(key, {}).get('fingerprint') != value['fingerprint']
+        ]
+
+
+def _library_versions():
+    versions = {'numpy': np.__version__, 'joblib': joblib.__version__}
+    for module_name in ('sklearn', 'xgboost', 'pandas'):
+        try:
+            module = __import__(module_name)
+            versions[module_name] = module.__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
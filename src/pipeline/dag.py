@@ -0,0 +1,219 @@
+import functools
+import hashlib
+import inspect
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import joblib
+
+from src import config, instrumentation
+from src.fingerprint import fingerprint_file
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_CACHE_DIR = config.RESULTS_DIR / 'pipeline_cache'
+
+
+class Stage:
+    """
+    One node of a Pipeline.
+
+    Parameters:
+    -----------
+    name : str
+    fn : callable
+        Called as fn(*input_outputs, **params)
+    inputs : sequence of str
+        Names of upstream stages, passed positionally in this order
+    params : dict, optional
+        Keyword arguments; part of the memoization key
+    files : sequence of path, optional
+        Files the stage reads (relative to DATA_DIR or absolute); their
+        content fingerprints are part of the key
+    cache : bool
+        Persist the output; uncached stages are recomputed whenever a
+        downstream stage needs them
+    version : str
+        Part of the key. Edits to `fn` itself are picked up from its
+        source, but code it calls (feature extraction, model wrappers) is
+        not: bump the version when such library code changes its output
+    """
+
+    def __init__(self, name, fn, inputs=(), params=None, files=(), cache=True, version='1'):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.files = tuple(files)
+        self.cache = cache
+        self.version = version
+
+
+def _source(fn):
+    """Source of `fn` (its qualified name if the source is unavailable, e.g. for builtins)."""
+    if isinstance(fn, functools.partial):
+        return f"{_source(fn.func)}|{fn.args!r}|{sorted(fn.keywords.items())!r}"
+    try:
+        return inspect.getsource(fn)
+    except (OSError, TypeError):
+        return f"{fn.__module__}.{fn.__qualname__}"
+
+
+class Pipeline:
+    """
+    A DAG of stages memoized on a hash of their inputs and parameters.
+
+    A stage's key hashes its function's source, version and parameters, the
+    fingerprints of the files it reads and the keys of its upstream stages
+    (not their outputs), so keys are known before anything runs. Running a
+    target only loads or recomputes what is missing: if a stage's key is
+    cached its upstream stages are never touched, and changing one
+    parameter invalidates exactly that stage and its descendants.
+
+    Stages whose inputs are ready run concurrently on a thread pool; the
+    heavy work (pandas, numpy, scikit-learn, XGBoost) releases the GIL.
+    """
+
+    def __init__(self, cache_dir=PIPELINE_CACHE_DIR, max_workers=4):
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self.max_workers = max_workers
+        self.stages = {}
+
+    def add(self, name, fn, inputs=(), params=None, files=(), cache=True, version='1'):
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        missing = [dep for dep in inputs if dep not in self.stages]
+        if missing:
+            raise KeyError(f"Stage '{name}' depends on undefined stages {missing}")
+        self.stages[name] = Stage(name, fn, inputs, params, files, cache, version)
+        return self
+
+    def set_params(self, name, **params):
+        """Override parameters of a defined stage (e.g. a model hyperparameter)."""
+        self.stages[name].params.update(params)
+        return self
+
+    def keys(self):
+        """Memoization key of every stage (stages are added in topological order)."""
+        keys = {}
+        for name, stage in self.stages.items():
+            digest = hashlib.sha1()
+            digest.update(f"{name}|{stage.version}".encode())
+            digest.update(_source(stage.fn).encode())
+            digest.update(repr(sorted(stage.params.items())).encode())
+            for file_path in stage.files:
+                digest.update(fingerprint_file(config.DATA_DIR / file_path).encode())
+            for dep in stage.inputs:
+                digest.update(keys[dep].encode())
+            keys[name] = digest.hexdigest()[:16]
+        return keys
+
+    def _cache_file(self, name, key):
+        return self.cache_dir / name / f"{key}.joblib"
+
+    def is_cached(self, name, key):
+        stage = self.stages[name]
+        return stage.cache and self.cache_dir is not None and self._cache_file(name, key).exists()
+
+    def sinks(self):
+        """Stages no other stage depends on."""
+        used = {dep for stage in self.stages.values() for dep in stage.inputs}
+        return [name for name in self.stages if name not in used]
+
+    def plan(self, targets=None, force=()):
+        """
+        Stages to compute and cached stages to load for `targets`.
+
+        Returns:
+        --------
+        compute : list of str
+            In topological order
+        load : list of str
+        """
+        keys = self.keys()
+        targets = self.sinks() if targets is None else list(targets)
+        force = set(force)
+        compute, load, seen = set(), set(), set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            if name not in force and self.is_cached(name, keys[name]):
+                load.add(name)
+                return
+            compute.add(name)
+            for dep in self.stages[name].inputs:
+                visit(dep)
+
+        for target in targets:
+            visit(target)
+
+        order = list(self.stages)
+        return [n for n in order if n in compute], [n for n in order if n in load]
+
+    def run(self, targets=None, force=()):
+        """
+        Run the pipeline up to `targets`.
+
+        Parameters:
+        -----------
+        targets : list of str, optional
+            Defaults to the sink stages; intermediate outputs are only
+            loaded if a stage that needs them has to be recomputed
+        force : sequence of str
+            Stages to recompute even if cached
+
+        Returns:
+        --------
+        outputs : dict
+            Stage name -> output, for every stage that was loaded or computed
+        """
+        keys = self.keys()
+        compute, load = self.plan(targets, force)
+        outputs = {}
+        lock = threading.Lock()
+
+        for name in load:
+            with instrumentation.stage(f"load:{name}"):
+                outputs[name] = joblib.load(self._cache_file(name, keys[name]))
+            logger.info("Stage %s: loaded from cache (%s)", name, keys[name])
+
+        def execute(name):
+            stage = self.stages[name]
+            with lock:
+                args = [outputs[dep] for dep in stage.inputs]
+            logger.info("Stage %s: running (%s)", name, keys[name])
+            with instrumentation.stage(name):
+                result = stage.fn(*args, **stage.params)
+            if stage.cache and self.cache_dir is not None:
+                cache_file = self._cache_file(name, keys[name])
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_suffix('.tmp')
+                joblib.dump(result, tmp_file)
+                tmp_file.replace(cache_file)
+            return result
+
+        pending = list(compute)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                ready = [name for name in pending
+                         if all(dep in outputs for dep in self.stages[name].inputs)]
+                for name in ready:
+                    pending.remove(name)
+                    running[pool.submit(execute, name)] = name
+
+                if not running:
+                    raise RuntimeError(f"Pipeline stalled with unresolved stages {pending}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    with lock:
+                        outputs[name] = result
+
+        return outputs
@@ -0,0 +1,255 @@
+import argparse
+import functools
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from src import config, instrumentation
+from src.datasets.depmap import load_cell_info
+from src.datasets.omics import MultiOmicsCube
+from src.datasets.sl import load_non_sl_data, load_sl_data
+from src.feature_extraction.combined_features import EFFECT_LAYER, MUTATION_LAYER, PairFeatureExtractor
+from src.feature_extraction.mutation_features import process_detailed_mutations
+from src.pipeline.dag import PIPELINE_CACHE_DIR, Pipeline
+from src.training.cv import DEFAULT_MODELS, run_cv, summarize_cv
+from src.training.dataset import LABEL_COLUMN, create_training_dataset
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILES = {
+    'gene_effect': 'CRISPRGeneEffect.csv',
+    'mutations': 'OmicsSomaticMutations.csv',
+    'sl': 'gene_sl_gene.tsv',
+    'non_sl': 'gene_nonsl_gene.tsv',
+}
+
+PAIR_COLUMNS = ['gene_a', 'gene_b']
+
+# Version of the feature stages: bump when src.feature_extraction changes the
+# features it computes, which the stage keys cannot see
+FEATURE_VERSION = '1'
+
+
+# Stages: each takes its upstream outputs positionally and its params as keywords
+
+def mutation_matrix(file_path):
+    mutations_df = pd.read_csv(config.DATA_DIR / file_path)
+    return process_detailed_mutations(mutations_df)
+
+
+def align_model_ids(genesdf, cell_line_mutations):
+    """Register both matrices in one cube over the ModelIDs present in both."""
+    cube = MultiOmicsCube()
+    cube.add_layer(EFFECT_LAYER, genesdf, dtype=np.float64)
+    cube.add_layer(MUTATION_LAYER, cell_line_mutations, dtype=bool)
+    logger.info("Aligned %d ModelIDs (%d gene effect, %d mutation)",
+                len(cube), len(genesdf), len(cell_line_mutations))
+    return cube
+
+
+def _string_pairs(df):
+    # Same filter as the notebook: both gene names must be strings
+    keep = df['x_name'].map(lambda g: isinstance(g, str)) & df['y_name'].map(lambda g: isinstance(g, str))
+    return list(zip(df['x_name'][keep], df['y_name'][keep]))
+
+
+def pair_sets(sl_tables, non_sl):
+    """Known SL, known non-SL and computationally predicted (test) pairs."""
+    real, comp = sl_tables
+    return {
+        'known_sl': _string_pairs(real),
+        'non_sl': _string_pairs(non_sl),
+        'comp_sl': _string_pairs(comp),
+    }
+
+
+def build_extractor(cube):
+    return PairFeatureExtractor(cube)
+
+
+def training_features(extractor, pairs):
+    train_df, _ = create_training_dataset(pairs['known_sl'], extractor, pairs['non_sl'])
+    return train_df.dropna()
+
+
+def test_features(extractor, pairs):
+    test_df, _ = create_training_dataset(pairs['comp_sl'], extractor, comp=False)
+    return test_df.dropna()
+
+
+def split_and_scale(train_df, test_size=0.2, seed=config.SEED):
+    """Stratified train / holdout split and a StandardScaler fit on the training part."""
+    X = train_df.drop([LABEL_COLUMN, *PAIR_COLUMNS], axis=1)
+    y = train_df[LABEL_COLUMN]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=seed, stratify=y
+    )
+    scaler = StandardScaler()
+    return {
+        'feature_names': list(X.columns),
+        'X_train': scaler.fit_transform(X_train),
+        'X_test': scaler.transform(X_test),
+        'y_train': y_train.to_numpy(),
+        'y_test': y_test.to_numpy(),
+        'scaler': scaler,
+    }
+
+
+def _model_factories(model_params):
+    return {
+        name: functools.partial(DEFAULT_MODELS[name], **params)
+        for name, params in model_params.items()
+    }
+
+
+def cross_validate(split, n_splits=5, model_params=None, n_jobs=-1, seed=config.SEED):
+    folds = KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    folds = list(folds.split(split['X_train'], split['y_train']))
+    models = _model_factories(model_params or {name: {} for name in DEFAULT_MODELS})
+    results = run_cv(split['X_train'], split['y_train'], folds, models=models, n_jobs=n_jobs, seed=seed)
+    return {'results': results, 'summary': summarize_cv(results)}
+
+
+def fit_final_model(split, model='xgboost', model_params=None, seed=config.SEED):
+    """Fit one model on the whole training split and score it on the holdout."""
+    make_model = DEFAULT_MODELS[model]
+    estimator = make_model(split['y_train'], seed=seed, **(model_params or {}))
+    estimator.fit(split['X_train'], split['y_train'])
+    proba = estimator.predict_proba(split['X_test'])[:, 1]
+    holdout_auc = roc_auc_score(split['y_test'], proba)
+    logger.info("Final %s model: holdout AUC %.4f", model, holdout_auc)
+    return {'model': estimator, 'holdout_auc': holdout_auc}
+
+
+def score_test_pairs(test_df, split, final_model):
+    X_test = split['scaler'].transform(test_df[split['feature_names']])
+    predictions = test_df[PAIR_COLUMNS].reset_index(drop=True)
+    predictions['sl_probability'] = final_model['model'].predict_proba(X_test)[:, 1]
+    return predictions
+
+
+def build_pipeline(files=None, test_size=0.2, n_splits=5, cv_models=None, final_model='xgboost',
+                   final_params=None, n_jobs=-1, seed=config.SEED, cache_dir=PIPELINE_CACHE_DIR,
+                   max_workers=4):
+    """
+    The statistical-test experiment (exp1) as a memoized stage DAG.
+
+    load -> align ModelIDs -> mutation matrix -> pair sets -> features ->
+    split -> CV -> final model -> test scoring. Model hyperparameters only
+    enter the keys of the `cv` and `final_model` stages, so changing one
+    reloads the cached feature tables and re-runs just the training and
+    scoring stages. Loading, and training vs. test featurization, run in
+    parallel.
+
+    Parameters:
+    -----------
+    files : dict, optional
+        Overrides for DEFAULT_FILES (relative to DATA_DIR or absolute)
+    cv_models : dict, optional
+        Model name (a key of DEFAULT_MODELS) -> hyperparameters for CV;
+        defaults to every model with its default hyperparameters
+    final_model : str
+        Model fit on the whole training split and used for test scoring
+    final_params : dict, optional
+        Hyperparameters of the final model
+
+    Returns:
+    --------
+    pipeline : Pipeline
+    """
+    files = {**DEFAULT_FILES, **(files or {})}
+    if cv_models is None:
+        cv_models = {name: {} for name in DEFAULT_MODELS}
+
+    pipeline = Pipeline(cache_dir=cache_dir, max_workers=max_workers)
+    pipeline.add('gene_effect', load_cell_info, params={'file_path': str(files['gene_effect'])},
+                 files=[files['gene_effect']])
+    pipeline.add('mutations', mutation_matrix, params={'file_path': str(files['mutations'])},
+                 files=[files['mutations']])
+    pipeline.add('sl_tables', load_sl_data, params={'file_path': str(files['sl'])}, files=[files['sl']])
+    pipeline.add('non_sl', load_non_sl_data, params={'file_path': str(files['non_sl'])},
+                 files=[files['non_sl']])
+    pipeline.add('aligned', align_model_ids, inputs=['gene_effect', 'mutations'], version='2')
+    pipeline.add('pairs', pair_sets, inputs=['sl_tables', 'non_sl'])
+    # Cheap to rebuild and only needed when a feature table is recomputed
+    pipeline.add('extractor', build_extractor, inputs=['aligned'], cache=False)
+    pipeline.add('features', training_features, inputs=['extractor', 'pairs'], version=FEATURE_VERSION)
+    pipeline.add('test_features', test_features, inputs=['extractor', 'pairs'], version=FEATURE_VERSION)
+    pipeline.add('split', split_and_scale, inputs=['features'], params={'test_size': test_size, 'seed': seed})
+    pipeline.add('cv', cross_validate, inputs=['split'],
+                 params={'n_splits': n_splits, 'model_params': cv_models, 'n_jobs': n_jobs, 'seed': seed})
+    pipeline.add('final_model', fit_final_model, inputs=['split'],
+                 params={'model': final_model, 'model_params': dict(final_params or {}), 'seed': seed})
+    pipeline.add('test_scoring', score_test_pairs, inputs=['test_features', 'split', 'final_model'])
+
+    return pipeline
+
+
+def _parse_params(items):
+    """['max_depth=4', 'learning_rate=0.1'] -> {'max_depth': 4, 'learning_rate': 0.1}"""
+    params = {}
+    for item in items or []:
+        key, _, value = item.partition('=')
+        try:
+            params[key] = json.loads(value)
+        except json.JSONDecodeError:
+            params[key] = value
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the exp1 pipeline with per-stage memoization.")
+    for name, default in DEFAULT_FILES.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, default=default)
+    parser.add_argument('--targets', nargs='*', default=['cv', 'test_scoring'],
+                        help="Stages to run (and whose outputs are reported)")
+    parser.add_argument('--force', nargs='*', default=(), help="Stages to recompute even if cached")
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--n-splits', type=int, default=5)
+    parser.add_argument('--cv-models', nargs='*', default=list(DEFAULT_MODELS), choices=list(DEFAULT_MODELS))
+    parser.add_argument('--final-model', default='xgboost', choices=list(DEFAULT_MODELS))
+    parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                        help="Hyperparameter of the final model (and of the same model in CV)")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=config.SEED)
+    parser.add_argument('--cache-dir', default=str(PIPELINE_CACHE_DIR))
+    parser.add_argument('--output', default=None, help="Write test-pair predictions to this CSV")
+    parser.add_argument('--profile', action='store_true', help="Dump per-stage timings")
+    args = parser.parse_args(argv)
+
+    instrumentation.configure_logging()
+    if args.profile:
+        instrumentation.enable('exp1_pipeline')
+
+    final_params = _parse_params(args.param)
+    cv_models = {name: (final_params if name == args.final_model else {}) for name in args.cv_models}
+    pipeline = build_pipeline(
+        files={name: getattr(args, name) for name in DEFAULT_FILES},
+        test_size=args.test_size, n_splits=args.n_splits, cv_models=cv_models,
+        final_model=args.final_model, final_params=final_params, n_jobs=args.n_jobs,
+        seed=args.seed, cache_dir=args.cache_dir, max_workers=args.max_workers,
+    )
+    outputs = pipeline.run(targets=args.targets, force=args.force)
+
+    if 'cv' in outputs:
+        print(outputs['cv']['summary'].to_string())
+    if 'final_model' in outputs:
+        print(f"Holdout AUC ({args.final_model}): {outputs['final_model']['holdout_auc']:.4f}")
+    if 'test_scoring' in outputs:
+        predictions = outputs['test_scoring']
+        print(f"Scored {len(predictions)} computationally predicted pairs")
+        if args.output:
+            predictions.to_csv(args.output, index=False)
+
+    if args.profile:
+        print(f"Profile written to {instrumentation.get_profiler().dump()}")
+
+
+if __name__ == '__main__':
+    main()
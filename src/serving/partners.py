@@ -0,0 +1,186 @@
+"""
+"Top SL partners of gene X" queries.
+
+Usage:
+    python -m src.serving.partners BRCA1 PTEN --top 25 --model xgb_model.joblib \\
+        --scaler scaler.joblib --cache-dir results/partner_cache
+"""
+import argparse
+import hashlib
+import pickle
+import re
+from pathlib import Path
+
+import pandas as pd
+import numpy as np
+
+from src import config
+from src.fingerprint import fingerprint_file, fingerprint_parts
+from src.serving.scorer import LRUCache, resolve_feature_names
+
+
+def model_fingerprint(model):
+    """Short content hash identifying a fitted model."""
+    return hashlib.sha1(pickle.dumps(model)).hexdigest()[:12]
+
+
+def data_fingerprint(extractor):
+    """Short content hash of the gene effect and mutation data behind an extractor."""
+    return fingerprint_parts(
+        np.asarray(extractor.genes, dtype=object), extractor.effects,
+        None if extractor.mutated is None else np.asarray(extractor.mutation_genes, dtype=object),
+        extractor.mutated,
+    )
+
+
+class PartnerQueryEngine:
+    """
+    Score one gene against every other gene and rank its predicted SL partners.
+
+    Features come from `PairFeatureExtractor.transform_one_vs_all`, which
+    reuses precomputed per-gene statistics, so a cold query is one batched
+    feature pass plus one `predict_proba` over ~18k rows. Score vectors are
+    cached per (gene, model version, data version) in memory and, with
+    `cache_dir`, on disk, so repeat queries skip both steps.
+
+    Parameters:
+    -----------
+    model : classifier
+        Fitted model exposing `predict_proba`
+    extractor : PairFeatureExtractor
+        Batched feature extraction over the loaded datasets
+    scaler : StandardScaler, optional
+        Scaler fitted on the training features
+    feature_names : list of str, optional
+        Feature order the model was trained on
+    model_version : str, optional
+        Cache key for the model (defaults to a hash of the pickled model)
+    data_version : str, optional
+        Cache key for the input data, e.g. `fingerprint_file` of the dataset
+        files (defaults to a hash of the extractor's arrays)
+    cache_dir : path, optional
+        Directory for persistent score vectors
+    max_cached_genes : int
+        Score vectors kept in memory
+    """
+
+    def __init__(self, model, extractor, scaler=None, feature_names=None, model_version=None,
+                 data_version=None, cache_dir=None, max_cached_genes=256):
+        self.model = model
+        self.extractor = extractor
+        self.scaler = scaler
+        self.feature_names = resolve_feature_names(model, extractor, feature_names)
+        self.model_version = model_version or model_fingerprint(model)
+
+        # Scores depend on the data values (not just the gene universe) and
+        # on the preprocessing, so all of them are part of the key
+        self.data_version = data_version or data_fingerprint(extractor)
+        self.preprocessing_version = fingerprint_parts(
+            None if scaler is None else pickle.dumps(scaler), list(self.feature_names)
+        )
+
+        # Pay the one-off per-gene precomputation up front, not on the first query
+        extractor.gene_statistics()
+
+        self.cache = LRUCache(max_cached_genes)
+        self.cache_dir = None
+        if cache_dir is not None:
+            self.cache_dir = Path(cache_dir) / f"{self.model_version}_{self.data_version}_{self.preprocessing_version}"
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _cache_file(self, gene):
+        safe_name = re.sub(r'[^\w.-]', '_', gene)
+        return self.cache_dir / f"{safe_name}.npz"
+
+    def scores(self, gene):
+        """
+        SL probabilities of `gene` (as gene_a) with every other gene.
+
+        Returns:
+        --------
+        scores : Series
+            Indexed by partner gene, in DepMap column order
+        """
+        cached = self.cache.get_many([gene])
+        if gene in cached:
+            return cached[gene]
+
+        if self.cache_dir is not None and self._cache_file(gene).exists():
+            with np.load(self._cache_file(gene), allow_pickle=True) as stored:
+                scores = pd.Series(stored['scores'], index=stored['partners'], name=gene)
+            self.cache.put_many([(gene, scores)])
+            return scores
+
+        partners, X = self.extractor.transform_one_vs_all(gene, self.feature_names)
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        scores = pd.Series(self.model.predict_proba(X)[:, 1], index=partners, name=gene)
+
+        if self.cache_dir is not None:
+            np.savez(self._cache_file(gene), partners=partners, scores=scores.values)
+        self.cache.put_many([(gene, scores)])
+        return scores
+
+    def top_partners(self, gene, k=50):
+        """
+        The `k` highest-scoring predicted SL partners of `gene`.
+
+        Returns:
+        --------
+        top : DataFrame
+            Columns gene_a, gene_b, score, rank
+        """
+        scores = self.scores(gene)
+        k = min(k, len(scores))
+        values = scores.values
+        top = np.argpartition(-values, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.int64)
+        top = top[np.argsort(-values[top], kind='stable')]
+
+        return pd.DataFrame({
+            'gene_a': gene,
+            'gene_b': scores.index.values[top],
+            'score': values[top],
+            'rank': np.arange(1, len(top) + 1),
+        })
+
+
+def main(argv=None):
+    from src.serving.server import load_components
+
+    parser = argparse.ArgumentParser(description="Rank predicted SL partners of one or more genes")
+    parser.add_argument('genes', nargs='+', help="Query gene symbols, e.g. BRCA1")
+    parser.add_argument('--top', type=int, default=50)
+    model_source = parser.add_mutually_exclusive_group(required=True)
+    model_source.add_argument('--model', help="Path to a joblib-dumped classifier")
+    model_source.add_argument('--model-name', help="Name of a model in the model registry")
+    parser.add_argument('--model-version', default='latest', help="Registry version (with --model-name)")
+    parser.add_argument('--scaler', help="Path to the joblib-dumped StandardScaler (with --model)")
+    parser.add_argument('--gene-effect', default='CRISPRGeneEffect.csv', help="File in DATA_DIR")
+    parser.add_argument('--mutations', default='OmicsSomaticMutations.csv', help="File in DATA_DIR")
+    parser.add_argument('--cache-dir', help="Directory for persistent per-gene score vectors")
+    parser.add_argument('--output', help="Write all results to this CSV instead of stdout")
+    args = parser.parse_args(argv)
+
+    model, extractor, scaler, manifest = load_components(
+        args.model, args.gene_effect, args.mutations, args.scaler, args.model_name, args.model_version
+    )
+    # Fingerprint only the files that were loaded (an empty --mutations skips mutations)
+    data_files = [file_name for file_name in [args.gene_effect, args.mutations] if file_name]
+    data_version = fingerprint_parts(*(fingerprint_file(config.DATA_DIR / file_name) for file_name in data_files))
+    engine = PartnerQueryEngine(
+        model, extractor, scaler=scaler,
+        feature_names=manifest['feature_names'] if manifest else None,
+        model_version=f"{manifest['name']}-{manifest['version']}" if manifest else None,
+        data_version=data_version,
+        cache_dir=args.cache_dir,
+    )
+
+    results = pd.concat([engine.top_partners(gene, args.top) for gene in args.genes], ignore_index=True)
+    if args.output:
+        results.to_csv(args.output, index=False)
+    else:
+        print(results.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
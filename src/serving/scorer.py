@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from queue import Empty, Queue
+
+import numpy as np
+
+
+class LRUCache:
+    """Thread-safe LRU mapping of (gene_a, gene_b) -> score."""
+
+    def __init__(self, max_size=100_000):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            for key, value in items:
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent scoring requests into vectorized batches.
+
+    Callers `submit` pair arrays and block on the returned Future. A single
+    worker thread waits for the first request, keeps collecting for at most
+    `max_wait_ms` (or until `max_batch_size` pairs), scores everything with
+    one `score_fn` call and hands each caller its slice of the result.
+    """
+
+    def __init__(self, score_fn, max_batch_size=1024, max_wait_ms=2.0):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, gene_a, gene_b):
+        future = Future()
+        self._queue.put((np.asarray(gene_a, dtype=object), np.asarray(gene_b, dtype=object), future))
+        return future
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        n_pairs = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while n_pairs < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if item is None:
+                self._closed = True
+                break
+            batch.append(item)
+            n_pairs += len(item[0])
+        return batch
+
+    def _run(self):
+        while not self._closed:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            gene_a = np.concatenate([item[0] for item in batch])
+            gene_b = np.concatenate([item[1] for item in batch])
+            try:
+                scores = self.score_fn(gene_a, gene_b)
+            except Exception as exc:
+                for _, _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            start = 0
+            for item_a, _, future in batch:
+                future.set_result(scores[start:start + len(item_a)])
+                start += len(item_a)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+def resolve_feature_names(model, extractor, feature_names=None):
+    """
+    Feature order for `model`: explicit names, then the model's
+    `feature_names_in_`, then the extractor's own order.
+    """
+    if feature_names is None:
+        feature_names = getattr(model, 'feature_names_in_', None)
+    if feature_names is None:
+        feature_names = extractor.feature_names
+    feature_names = list(feature_names)
+
+    missing = set(feature_names) - set(extractor.feature_names)
+    if missing:
+        raise ValueError(f"Extractor cannot produce model features: {sorted(missing)}")
+    n_expected = getattr(model, 'n_features_in_', len(feature_names))
+    if n_expected != len(feature_names):
+        raise ValueError(f"Model expects {n_expected} features, got {len(feature_names)}")
+    return feature_names
+
+
+class ScoringService:
+    """
+    Long-lived SL scorer: model, scaler and feature arrays are loaded once.
+
+    Requests first hit an LRU cache of recent pair scores; the misses go
+    through a MicroBatcher so concurrent requests share one vectorized
+    feature extraction and one `predict_proba` call.
+
+    Parameters:
+    -----------
+    model : classifier
+        Fitted model exposing `predict_proba`
+    extractor : PairFeatureExtractor
+        Batched feature extraction over the loaded datasets
+    scaler : StandardScaler, optional
+        Scaler fitted on the training features
+    feature_names : list of str, optional
+        Feature order the model was trained on (defaults to the model's
+        `feature_names_in_`, then to the extractor's order)
+    """
+
+    def __init__(self, model, extractor, scaler=None, feature_names=None, cache_size=100_000,
+                 max_batch_size=1024, max_wait_ms=2.0):
+        self.model = model
+        self.extractor = extractor
+        self.scaler = scaler
+
+        self.feature_names = resolve_feature_names(model, extractor, feature_names)
+
+        self.cache = LRUCache(cache_size)
+        self.batcher = MicroBatcher(self.score_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    def score_batch(self, gene_a, gene_b):
+        """Score pairs directly (no cache, no batching); NaN for genes not in DepMap."""
+        scores = np.full(len(gene_a), np.nan)
+        known = (self.extractor.gene_ids(gene_a) >= 0) & (self.extractor.gene_ids(gene_b) >= 0)
+        if not known.any():
+            return scores
+
+        X = self.extractor.transform_array(gene_a[known], gene_b[known], self.feature_names)
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        scores[known] = self.model.predict_proba(X)[:, 1]
+        return scores
+
+    def score(self, pairs):
+        """
+        Score a list of (gene_a, gene_b) pairs.
+
+        Returns:
+        --------
+        scores : list of float or None
+            None where a gene is unknown
+        """
+        keys = [(str(gene_a), str(gene_b)) for gene_a, gene_b in pairs]
+        cached = self.cache.get_many(keys)
+        misses = list(dict.fromkeys(key for key in keys if key not in cached))
+
+        if misses:
+            miss_a = np.array([key[0] for key in misses], dtype=object)
+            miss_b = np.array([key[1] for key in misses], dtype=object)
+            scores = self.batcher.submit(miss_a, miss_b).result()
+            fresh = list(zip(misses, scores.tolist()))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+
+        return [None if np.isnan(cached[key]) else cached[key] for key in keys]
+
+    def stats(self):
+        return {
+            'cache_size': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'n_features': len(self.feature_names),
+        }
+
+    def close(self):
+        self.batcher.close()
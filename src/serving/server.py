@@ -0,0 +1,149 @@
+"""
+Local HTTP scoring server for SL gene pairs.
+
+Usage:
+    python -m src.serving.server --model xgb_model.joblib --scaler scaler.joblib \\
+        --gene-effect CRISPRGeneEffect.csv --mutations OmicsSomaticMutations.csv
+    python -m src.serving.server --model-name xgb_sl
+
+    curl -s localhost:8765/score -d '{"pairs": [["BRCA1", "PARP1"]]}'
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import joblib
+
+from src import config
+from src.datasets import depmap
+from src.feature_extraction.combined_features import PairFeatureExtractor
+from src.feature_extraction.mutation_features import process_detailed_mutations
+from src.models.registry import ModelRegistry
+from src.serving.scorer import ScoringService
+
+
+def make_handler(service):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', **service.stats()})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/score':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length))
+                pairs = [(pair[0], pair[1]) for pair in request['pairs']]
+            except (ValueError, KeyError, IndexError, TypeError) as exc:
+                self._send_json(400, {'error': f'bad request: {exc}'})
+                return
+
+            try:
+                scores = service.score(pairs)
+            except Exception as exc:
+                self._send_json(500, {'error': f'scoring failed: {exc}'})
+                return
+            self._send_json(200, {'pairs': [list(pair) for pair in pairs], 'scores': scores})
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate the latency budget
+            pass
+
+    return ScoringHandler
+
+
+def load_components(model_path, gene_effect_file, mutations_file=None, scaler_path=None,
+                    model_name=None, model_version='latest'):
+    """
+    Load a model, its scaler and the feature datasets.
+
+    The model comes either from a bare joblib file (`model_path`, plus an
+    optional `scaler_path`) or from the model registry (`model_name`), in
+    which case the scaler and feature schema come with it.
+
+    Returns:
+    --------
+    model, extractor, scaler, manifest
+        `manifest` is None for bare joblib files
+    """
+    manifest = None
+    if model_name is not None:
+        artifact = ModelRegistry().load(model_name, model_version)
+        model, scaler, manifest = artifact.model, artifact.scaler, artifact.manifest
+    else:
+        model = joblib.load(model_path)
+        scaler = joblib.load(scaler_path) if scaler_path else None
+
+    genesdf = depmap.load_cell_info(gene_effect_file)
+    cell_line_mutations = None
+    if mutations_file:
+        mutations_df = pd.read_csv(config.DATA_DIR / mutations_file)
+        cell_line_mutations = process_detailed_mutations(mutations_df)
+
+    extractor = PairFeatureExtractor(genesdf, cell_line_mutations)
+    return model, extractor, scaler, manifest
+
+
+def load_service(model_path, gene_effect_file, mutations_file=None, scaler_path=None,
+                 model_name=None, model_version='latest', **service_kwargs):
+    """Load the model and all datasets once and wrap them in a ScoringService."""
+    model, extractor, scaler, manifest = load_components(
+        model_path, gene_effect_file, mutations_file, scaler_path, model_name, model_version
+    )
+    feature_names = manifest['feature_names'] if manifest else None
+    return ScoringService(model, extractor, scaler=scaler, feature_names=feature_names, **service_kwargs)
+
+
+def serve(service, host='127.0.0.1', port=8765):
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Scoring SL pairs on http://{host}:{port}/score")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve SL pair scores over HTTP")
+    model_source = parser.add_mutually_exclusive_group(required=True)
+    model_source.add_argument('--model', help="Path to a joblib-dumped classifier")
+    model_source.add_argument('--model-name', help="Name of a model in the model registry")
+    parser.add_argument('--model-version', default='latest', help="Registry version (with --model-name)")
+    parser.add_argument('--scaler', help="Path to the joblib-dumped StandardScaler (with --model)")
+    parser.add_argument('--gene-effect', default='CRISPRGeneEffect.csv', help="File in DATA_DIR")
+    parser.add_argument('--mutations', default='OmicsSomaticMutations.csv', help="File in DATA_DIR")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=100_000)
+    parser.add_argument('--max-batch-size', type=int, default=1024)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    service = load_service(
+        args.model, args.gene_effect, args.mutations, scaler_path=args.scaler,
+        model_name=args.model_name, model_version=args.model_version, cache_size=args.cache_size,
+        max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+    )
+    serve(service, args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import contextlib
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import classification_report, roc_auc_score
+from src import config
+
+
+def make_random_forest(y_train, seed=config.SEED, **params):
+    """Random forest used in the statistical-test experiment."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    params = {'n_estimators': 100, 'class_weight': 'balanced', **params}
+    # One thread per model: parallelism comes from running folds side by side
+    return RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+
+
+def make_xgboost(y_train, seed=config.SEED, **params):
+    """XGBoost classifier with the fold's class imbalance as scale_pos_weight."""
+    import xgboost as xgb
+
+    n_pos = np.sum(y_train)
+    params = {
+        'objective': 'binary:logistic',
+        'eval_metric': 'logloss',
+        'n_estimators': 100,
+        'scale_pos_weight': (len(y_train) - n_pos) / n_pos if n_pos > 0 else 1.0,
+        **params,
+    }
+    return xgb.XGBClassifier(random_state=seed, n_jobs=1, **params)
+
+
+DEFAULT_MODELS = {
+    'random_forest': make_random_forest,
+    'xgboost': make_xgboost,
+}
+
+
+def to_memmap(X, path=None, dtype=np.float64):
+    """
+    Store a feature matrix once as a memory-mapped .npy file.
+
+    Worker processes open the same file read-only, so the OS shares its
+    pages instead of every worker receiving a pickled copy.
+
+    Returns:
+    --------
+    path : Path
+        Location of the .npy file (with `path=None`, a new temporary
+        directory the caller must remove; see `memmapped_features`)
+    """
+    if path is None:
+        path = Path(tempfile.mkdtemp(prefix='moslgnn_cv_')) / 'features.npy'
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    X = np.asarray(X, dtype=dtype)
+    mmap = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=X.shape)
+    mmap[:] = X
+    mmap.flush()
+    del mmap
+
+    return path
+
+
+@contextlib.contextmanager
+def memmapped_features(X, features_path=None):
+    """
+    Path of a memory-mapped copy of `X` for the duration of the block.
+
+    A path `X` is used as is and an explicit `features_path` is kept;
+    otherwise the matrix goes to a temporary directory that is removed on
+    exit.
+    """
+    if isinstance(X, (str, Path)):
+        yield Path(X)
+    elif features_path is not None:
+        yield to_memmap(X, features_path)
+    else:
+        with tempfile.TemporaryDirectory(prefix='moslgnn_cv_') as tmp_dir:
+            yield to_memmap(X, Path(tmp_dir) / 'features.npy')
+
+
+def _run_fold(features_path, y, model_name, make_model, fold_idx, train_idx, val_idx, seed):
+    X = np.load(features_path, mmap_mode='r')
+    y_train, y_val = y[train_idx], y[val_idx]
+
+    model = make_model(y_train, seed=seed)
+
+    start = time.perf_counter()
+    model.fit(X[train_idx], y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_proba = model.predict_proba(X[val_idx])[:, 1]
+    y_pred = (y_proba >= 0.5).astype(int)
+    predict_time = time.perf_counter() - start
+
+    auc = roc_auc_score(y_val, y_proba) if len(np.unique(y_val)) > 1 else np.nan
+    report = classification_report(
+        y_val, y_pred, labels=[0, 1], target_names=['Not SL', 'SL'],
+        output_dict=True, zero_division=0
+    )
+
+    return {
+        'model': model_name,
+        'fold': fold_idx,
+        'auc': auc,
+        'n_train': len(train_idx),
+        'n_val': len(val_idx),
+        'fit_time': fit_time,
+        'predict_time': predict_time,
+        'report': report,
+    }
+
+
+def run_cv(X, y, folds, models=None, n_jobs=-1, features_path=None, seed=config.SEED):
+    """
+    Run every (model, fold) combination concurrently.
+
+    The scaled feature matrix is written once as a memory-mapped array and
+    every loky worker trains one (model, fold) task on slices of it, so a
+    5-fold x multi-model comparison runs in roughly 1/n_cores of the serial
+    wall time.
+
+    Parameters:
+    -----------
+    X : array-like or path
+        Scaled feature matrix, or the path of a .npy written by `to_memmap`
+    y : array-like
+        Binary labels aligned with the rows of X
+    folds : list of (train_idx, val_idx)
+        E.g. from `splits.gene_disjoint_folds` or `KFold.split`
+    models : dict, optional
+        Name -> factory(y_train, seed=...) returning an unfitted classifier.
+        Defaults to random forest and XGBoost
+    n_jobs : int
+        Number of worker processes (-1 = all cores)
+    features_path : path, optional
+        Where to place (and keep) the memory-mapped matrix; by default it
+        goes to a temporary directory removed when the run ends
+
+    Returns:
+    --------
+    results : DataFrame
+        One row per (model, fold) with AUC, classification report and timings
+    """
+    if models is None:
+        models = DEFAULT_MODELS
+
+    y = np.asarray(y)
+    with memmapped_features(X, features_path) as features_path:
+        tasks = [
+            delayed(_run_fold)(features_path, y, name, make_model, fold_idx, train_idx, val_idx, seed)
+            for name, make_model in models.items()
+            for fold_idx, (train_idx, val_idx) in enumerate(folds)
+        ]
+
+        start = time.perf_counter()
+        results = Parallel(n_jobs=n_jobs, backend='loky')(tasks)
+        wall_time = time.perf_counter() - start
+
+    results = pd.DataFrame(results)
+    results.attrs['wall_time'] = wall_time
+    return results
+
+
+def summarize_cv(results):
+    """Mean/std AUC and total fit time per model."""
+    return results.groupby('model').agg(
+        auc_mean=('auc', 'mean'),
+        auc_std=('auc', 'std'),
+        fit_time_total=('fit_time', 'sum'),
+    )
@@ -0,0 +1,95 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src import instrumentation
+from src.feature_extraction.sl_features import generate_negative_pairs
+
+LABEL_COLUMN = 'is_synthetic_lethal'
+
+logger = logging.getLogger(__name__)
+
+
+def _pair_columns(pairs):
+    pairs = np.asarray(list(pairs), dtype=object).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+@instrumentation.timed('create_training_dataset')
+def create_training_dataset(sl_pairs, extractor, negative_pairs=None, known_sl_pairs=None, comp=True,
+                            output_file=None):
+    """
+    Create training dataset from known SL pairs and negative examples.
+
+    Same selection rules as the statistical-test experiment, with features
+    computed in batches by a PairFeatureExtractor: pairs whose features
+    could not be computed (zero / undefined DepMap correlation) are dropped.
+
+    Parameters:
+    -----------
+    sl_pairs : list of tuples
+        Known synthetic lethal pairs: [(gene_a, gene_b), ...]
+    extractor : PairFeatureExtractor
+        Feature extractor over the gene effect (and mutation, STRING, KEGG) data
+    negative_pairs : list of tuples, optional
+        Known non-SL pairs. If None, randomly sample twice as many gene pairs
+        as kept positives.
+    known_sl_pairs : list of tuples or KnownPairFilter, optional
+        Pairs to exclude when sampling negatives (defaults to `sl_pairs`)
+    comp : bool
+        If False only the positive pairs are featurized, without labels
+        (e.g. to score computational predictions)
+    output_file : str or Path, optional
+        Write the final table to this CSV
+
+    Returns:
+    --------
+    final_df : DataFrame
+        gene_a, gene_b, features (and is_synthetic_lethal if `comp`)
+    gene_pairs : list
+        Corresponding gene pairs
+    """
+    def featurize(pairs):
+        gene_a, gene_b = _pair_columns(pairs)
+        X = extractor.transform(gene_a, gene_b)
+        keep = np.nan_to_num(X['depmap_pearson_correlation'].to_numpy()) != 0
+        instrumentation.count('pairs', len(gene_a))
+        instrumentation.count('pairs_dropped', int((~keep).sum()))
+        pairs_df = pd.DataFrame({'gene_a': gene_a[keep], 'gene_b': gene_b[keep]})
+        return pd.concat([pairs_df, X[keep].reset_index(drop=True)], axis=1)
+
+    logger.info("Processing %d known SL pairs...", len(sl_pairs))
+    positives = featurize(sl_pairs)
+
+    if not comp:
+        final_df = positives
+        logger.info("Done: %d pairs, %d features", len(final_df), len(final_df.columns) - 2)
+    else:
+        positives[LABEL_COLUMN] = 1
+
+        logger.info("Generating random negative pairs...")
+        if negative_pairs is None:
+            if known_sl_pairs is None:
+                known_sl_pairs = sl_pairs
+            # The sampler only reads the gene columns
+            gene_frame = pd.DataFrame(columns=extractor.genes)
+            negative_pairs = generate_negative_pairs(len(positives) * 2, known_sl_pairs, gene_frame)
+
+        logger.info("Processing %d negative pairs...", len(negative_pairs))
+        negatives = featurize(negative_pairs)
+        negatives[LABEL_COLUMN] = 0
+
+        final_df = pd.concat([positives, negatives], ignore_index=True)
+        y = final_df[LABEL_COLUMN].to_numpy()
+        logger.info(
+            "Dataset created: %d pairs, %d positive (SL) (%.2f%%), %d features",
+            len(final_df), np.sum(y), np.mean(y) * 100, len(final_df.columns) - 3,
+        )
+
+    if output_file is not None:
+        final_df.to_csv(output_file, index=False)
+        logger.info("Combined features and labels saved to '%s'", output_file)
+
+    return final_df, list(zip(final_df['gene_a'], final_df['gene_b']))
+
@@ -0,0 +1,290 @@
+import os
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+from src import config
+from src.graph.adjacency import message_passing_inputs
+from src.graph.sampling import make_link_loader
+
+CHECKPOINT_DIR = config.RESULTS_DIR / 'checkpoints'
+
+
+def configure_cpu(num_threads=None, num_interop_threads=None):
+    """
+    Pin torch's intra-op / inter-op thread pools.
+
+    With multi-worker sampling, leave a few cores to the loader workers
+    instead of letting torch grab all of them for the dense layers.
+    """
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads is not None:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # Can only be set once, before any inter-op parallel work
+            pass
+
+
+def link_pos_weight(edge_label):
+    """Negative/positive ratio of the supervision labels, for BCEWithLogitsLoss."""
+    n_pos = float(edge_label.sum())
+    n_neg = float(len(edge_label)) - n_pos
+    return torch.tensor(n_neg / n_pos if n_pos > 0 else 1.0)
+
+
+def link_metrics(true_labels, logits):
+    """Accuracy, precision, recall, F1 at 0.5 and ROC AUC for raw logits."""
+    probs = 1.0 / (1.0 + np.exp(-logits))
+    predicted_labels = (probs > 0.5).astype(int)
+    return {
+        'acc': accuracy_score(true_labels, predicted_labels),
+        'prec': precision_score(true_labels, predicted_labels, zero_division=0),
+        'rec': recall_score(true_labels, predicted_labels, zero_division=0),
+        'f1': f1_score(true_labels, predicted_labels, zero_division=0),
+        'auc': roc_auc_score(true_labels, probs) if len(np.unique(true_labels)) > 1 else float('nan'),
+    }
+
+
+def train_epoch(model, optimizer, criterion, data):
+    """One full-batch step over all supervision edges of `data`."""
+    model.train()
+    optimizer.zero_grad()
+    node_embeddings = model(data.x, *message_passing_inputs(data))
+    out = model.decode(node_embeddings, data.edge_label_index, data.edge_label_attr)
+    loss = criterion(out, data.edge_label.view(-1, 1).float())
+    loss.backward()
+    optimizer.step()
+    return loss.item()
+
+
+def evaluate(model, criterion, data):
+    """Full-batch loss and link metrics on the supervision edges of `data`."""
+    model.eval()
+    with torch.no_grad():
+        node_embeddings = model(data.x, *message_passing_inputs(data))
+        logits = model.decode(node_embeddings, data.edge_label_index, data.edge_label_attr)
+        loss = criterion(logits, data.edge_label.view(-1, 1).float())
+    return loss.item(), link_metrics(data.edge_label.cpu().numpy(), logits.view(-1).cpu().numpy())
+
+
+def train_epoch_minibatch(model, optimizer, criterion, loader):
+    """
+    One pass over a link loader; returns the edge-weighted mean loss.
+
+    Each batch carries its own sampled subgraph, so node embeddings are
+    only computed for the receptive field of the batch's supervision edges.
+    """
+    model.train()
+    total_loss, total_edges = 0.0, 0
+    for batch in loader:
+        optimizer.zero_grad()
+        node_embeddings = model(batch.x, batch.edge_index, getattr(batch, 'edge_weight', None))
+        out = model.decode(node_embeddings, batch.edge_label_index, batch.edge_label_attr)
+        loss = criterion(out, batch.edge_label.view(-1, 1).float())
+        loss.backward()
+        optimizer.step()
+
+        n_edges = batch.edge_label.numel()
+        total_loss += loss.item() * n_edges
+        total_edges += n_edges
+    return total_loss / max(total_edges, 1)
+
+
+def evaluate_minibatch(model, criterion, loader):
+    """Loss and link metrics over a (non-shuffled) link loader."""
+    model.eval()
+    labels, logits = [], []
+    total_loss, total_edges = 0.0, 0
+    with torch.no_grad():
+        for batch in loader:
+            node_embeddings = model(batch.x, batch.edge_index, getattr(batch, 'edge_weight', None))
+            out = model.decode(node_embeddings, batch.edge_label_index, batch.edge_label_attr)
+            loss = criterion(out, batch.edge_label.view(-1, 1).float())
+
+            n_edges = batch.edge_label.numel()
+            total_loss += loss.item() * n_edges
+            total_edges += n_edges
+            labels.append(batch.edge_label.cpu().numpy())
+            logits.append(out.view(-1).cpu().numpy())
+    return total_loss / max(total_edges, 1), link_metrics(np.concatenate(labels), np.concatenate(logits))
+
+
+def save_checkpoint(path, state):
+    """Write a checkpoint atomically, so an interrupted save never corrupts the last good one."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _rng_state():
+    return {'torch': torch.get_rng_state(), 'numpy': np.random.get_state(), 'python': random.getstate()}
+
+
+def _set_rng_state(state):
+    torch.set_rng_state(state['torch'])
+    np.random.set_state(state['numpy'])
+    random.setstate(state['python'])
+
+
+def fit(model, train_data, val_data=None, epochs=50, lr=0.01, batch_size=None, num_neighbors=(10, 10),
+        num_workers=0, num_threads=None, pos_weight=None, run_name=None, checkpoint_dir=CHECKPOINT_DIR,
+        checkpoint_every=1, resume=True, monitor='val_auc', mode='max', patience=None, min_delta=0.0,
+        seed=config.SEED, verbose=True):
+    """
+    Train a link predictor with optional checkpointing, resume and early stopping.
+
+    Full-batch over the split when `batch_size` is None, otherwise
+    neighbor-sampled mini-batches (see `make_link_loader`).
+
+    With a `run_name`, model, optimizer, RNG states, history and the
+    early-stopping state are saved to `checkpoint_dir / run_name /
+    last.pt` every `checkpoint_every` epochs (and on the final epoch), and
+    the best weights to `best.pt` on every improvement. last.pt also
+    carries the best weights as of its epoch, so a rerun with `resume=True`
+    continues from the last saved epoch with a consistent best model even
+    if best.pt was written after it; with `num_workers=0` the continued run
+    is identical to an uninterrupted one.
+
+    Parameters:
+    -----------
+    model : GCNLinkPredictor
+    train_data, val_data : Data
+        Splits with x, edge_index, edge_label_index, edge_label, edge_label_attr
+    monitor : str
+        History key for early stopping / best model (e.g. 'val_auc', 'val_loss')
+    mode : {'max', 'min'}
+        Whether larger or smaller `monitor` values are better
+    patience : int, optional
+        Stop after this many epochs without improvement; None disables
+
+    Returns:
+    --------
+    list of dict
+        Per-epoch history; the model is left holding the best weights
+        when a validation split is given
+    """
+    configure_cpu(num_threads)
+    torch.manual_seed(seed)
+
+    if pos_weight is None:
+        pos_weight = link_pos_weight(train_data.edge_label)
+    criterion = nn.BCEWithLogitsLoss(pos_weight=torch.as_tensor(pos_weight, dtype=torch.float))
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+
+    train_loader = val_loader = None
+    if batch_size is not None:
+        train_loader = make_link_loader(train_data, num_neighbors, batch_size, shuffle=True, num_workers=num_workers)
+        if val_data is not None:
+            val_loader = make_link_loader(val_data, num_neighbors, batch_size, shuffle=False, num_workers=num_workers)
+
+    sign = 1.0 if mode == 'max' else -1.0
+    state = {'epoch': 0, 'history': [], 'best_score': -np.inf, 'best_epoch': 0, 'bad_epochs': 0}
+    run_dir = None if run_name is None else Path(checkpoint_dir) / run_name
+    last_path = None if run_dir is None else run_dir / 'last.pt'
+    best_path = None if run_dir is None else run_dir / 'best.pt'
+
+    best_weights = None
+    if resume and last_path is not None and last_path.exists():
+        checkpoint = torch.load(last_path, weights_only=False)
+        model.load_state_dict(checkpoint['model'])
+        optimizer.load_state_dict(checkpoint['optimizer'])
+        _set_rng_state(checkpoint['rng'])
+        state = checkpoint['state']
+        # The best weights as of this epoch: best.pt may already hold a later improvement
+        best_weights = checkpoint.get('best_model')
+        if verbose:
+            print(f"Resumed {run_name} from epoch {state['epoch']}")
+
+    stopped = patience is not None and state['bad_epochs'] >= patience
+    for epoch in range(state['epoch'] + 1, epochs + 1):
+        if stopped:
+            break
+        start = time.perf_counter()
+        if train_loader is not None:
+            train_loss = train_epoch_minibatch(model, optimizer, criterion, train_loader)
+        else:
+            train_loss = train_epoch(model, optimizer, criterion, train_data)
+        record = {'epoch': epoch, 'train_loss': train_loss}
+
+        if val_data is not None:
+            if val_loader is not None:
+                val_loss, val_metrics = evaluate_minibatch(model, criterion, val_loader)
+            else:
+                val_loss, val_metrics = evaluate(model, criterion, val_data)
+            record['val_loss'] = val_loss
+            record.update({f"val_{name}": value for name, value in val_metrics.items()})
+        record['time'] = time.perf_counter() - start
+        state['history'].append(record)
+        state['epoch'] = epoch
+
+        if monitor in record and np.isfinite(record[monitor]):
+            score = sign * record[monitor]
+            if score > state['best_score'] + min_delta:
+                state.update(best_score=score, best_epoch=epoch, bad_epochs=0)
+                best_weights = {name: value.detach().clone() for name, value in model.state_dict().items()}
+                if best_path is not None:
+                    save_checkpoint(best_path, best_weights)
+            else:
+                state['bad_epochs'] += 1
+        stopped = patience is not None and state['bad_epochs'] >= patience
+
+        if last_path is not None and (epoch % checkpoint_every == 0 or epoch == epochs or stopped):
+            save_checkpoint(last_path, {
+                'model': model.state_dict(),
+                'optimizer': optimizer.state_dict(),
+                'rng': _rng_state(),
+                'state': state,
+                'best_model': best_weights,
+            })
+
+        if verbose:
+            line = f"Epoch {epoch:03d} | train loss {record['train_loss']:.4f}"
+            if val_data is not None:
+                line += f" | val loss {record['val_loss']:.4f} | val AUC {record['val_auc']:.4f}"
+            print(f"{line} | {record['time']:.1f}s")
+        if stopped and verbose:
+            print(f"Early stopping at epoch {epoch}: best {monitor} at epoch {state['best_epoch']}")
+
+    if best_weights is not None:
+        model.load_state_dict(best_weights)
+    return state['history']
+
+
+def fit_minibatch(model, train_data, val_data=None, epochs=50, lr=0.01, batch_size=1024,
+                  num_neighbors=(10, 10), num_workers=0, num_threads=None, pos_weight=None,
+                  seed=config.SEED, verbose=True, **kwargs):
+    """
+    Train a link predictor with neighbor-sampled mini-batches on CPU.
+
+    Parameters:
+    -----------
+    batch_size : int
+        Supervision edges per batch
+    num_neighbors : sequence of int
+        Fan-out per GCN layer, outermost hop last (-1 = all neighbors)
+    num_workers : int
+        Loader processes sampling subgraphs in the background
+    num_threads : int, optional
+        torch intra-op threads for the main process
+    pos_weight : float, optional
+        BCE positive weight (default: neg/pos ratio of the training labels)
+    **kwargs
+        Checkpointing / early-stopping options of `fit`
+
+    Returns:
+    --------
+    list of dict
+        Per-epoch train loss, validation loss/metrics and epoch time
+    """
+    return fit(model, train_data, val_data, epochs=epochs, lr=lr, batch_size=batch_size,
+               num_neighbors=num_neighbors, num_workers=num_workers, num_threads=num_threads,
+               pos_weight=pos_weight, seed=seed, verbose=verbose, **kwargs)
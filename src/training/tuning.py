@@ -0,0 +1,207 @@
+import math
+import time
+
+import pandas as pd
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import roc_auc_score
+from src import config
+from src.training.cv import make_random_forest, make_xgboost, memmapped_features
+
+# Search spaces; the number of trees is the budget and is not sampled
+SEARCH_SPACES = {
+    'random_forest': {
+        'max_depth': [None, 8, 16, 32],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': ['sqrt', 0.3, 0.6],
+    },
+    'xgboost': {
+        'max_depth': [3, 4, 6, 8, 10],
+        'learning_rate': [0.01, 0.03, 0.1, 0.3],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'min_child_weight': [1, 3, 10],
+    },
+}
+
+
+def sample_configs(space, n_configs, rng):
+    """Draw `n_configs` random configurations from a dict of candidate lists."""
+    return [
+        {name: values[rng.integers(len(values))] for name, values in space.items()}
+        for _ in range(n_configs)
+    ]
+
+
+def _score_config(features_path, y, family, params, n_trees, folds, seed, early_stopping_rounds):
+    X = np.load(features_path, mmap_mode='r')
+    aucs = []
+    n_used = []
+
+    for train_idx, val_idx in folds:
+        y_train, y_val = y[train_idx], y[val_idx]
+        # AUC is undefined on a single-class fold (e.g. a small gene-disjoint C3 fold)
+        if len(np.unique(y_train)) < 2 or len(np.unique(y_val)) < 2:
+            continue
+        X_val = X[val_idx]
+
+        if family == 'xgboost':
+            # hist trees + early stopping on the validation fold: weak configs stop early
+            model = make_xgboost(
+                y_train, seed=seed, tree_method='hist', n_estimators=n_trees,
+                early_stopping_rounds=early_stopping_rounds, eval_metric='auc', **params
+            )
+            model.fit(X[train_idx], y_train, eval_set=[(X_val, y_val)], verbose=False)
+            n_used.append(model.best_iteration + 1)
+        else:
+            model = make_random_forest(y_train, seed=seed, n_estimators=n_trees, **params)
+            model.fit(X[train_idx], y_train)
+            n_used.append(n_trees)
+
+        aucs.append(roc_auc_score(y_val, model.predict_proba(X_val)[:, 1]))
+
+    if not aucs:
+        return np.nan, n_trees
+    return float(np.mean(aucs)), int(np.mean(n_used))
+
+
+def successive_halving(family, configs, min_trees, max_trees, features_path, y, folds,
+                       eta=3, n_jobs=-1, seed=config.SEED, early_stopping_rounds=20,
+                       start_time=None, bracket=0):
+    """
+    Successive halving over `configs` with the number of trees as budget.
+
+    Every rung trains all surviving configs on the shared folds, keeps the
+    top 1/eta and multiplies the budget by eta until `max_trees` is reached.
+
+    Returns:
+    --------
+    trials : list of dict
+        One entry per (config, rung) with AUC and elapsed time
+    """
+    if start_time is None:
+        start_time = time.perf_counter()
+
+    trials = []
+    survivors = list(range(len(configs)))
+    n_trees = min_trees
+
+    with Parallel(n_jobs=n_jobs, backend='loky') as parallel:
+        rung = 0
+        while survivors:
+            n_trees = min(int(round(n_trees)), max_trees)
+            scores = parallel(
+                delayed(_score_config)(
+                    features_path, y, family, configs[i], n_trees, folds, seed, early_stopping_rounds
+                )
+                for i in survivors
+            )
+            elapsed = time.perf_counter() - start_time
+
+            for i, (auc, n_used) in zip(survivors, scores):
+                trials.append({
+                    'family': family,
+                    'bracket': bracket,
+                    'rung': rung,
+                    'config_id': i,
+                    'params': configs[i],
+                    'n_trees': n_trees,
+                    'n_trees_used': n_used,
+                    'auc': auc,
+                    'elapsed': elapsed,
+                })
+
+            if n_trees >= max_trees or len(survivors) == 1:
+                break
+
+            n_keep = max(1, len(survivors) // eta)
+            order = np.argsort([-auc for auc, _ in scores], kind='stable')
+            survivors = [survivors[j] for j in order[:n_keep]]
+            n_trees *= eta
+            rung += 1
+
+    return trials
+
+
+def hyperband(family, features_path, y, folds, min_trees=10, max_trees=810, eta=3,
+              n_jobs=-1, seed=config.SEED, early_stopping_rounds=20, start_time=None):
+    """
+    Hyperband: several successive-halving brackets trading breadth for budget.
+
+    The most aggressive bracket starts many configs with `min_trees` trees,
+    the most conservative runs a few configs with `max_trees` from the start.
+    """
+    rng = np.random.default_rng(seed)
+    s_max = int(math.floor(math.log(max_trees / min_trees, eta) + 1e-9))
+
+    trials = []
+    for s in range(s_max, -1, -1):
+        n_configs = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        configs = sample_configs(SEARCH_SPACES[family], n_configs, rng)
+        trials.extend(successive_halving(
+            family, configs, max_trees / eta ** s, max_trees, features_path, y, folds,
+            eta=eta, n_jobs=n_jobs, seed=seed, early_stopping_rounds=early_stopping_rounds,
+            start_time=start_time, bracket=s_max - s,
+        ))
+    return trials
+
+
+def tune(X, y, folds, families=('random_forest', 'xgboost'), min_trees=10, max_trees=810,
+         eta=3, n_jobs=-1, seed=config.SEED, early_stopping_rounds=20, features_path=None):
+    """
+    Budgeted hyperparameter search over RF and XGBoost.
+
+    Parameters:
+    -----------
+    X : array-like or path
+        Scaled feature matrix, or a .npy written by `cv.to_memmap` (reused as is)
+    y : array-like
+        Binary labels
+    folds : list of (train_idx, val_idx)
+        Cached folds, e.g. from `splits.gene_disjoint_folds`; folds whose
+        training or validation set lacks a class are skipped
+    families : tuple of str
+        Model families to search (keys of SEARCH_SPACES)
+    min_trees, max_trees : int
+        Smallest and largest tree budget
+    eta : int
+        Halving rate
+    features_path : path, optional
+        Where to keep the memory-mapped matrix; by default it goes to a
+        temporary directory removed when the search ends
+
+    Returns:
+    --------
+    result : dict
+        best_family, best_params, best_n_trees, best_auc, plus `trials`
+        (every evaluation) and `trace` (elapsed time vs best AUC so far)
+    """
+    y = np.asarray(y)
+    if not any(len(np.unique(y[train_idx])) > 1 and len(np.unique(y[val_idx])) > 1
+               for train_idx, val_idx in folds):
+        raise ValueError("No fold has both classes in its training and validation sets")
+
+    start_time = time.perf_counter()
+    trials = []
+    with memmapped_features(X, features_path) as features_path:
+        for family in families:
+            trials.extend(hyperband(
+                family, features_path, y, folds, min_trees=min_trees, max_trees=max_trees,
+                eta=eta, n_jobs=n_jobs, seed=seed, early_stopping_rounds=early_stopping_rounds,
+                start_time=start_time,
+            ))
+
+    trials = pd.DataFrame(trials)
+    best = trials.loc[trials['auc'].idxmax()]
+
+    trace = trials.sort_values('elapsed')[['elapsed', 'family', 'n_trees', 'auc']].reset_index(drop=True)
+    trace['best_auc'] = trace['auc'].cummax()
+
+    return {
+        'best_family': best['family'],
+        'best_params': best['params'],
+        'best_n_trees': int(best['n_trees_used']),
+        'best_auc': float(best['auc']),
+        'trials': trials,
+        'trace': trace,
+    }